@@ -0,0 +1,194 @@
+"""
+Achievement Rules
+=================
+
+This module unlocks achievements automatically from declarative rules.
+
+A rule unlocks an achievement once a metric of a user reaches a threshold:
+- competition_progress: progress in one competition (rule has competition_id)
+- competitions_joined: number of distinct competitions joined (either route)
+- rewards_redeemed: number of rewards redeemed
+
+Write paths report events with evaluate_rules(user_id, metric, value):
+progress updates, competition joins and redemptions (batch paths use
+evaluate_rules_batch()). Rules are indexed in
+process by (metric, competition_id) with their thresholds sorted, so an
+event only looks at the rules watching its metric and finds the ones that
+fire with a bisect; an event no rule watches costs no SQL at all. Count
+metrics are passed as callables and only counted when some rule watches
+them. Fired achievements are unlocked in the caller's transaction with
+grant_achievements() (bulk inserts of the unlock and celebration rows).
+
+Unlocks are permanent: a metric dropping below a threshold later does not
+lock the achievement again.
+"""
+
+import bisect
+import threading
+from datetime import datetime
+
+from utils.db import db, run_after_commit
+
+# Metric -> whether its rules are scoped to a competition
+RULE_METRICS = {
+    'competition_progress': True,
+    'competitions_joined': False,
+    'rewards_redeemed': False,
+}
+
+
+class AchievementRule(db.Model):
+    """
+    Unlock rule of an achievement.
+
+    Attributes:
+        id (int): Primary key
+        achievement_id (int): Achievement unlocked when the rule fires
+        metric (str): Watched metric (see RULE_METRICS)
+        competition_id (int): Competition of competition_progress rules, None otherwise
+        threshold (int): Metric value at which the rule fires
+        created_at (datetime): When the rule was created
+    """
+    __tablename__ = 'achievement_rules'
+
+    id = db.Column(db.Integer, primary_key=True)
+    achievement_id = db.Column(db.Integer, db.ForeignKey('achievements.id'), nullable=False, index=True)
+    metric = db.Column(db.String(40), nullable=False)
+    competition_id = db.Column(db.Integer, db.ForeignKey('competitions.id'), nullable=True)
+    threshold = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def serialize(self):
+        """Convert the rule to a dictionary for JSON serialization"""
+        return {
+            "id": self.id,
+            "achievement_id": self.achievement_id,
+            "metric": self.metric,
+            "competition_id": self.competition_id,
+            "threshold": self.threshold,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class RuleIndex:
+    """Rules grouped by (metric, competition_id), sorted by threshold; loaded lazily"""
+
+    def __init__(self):
+        self._index = None  # (metric, competition_id) -> (thresholds, achievement ids)
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    grouped = {}
+                    rules = db.session.query(
+                        AchievementRule.metric, AchievementRule.competition_id,
+                        AchievementRule.threshold, AchievementRule.achievement_id
+                    ).order_by(AchievementRule.threshold.asc()).all()
+                    for metric, competition_id, threshold, achievement_id in rules:
+                        thresholds, achievements = grouped.setdefault((metric, competition_id), ([], []))
+                        thresholds.append(threshold)
+                        achievements.append(achievement_id)
+                    self._index = grouped
+                index = self._index
+        return index
+
+    def watches(self, metric: str, competition_id=None) -> bool:
+        return (metric, competition_id) in self._load()
+
+    def fired(self, metric: str, value: int, competition_id=None) -> set:
+        """Achievement ids of the rules on (metric, competition_id) with threshold <= value"""
+        entry = self._load().get((metric, competition_id))
+        if entry is None:
+            return set()
+        thresholds, achievements = entry
+        return set(achievements[:bisect.bisect_right(thresholds, value)])
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+    def invalidate_after_commit(self):
+        run_after_commit(self.invalidate)
+
+
+# Shared index used by every write path that reports rule events
+rule_index = RuleIndex()
+
+
+def evaluate_rules(user_id: str, metric: str, value, competition_id=None) -> list:
+    """
+    Unlock the achievements whose rules on metric fire for a user's new metric value.
+
+    Runs in the caller's transaction (call it after staging the change the
+    metric reflects, before the commit).
+
+    Args:
+        user_id (str): User the event belongs to
+        metric (str): Metric that changed (see RULE_METRICS)
+        value (int or callable): New metric value, or a callable returning it,
+            called only when some rule watches the metric
+        competition_id (int): Competition of competition_progress events
+
+    Returns:
+        list: CatalogEntry of every achievement unlocked
+    """
+    # Imported here to avoid circular imports (routes import this module)
+    from routes.achievements import grant_achievements
+
+    if not RULE_METRICS.get(metric):
+        competition_id = None
+    if not rule_index.watches(metric, competition_id):
+        return []
+    if callable(value):
+        value = value()
+    fired = rule_index.fired(metric, int(value or 0), competition_id)
+    if not fired:
+        return []
+    return [entry for _, entry in grant_achievements((user_id, achievement_id) for achievement_id in fired)]
+
+
+def evaluate_rules_batch(metric: str, events) -> list:
+    """
+    evaluate_rules() for many events at once (batch write paths).
+
+    The fired achievements of every event are unlocked together with one
+    grant_achievements(bulk=True) call.
+
+    Args:
+        metric (str): Metric that changed (see RULE_METRICS)
+        events (iterable): (user_id, new value, competition_id) per event
+
+    Returns:
+        list: (user_id, CatalogEntry) of every achievement unlocked
+    """
+    from routes.achievements import grant_achievements
+
+    pairs = []
+    for user_id, value, competition_id in events:
+        if not RULE_METRICS.get(metric):
+            competition_id = None
+        pairs.extend((user_id, achievement_id) for achievement_id in rule_index.fired(metric, int(value or 0), competition_id))
+    if not pairs:
+        return []
+    return grant_achievements(pairs, bulk=True)
+
+
+def competitions_joined(user_id: str) -> int:
+    """Number of distinct competitions a user joined through either route"""
+    from routes.games import Participation, UserCompetition
+
+    joined = db.union(
+        db.select(Participation.competition_id).where(Participation.user_id == user_id),
+        db.select(UserCompetition.competition_id).where(UserCompetition.user_id == user_id),
+    ).subquery()
+    return db.session.execute(db.select(db.func.count()).select_from(joined)).scalar()
+
+
+def rewards_redeemed(user_id: str) -> int:
+    """Number of rewards a user redeemed"""
+    from routes.rewards import Redemption
+
+    return db.session.query(db.func.count(Redemption.id)).filter(Redemption.user_id == user_id).scalar()
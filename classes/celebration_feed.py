@@ -0,0 +1,152 @@
+"""
+Celebration Feed
+================
+
+This module keeps the most recent achievement celebrations in memory and
+writes them to the celebrations table in the background.
+
+Unlocks add their celebrations with celebrations.add_after_commit(): once
+the unlock commits, the celebration goes into a bounded ring buffer of the
+latest RECENT_CELEBRATIONS entries and into a queue of rows to persist.
+A single background writer waits FLUSH_DELAY seconds so bursts of unlocks
+share one multi-row INSERT, then persists the queue. /achievements/celebrations
+and /social/celebrations read the ring buffer directly; it is filled from
+the table once per process (newest rows by id) on first use.
+
+Celebrations queued in the last FLUSH_DELAY seconds are lost if the process
+dies; they are a feed, not a record points depend on.
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert
+
+from utils.db import db, run_after_commit
+from utils.utils import L
+
+RECENT_CELEBRATIONS = 100  # entries kept in the ring buffer
+FLUSH_DELAY = 0.2  # seconds the writer waits so a burst of unlocks is written in one INSERT
+
+# One writer: batches are persisted one after another, in order
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='celebration-writer')
+
+
+class CelebrationFeed:
+    """Ring buffer of recent celebrations plus the queue of rows not persisted yet"""
+
+    def __init__(self, size: int = RECENT_CELEBRATIONS):
+        self._recent = None  # deque of celebration dicts, newest last; None until loaded
+        self._size = size
+        self._pending = []  # (celebration dict, row values) waiting for the writer
+        self._flush_scheduled = False
+        self._app = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> deque:
+        recent = self._recent
+        if recent is None:
+            # Imported here to avoid circular imports (routes import this module)
+            from routes.achievements import Celebration
+
+            rows = Celebration.query.order_by(Celebration.id.desc()).limit(self._size).all()
+            with self._lock:
+                if self._recent is None:
+                    loaded = deque((_serialize(row) for row in reversed(rows)), maxlen=self._size)
+                    # Celebrations committed while the rows were read but not written yet
+                    loaded.extend(entry for entry, _ in self._pending)
+                    self._recent = loaded
+                recent = self._recent
+        return recent
+
+    def recent(self, limit: int = 20) -> list:
+        """Latest celebrations, newest first"""
+        recent = self._load()
+        with self._lock:
+            return list(reversed(recent))[:limit]
+
+    def add_after_commit(self, celebrations):
+        """
+        Add celebrations once the current transaction commits (dropped on rollback).
+
+        Args:
+            celebrations (iterable): (user_id, achievement_name, message) per celebration
+        """
+        app = current_app._get_current_object()
+        created_at = datetime.utcnow()
+        rows = [
+            {"user_id": user_id, "achievement_name": achievement_name, "message": message, "created_at": created_at}
+            for user_id, achievement_name, message in celebrations
+        ]
+        if rows:
+            run_after_commit(lambda: self._add(app, rows))
+
+    def _add(self, app, rows):
+        batch = [({**row, "id": None, "created_at": row["created_at"].isoformat()}, row) for row in rows]
+        with self._lock:
+            if self._recent is not None:
+                self._recent.extend(entry for entry, _ in batch)
+            self._pending.extend(batch)
+            self._app = app
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                _executor.submit(self._flush_later)
+
+    def forget_user(self, user_id: str):
+        """Drop a removed user's celebrations from the buffer and the write queue"""
+        with self._lock:
+            if self._recent is not None:
+                self._recent = deque((e for e in self._recent if e["user_id"] != user_id), maxlen=self._size)
+            self._pending = [(entry, row) for entry, row in self._pending if entry["user_id"] != user_id]
+
+    def _flush_later(self):
+        time.sleep(FLUSH_DELAY)
+        self.flush()
+
+    def flush(self) -> int:
+        """Persist every queued celebration with one multi-row INSERT; returns the rows written"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._flush_scheduled = False
+            app = self._app
+        if not batch:
+            return 0
+        from routes.achievements import Celebration
+
+        with app.app_context():
+            try:
+                ids = db.session.execute(
+                    insert(Celebration).returning(Celebration.id, sort_by_parameter_order=True),
+                    [row for _, row in batch]
+                ).scalars().all()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                L.log(f"Persisting {len(batch)} celebrations failed: {str(e)}")
+                return 0
+        with self._lock:
+            for (entry, _), celebration_id in zip(batch, ids):
+                entry["id"] = celebration_id
+        return len(batch)
+
+
+def _serialize(celebration) -> dict:
+    return {
+        "id": celebration.id,
+        "user_id": celebration.user_id,
+        "achievement_name": celebration.achievement_name,
+        "message": celebration.message,
+        "created_at": celebration.created_at.isoformat() if celebration.created_at else None,
+    }
+
+
+# Shared feed behind /achievements/celebrations and /social/celebrations
+celebrations = CelebrationFeed()
+
+# Write what is still queued when the process exits normally
+atexit.register(celebrations.flush)
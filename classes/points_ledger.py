@@ -0,0 +1,386 @@
+"""
+Points Ledger
+=============
+
+This module defines the append-only, double-entry points ledger.
+
+Every change to a user's points is posted as a transaction of balanced
+legs: the user's account is credited (positive amount) or debited
+(negative amount) and a system account of the same source (for example
+"@achievement" or "@spent") takes the opposite amount, so all legs of a
+transaction, and therefore the whole ledger, sum to zero. Each leg records
+its source (achievement, game, manual or spent, the UserPoints column it
+feeds), a reference to what caused it (for example "achievement:3" or
+"reward:7") and its amount. Ledger rows are never updated or deleted.
+
+Checkpoints store the balance of an account up to a ledger row, so the
+balance of an account is its last checkpoint plus the sum of the short tail
+of legs posted after it. Postings checkpoint a user account inline once its
+tail reaches CHECKPOINT_EVERY legs, which bounds ledger_balance() for users;
+checkpoint_points_ledger() checkpoints every account with a long tail,
+system accounts included (exposed as `flask checkpoint-points-ledger`),
+and backfill_points_ledger() migrates an existing database by posting the
+current source tables into an empty ledger (`flask backfill-points-ledger`).
+
+Postings are made by classes/user_points.py in the same transaction as the
+materialized balance change, so the ledger and UserPoints always agree.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from utils.db import db
+from utils.utils import chunked
+
+# Ledger source -> UserPoints column it feeds
+LEDGER_SOURCES = {
+    'achievement': 'achievement_points',
+    'game': 'game_points',
+    'manual': 'manual_points',
+    'spent': 'spent_points',
+}
+SYSTEM_ACCOUNT_PREFIX = '@'  # system accounts are named "@<source>"
+REMOVED_ACCOUNT = '@removed'  # takes over the remaining balances of purged users
+CHECKPOINT_EVERY = 50  # tail length after which an account gets a new checkpoint
+
+
+class PointsLedgerEntry(db.Model):
+    """
+    One leg of a points transaction.
+
+    Attributes:
+        id (int): Primary key, increasing in posting order
+        txn (str): Transaction the leg belongs to (legs of a transaction sum to zero)
+        account (str): User identifier, or a system account ("@<source>")
+        source (str): achievement, game, manual or spent
+        reference (str): What caused the posting, e.g. "achievement:3" or "reward:7"
+        amount (int): Credit (positive) or debit (negative) to the account's points
+        created_at (datetime): When the leg was posted
+    """
+    __tablename__ = 'points_ledger'
+    __table_args__ = (db.Index('ix_points_ledger_account_id', 'account', 'id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    txn = db.Column(db.String(32), nullable=False, index=True)
+    account = db.Column(db.String(120), nullable=False)
+    source = db.Column(db.String(20), nullable=False)
+    reference = db.Column(db.String(120), nullable=False)
+    amount = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def serialize(self):
+        """Convert the leg to a dictionary for JSON serialization"""
+        return {
+            "id": self.id,
+            "source": self.source,
+            "reference": self.reference,
+            "amount": self.amount,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+class PointsCheckpoint(db.Model):
+    """
+    Balance of an account including every leg up to last_entry_id.
+
+    Attributes:
+        id (int): Primary key
+        account (str): Ledger account
+        last_entry_id (int): Last PointsLedgerEntry.id included
+        achievement_points, game_points, manual_points, spent_points (int): Balance
+            columns at that point (same meaning as in UserPoints)
+        created_at (datetime): When the checkpoint was written
+    """
+    __tablename__ = 'points_checkpoints'
+    __table_args__ = (db.UniqueConstraint('account', 'last_entry_id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    account = db.Column(db.String(120), nullable=False)
+    last_entry_id = db.Column(db.Integer, nullable=False)
+    achievement_points = db.Column(db.Integer, nullable=False, default=0)
+    game_points = db.Column(db.Integer, nullable=False, default=0)
+    manual_points = db.Column(db.Integer, nullable=False, default=0)
+    spent_points = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+def _empty_balance() -> dict:
+    return {column: 0 for column in LEDGER_SOURCES.values()}
+
+
+def _column_points(source: str, amount: int) -> int:
+    """UserPoints column change of a leg: spent legs debit the balance, so they count as spent points"""
+    return -amount if source == 'spent' else amount
+
+
+def post_points(account: str, reference: str, achievement: int = 0, game: int = 0, manual: int = 0,
+                spent: int = 0) -> None:
+    """
+    Post balance column deltas of an account as one balanced transaction.
+
+    Args:
+        account (str): User identifier
+        reference (str): What caused the change, e.g. "achievement:3"
+        achievement, game, manual, spent (int): Deltas of the UserPoints columns
+    """
+    db.session.add_all(PointsLedgerEntry(**leg) for leg in _legs(account, reference, achievement=achievement,
+                                                                  game=game, manual=manual, spent=spent))
+    _checkpoint_long_tails([account])
+
+
+def post_points_bulk(postings) -> None:
+    """
+    Post many transactions with a single multi-row INSERT (bulk paths).
+
+    Args:
+        postings (iterable): (account, reference, {source: column delta}) per transaction
+    """
+    legs = [leg for account, reference, deltas in postings for leg in _legs(account, reference, **deltas)]
+    if legs:
+        db.session.execute(insert(PointsLedgerEntry), legs)
+        _checkpoint_long_tails({leg["account"] for leg in legs})
+
+
+def _legs(account: str, reference: str, achievement: int = 0, game: int = 0, manual: int = 0, spent: int = 0) -> list:
+    """Balanced legs of one transaction: the account's leg and the system account's opposite leg per source"""
+    txn = uuid.uuid4().hex
+    legs = []
+    for source, delta in (('achievement', achievement), ('game', game), ('manual', manual), ('spent', spent)):
+        if not delta:
+            continue
+        amount = _column_points(source, delta)
+        legs.append({"txn": txn, "account": account, "source": source, "reference": reference, "amount": amount})
+        legs.append({"txn": txn, "account": SYSTEM_ACCOUNT_PREFIX + source, "source": source,
+                     "reference": reference, "amount": -amount})
+    return legs
+
+
+def _latest_checkpoints(accounts=None):
+    """Subquery of (account, last_entry_id) of the newest checkpoint per account"""
+    query = db.session.query(
+        PointsCheckpoint.account, db.func.max(PointsCheckpoint.last_entry_id).label('last_entry_id')
+    ).group_by(PointsCheckpoint.account)
+    if accounts is not None:
+        query = query.filter(PointsCheckpoint.account.in_(accounts))
+    return query.subquery()
+
+
+def _checkpoint_long_tails(accounts) -> None:
+    """
+    Checkpoint the user accounts among ``accounts`` whose tail reached CHECKPOINT_EVERY legs.
+
+    Called on every posting, in the posting's transaction, so a user's
+    ledger balance is never more than a checkpoint plus CHECKPOINT_EVERY
+    legs. Costs one grouped count per chunk of accounts; system accounts are
+    left to checkpoint_points_ledger().
+    """
+    users = [account for account in accounts if not account.startswith(SYSTEM_ACCOUNT_PREFIX)]
+    long_tails = []
+    for chunk in chunked(users):
+        latest = _latest_checkpoints(chunk)
+        long_tails += [
+            account for (account,) in db.session.query(PointsLedgerEntry.account)
+            .outerjoin(latest, latest.c.account == PointsLedgerEntry.account)
+            .filter(PointsLedgerEntry.account.in_(chunk),
+                    PointsLedgerEntry.id > db.func.coalesce(latest.c.last_entry_id, 0))
+            .group_by(PointsLedgerEntry.account)
+            .having(db.func.count(PointsLedgerEntry.id) >= CHECKPOINT_EVERY)
+        ]
+    if long_tails:
+        db.session.add_all(PointsCheckpoint(account=account, last_entry_id=entry["last_entry_id"], **entry["balance"])
+                           for account, entry in _ledger_state(long_tails).items())
+
+
+def _ledger_state(accounts=None) -> dict:
+    """
+    Balance of accounts from their last checkpoint plus the tail after it.
+
+    Returns:
+        dict: account -> {"balance": {column: points}, "last_entry_id": int, "tail": int}
+    """
+    accounts = list(accounts) if accounts is not None else None
+    latest = _latest_checkpoints(accounts)
+    state = {}
+
+    checkpoints = (
+        db.session.query(PointsCheckpoint)
+        .join(latest, db.and_(PointsCheckpoint.account == latest.c.account,
+                              PointsCheckpoint.last_entry_id == latest.c.last_entry_id))
+        .all()
+    )
+    for checkpoint in checkpoints:
+        state[checkpoint.account] = {
+            "balance": {column: getattr(checkpoint, column) for column in LEDGER_SOURCES.values()},
+            "last_entry_id": checkpoint.last_entry_id,
+            "tail": 0,
+        }
+
+    tail = (
+        db.session.query(PointsLedgerEntry.account, PointsLedgerEntry.source,
+                         db.func.sum(PointsLedgerEntry.amount), db.func.max(PointsLedgerEntry.id),
+                         db.func.count(PointsLedgerEntry.id))
+        .outerjoin(latest, latest.c.account == PointsLedgerEntry.account)
+        .filter(PointsLedgerEntry.id > db.func.coalesce(latest.c.last_entry_id, 0))
+        .group_by(PointsLedgerEntry.account, PointsLedgerEntry.source)
+    )
+    if accounts is not None:
+        tail = tail.filter(PointsLedgerEntry.account.in_(accounts))
+    for account, source, amount, last_entry_id, count in tail.all():
+        entry = state.setdefault(account, {"balance": _empty_balance(), "last_entry_id": 0, "tail": 0})
+        entry["balance"][LEDGER_SOURCES[source]] += _column_points(source, int(amount))
+        entry["last_entry_id"] = max(entry["last_entry_id"], last_entry_id)
+        entry["tail"] += count
+    return state
+
+
+def ledger_balance(accounts=None) -> dict:
+    """
+    Balances from the ledger: last checkpoint plus the sum of the legs after it.
+
+    Args:
+        accounts (iterable): Accounts to compute, or None for every account
+
+    Returns:
+        dict: account -> {column name: points}, zero for accounts without legs
+    """
+    balances = {account: _empty_balance() for account in (accounts or [])}
+    for account, entry in _ledger_state(accounts).items():
+        balances[account] = entry["balance"]
+    return balances
+
+
+def ledger_balance_before(moment: datetime) -> dict:
+    """
+    Balances of the user accounts as they stood at ``moment``: the sum of the legs posted before it.
+
+    Checkpoints are not used (they summarize the newest legs, not a point in
+    time); this is a grouped scan of the legs older than ``moment``.
+
+    Returns:
+        dict: account -> {column name: points} for every user account with legs before ``moment``
+    """
+    balances = {}
+    rows = (
+        db.session.query(PointsLedgerEntry.account, PointsLedgerEntry.source, db.func.sum(PointsLedgerEntry.amount))
+        .filter(PointsLedgerEntry.created_at < moment,
+                ~PointsLedgerEntry.account.startswith(SYSTEM_ACCOUNT_PREFIX, autoescape=True))
+        .group_by(PointsLedgerEntry.account, PointsLedgerEntry.source)
+        .all()
+    )
+    for account, source, amount in rows:
+        balance = balances.setdefault(account, _empty_balance())
+        balance[LEDGER_SOURCES[source]] += _column_points(source, int(amount))
+    return balances
+
+
+def close_account(account: str, reference: str) -> dict:
+    """
+    Post one balanced transaction moving an account's remaining balance to REMOVED_ACCOUNT.
+
+    Used when a user is purged: their legs stay as they were posted, and
+    after the closing transaction the account's balance is zero (its
+    checkpoints stay valid, the closing legs are part of its tail).
+
+    Returns:
+        dict: The balance that was moved ({column name: points})
+    """
+    balance = ledger_balance([account])[account]
+    txn = uuid.uuid4().hex
+    legs = []
+    for source, column in LEDGER_SOURCES.items():
+        amount = _column_points(source, -balance[column])
+        if not amount:
+            continue
+        legs.append({"txn": txn, "account": account, "source": source, "reference": reference, "amount": amount})
+        legs.append({"txn": txn, "account": REMOVED_ACCOUNT, "source": source, "reference": reference, "amount": -amount})
+    if legs:
+        db.session.execute(insert(PointsLedgerEntry), legs)
+    return balance
+
+
+def checkpoint_points_ledger(min_tail: int = CHECKPOINT_EVERY) -> int:
+    """
+    Checkpoint every account with at least min_tail legs after its last checkpoint.
+
+    Returns:
+        int: number of checkpoints written
+    """
+    written = 0
+    for account, entry in _ledger_state().items():
+        if entry["tail"] >= max(1, min_tail):
+            db.session.add(PointsCheckpoint(account=account, last_entry_id=entry["last_entry_id"], **entry["balance"]))
+            written += 1
+    db.session.commit()
+    return written
+
+
+def backfill_points_ledger() -> int:
+    """
+    Migrate an existing database: post the current source tables into an empty ledger.
+
+    Achievements are posted at their unlock time, progress per participation,
+    the first 'global' manual entry of each user and every redemption, each
+    as its own transaction; every account is then checkpointed. Does nothing
+    if the ledger already has rows.
+
+    Returns:
+        int: number of ledger legs written
+    """
+    if PointsLedgerEntry.query.first() is not None:
+        return 0
+
+    # Imported here to avoid circular imports (routes import this module)
+    from routes.achievements import Achievement, UserAchievement
+    from routes.games import Participation
+    from routes.leaderboards import ManualLeaderboardEntry
+    from routes.rewards import Redemption
+    from utils.utils import get_achievement_points
+
+    legs = []
+
+    def post(account, source, reference, delta, moment):
+        if not delta:
+            return
+        txn = uuid.uuid4().hex
+        amount = _column_points(source, delta)
+        moment = moment or datetime.utcnow()
+        legs.append(PointsLedgerEntry(txn=txn, account=account, source=source, reference=reference,
+                                      amount=amount, created_at=moment))
+        legs.append(PointsLedgerEntry(txn=txn, account=SYSTEM_ACCOUNT_PREFIX + source, source=source,
+                                      reference=reference, amount=-amount, created_at=moment))
+
+    unlocked = (
+        db.session.query(UserAchievement.user_id, Achievement.id, Achievement.rarity, db.func.min(UserAchievement.unlocked_at))
+        .join(Achievement, Achievement.id == UserAchievement.achievement_id)
+        .group_by(UserAchievement.user_id, Achievement.id, Achievement.rarity)
+        .all()
+    )
+    for user_id, achievement_id, rarity, unlocked_at in unlocked:
+        post(user_id, 'achievement', f"achievement:{achievement_id}", get_achievement_points(rarity), unlocked_at)
+    participations = db.session.query(
+        Participation.user_id, Participation.competition_id, Participation.progress, Participation.updated_at
+    ).all()
+    for user_id, competition_id, progress, updated_at in participations:
+        post(user_id, 'game', f"competition:{competition_id}", int(progress or 0), updated_at)
+    manual_rows = (
+        db.session.query(ManualLeaderboardEntry.user, ManualLeaderboardEntry.points, ManualLeaderboardEntry.created_at)
+        .filter(ManualLeaderboardEntry.board == 'global')
+        .order_by(ManualLeaderboardEntry.id.asc())
+        .all()
+    )
+    seen_manual = set()
+    for user_id, points, created_at in manual_rows:
+        # Only the first 'global' entry counts, like the balance computation
+        if user_id not in seen_manual:
+            seen_manual.add(user_id)
+            post(user_id, 'manual', 'manual:global', int(points), created_at)
+    redemptions = db.session.query(Redemption.user_id, Redemption.reward_id, Redemption.points, Redemption.created_at).all()
+    for user_id, reward_id, points, created_at in redemptions:
+        post(user_id, 'spent', f"reward:{reward_id}", int(points), created_at)
+
+    db.session.add_all(legs)
+    db.session.flush()
+    checkpoint_points_ledger(min_tail=1)
+    return len(legs)
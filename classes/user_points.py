@@ -0,0 +1,622 @@
+"""
+User Points Balance Model
+=========================
+
+This module defines the materialized per-user points balance.
+
+Instead of re-scanning achievements, participations, manual entries and
+redemptions every time a balance is needed, each user has one row holding
+the running totals of every point source:
+- Achievement points (rarity based, each achievement counted once)
+- Game points (sum of Participation.progress)
+- Manual points (the user's 'global' ManualLeaderboardEntry, used by donations)
+- Spent points (sum of Redemption.points)
+
+Write paths adjust the row in the same transaction as the source change, so
+reading a balance is a single primary-key lookup. A row that does not exist
+yet is built from the source tables on first use, and rebuild_user_points()
+regenerates the whole table (exposed as `flask rebuild-user-points`).
+
+The same write paths also bucket earned points by calendar month into the
+MonthlyPoints rollup, which backs the monthly leaderboard
+(rebuilt with `flask rebuild-monthly-points`). Every balance change is
+pushed to /api/stream clients as a "points" event once it commits.
+
+Spending (redemptions, donations) goes through spend_user_points(), a single
+conditional UPDATE that only succeeds while the balance covers the cost, so
+parallel requests cannot overspend between the balance check and the write.
+
+Every balance change is also posted to the append-only points ledger
+(classes/points_ledger.py) in the same transaction, with the reference
+passed by the write path.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import case, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from classes.points_ledger import LEDGER_SOURCES, SYSTEM_ACCOUNT_PREFIX, PointsLedgerEntry, backfill_points_ledger, ledger_balance, post_points, post_points_bulk
+from utils.broadcaster import broadcaster
+from utils.db import db
+from utils.rank_index import board_ranks
+from utils.utils import chunked, get_achievement_points
+
+
+class UserPoints(db.Model):
+    """
+    Materialized points balance of a single user.
+
+    Attributes:
+        user_id (str): Primary key, user identifier (username or 'anonymous')
+        achievement_points (int): Points earned from unlocked achievements
+        game_points (int): Progress points earned in competitions
+        manual_points (int): Manual 'global' leaderboard points (donations)
+        spent_points (int): Points spent on reward redemptions
+        updated_at (datetime): Last time the balance changed
+    """
+    __tablename__ = 'user_points'
+
+    user_id = db.Column(db.String(120), primary_key=True)
+    achievement_points = db.Column(db.Integer, nullable=False, default=0)
+    game_points = db.Column(db.Integer, nullable=False, default=0)
+    manual_points = db.Column(db.Integer, nullable=False, default=0)
+    spent_points = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def total_points(self) -> int:
+        """Earned minus spent points (may be negative)"""
+        return self.achievement_points + self.game_points + self.manual_points - self.spent_points
+
+    @property
+    def available_points(self) -> int:
+        """Points the user can spend (capped at minimum 0)"""
+        return max(0, self.total_points)
+
+    def serialize(self):
+        """Convert balance to dictionary for JSON serialization"""
+        return {
+            "achievement_points": self.achievement_points,
+            "game_points": self.game_points,
+            "manual_points": self.manual_points,
+            "spent_points": self.spent_points,
+            "available_points": self.available_points,
+        }
+
+    def __repr__(self):
+        """String representation of UserPoints object for debugging"""
+        return f'UserPoints-{self.user_id} ({self.total_points})'
+
+
+class MonthlyPoints(db.Model):
+    """
+    Points a user earned during one calendar month (rollup of point-earning events).
+
+    Attributes:
+        user_id (str): User identifier, part of the primary key
+        month (str): Calendar month 'YYYY-MM', part of the primary key
+        achievement_points (int): Points from achievements unlocked that month
+        game_points (int): Progress points earned that month
+        manual_points (int): Manual 'monthly' leaderboard points set that month
+    """
+    __tablename__ = 'monthly_points'
+
+    user_id = db.Column(db.String(120), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True, index=True)
+    achievement_points = db.Column(db.Integer, nullable=False, default=0)
+    game_points = db.Column(db.Integer, nullable=False, default=0)
+    manual_points = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def total_points(self) -> int:
+        """Points earned in the month"""
+        return self.achievement_points + self.game_points + self.manual_points
+
+    def __repr__(self):
+        """String representation of MonthlyPoints object for debugging"""
+        return f'MonthlyPoints-{self.user_id}@{self.month} ({self.total_points})'
+
+
+# Boards ranked on the all-time balance; the monthly board ranks the current month's rollup
+BALANCE_BOARDS = ('global', 'team')
+
+
+def current_month() -> str:
+    """Current calendar month as 'YYYY-MM' (UTC, like every created_at column)"""
+    return datetime.utcnow().strftime('%Y-%m')
+
+
+def month_of(moment) -> str:
+    """Calendar month 'YYYY-MM' of a datetime (current month if None)"""
+    return moment.strftime('%Y-%m') if moment else current_month()
+
+
+# =============================================================================
+# BALANCE MAINTENANCE
+# =============================================================================
+
+def _compute_user_points(user_ids=None) -> dict:
+    """
+    Compute balances from the source tables with one grouped query per source.
+
+    Args:
+        user_ids (iterable): Users to compute, or None for every known user
+
+    Returns:
+        dict: user_id -> {column name: points}
+    """
+    # Imported here to avoid circular imports (routes import this module)
+    from routes.achievements import Achievement, UserAchievement
+    from routes.games import Participation
+    from routes.leaderboards import ManualLeaderboardEntry
+    from routes.rewards import Redemption
+
+    achievement_query = (
+        db.session.query(UserAchievement.user_id, Achievement.id, Achievement.rarity)
+        .join(Achievement, Achievement.id == UserAchievement.achievement_id)
+        .distinct()
+    )
+    game_query = (
+        db.session.query(Participation.user_id, db.func.coalesce(db.func.sum(Participation.progress), 0))
+        .group_by(Participation.user_id)
+    )
+    manual_query = (
+        db.session.query(ManualLeaderboardEntry.user, ManualLeaderboardEntry.points)
+        .filter(ManualLeaderboardEntry.board == 'global')
+        .order_by(ManualLeaderboardEntry.id.asc())
+    )
+    spent_query = (
+        db.session.query(Redemption.user_id, db.func.coalesce(db.func.sum(Redemption.points), 0))
+        .group_by(Redemption.user_id)
+    )
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        achievement_query = achievement_query.filter(UserAchievement.user_id.in_(user_ids))
+        game_query = game_query.filter(Participation.user_id.in_(user_ids))
+        manual_query = manual_query.filter(ManualLeaderboardEntry.user.in_(user_ids))
+        spent_query = spent_query.filter(Redemption.user_id.in_(user_ids))
+
+    empty = {"achievement_points": 0, "game_points": 0, "manual_points": 0, "spent_points": 0}
+    balances = {user_id: dict(empty) for user_id in (user_ids or [])}
+
+    for user_id, _, rarity in achievement_query.all():
+        balances.setdefault(user_id, dict(empty))["achievement_points"] += get_achievement_points(rarity)
+    for user_id, points in game_query.all():
+        balances.setdefault(user_id, dict(empty))["game_points"] = int(points)
+    seen_manual = set()
+    for user_id, points in manual_query.all():
+        # Only the first 'global' entry counts, like the donation and leaderboard code
+        if user_id not in seen_manual:
+            seen_manual.add(user_id)
+            balances.setdefault(user_id, dict(empty))["manual_points"] = int(points)
+    for user_id, points in spent_query.all():
+        balances.setdefault(user_id, dict(empty))["spent_points"] = int(points)
+    return balances
+
+
+def get_user_points(user_id: str) -> UserPoints:
+    """
+    Return the balance row of a user (primary-key lookup).
+
+    A missing row is built from the source tables and inserted in a
+    savepoint (see _ensure_user_points_row), so callers that change points
+    must call adjust_user_points() before staging their own source change.
+
+    Args:
+        user_id (str): User identifier (username or 'anonymous')
+
+    Returns:
+        UserPoints: The user's balance row
+    """
+    _ensure_user_points_row(user_id)
+    return db.session.get(UserPoints, user_id)
+
+
+def _get_monthly_points(user_id: str, month: str) -> MonthlyPoints:
+    """Monthly rollup row of a user, inserted empty on first use (in a savepoint, like _ensure_user_points_row)"""
+    row = db.session.get(MonthlyPoints, (user_id, month))
+    if row is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(MonthlyPoints(user_id=user_id, month=month, achievement_points=0, game_points=0, manual_points=0))
+        except IntegrityError:
+            pass  # inserted meanwhile by a parallel request
+        row = db.session.get(MonthlyPoints, (user_id, month))
+    return row
+
+
+def adjust_user_points(user_id: str, achievement: int = 0, game: int = 0, manual: int = 0, spent: int = 0,
+                       month: str = None, reference: str = 'adjustment') -> UserPoints:
+    """
+    Apply point deltas to a user's balance in the current transaction.
+
+    Must be called before the matching source row (UserAchievement,
+    Participation, ManualLeaderboardEntry, Redemption) is added or changed,
+    so that a row built on first use does not count the change twice.
+    Deltas are added in SQL (one UPDATE), so concurrent writers to the same
+    balance do not overwrite each other. Achievement and game deltas are
+    also added to the user's monthly rollup.
+
+    Args:
+        user_id (str): User identifier
+        achievement (int): Achievement points delta
+        game (int): Game progress delta
+        manual (int): Manual 'global' points delta
+        spent (int): Spent points delta
+        month (str): Month bucket of the earned delta ('YYYY-MM', default current month),
+            e.g. the unlock month when an achievement is locked again
+        reference (str): What caused the change, recorded in the points ledger
+            (e.g. "achievement:3", "competition:5")
+
+    Returns:
+        UserPoints: The user's balance row
+    """
+    _ensure_user_points_row(user_id)
+    deltas = {"achievement_points": achievement, "game_points": game, "manual_points": manual, "spent_points": spent}
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if deltas:
+        db.session.execute(
+            update(UserPoints)
+            .where(UserPoints.user_id == user_id)
+            .values({column: getattr(UserPoints, column) + delta for column, delta in deltas.items()})
+            .execution_options(synchronize_session=False)
+        )
+    row = db.session.get(UserPoints, user_id, populate_existing=bool(deltas))
+    post_points(user_id, reference, achievement=achievement, game=game, manual=manual, spent=spent)
+    # Earned and spent points move the user on the all-time boards, manual points only on 'global'
+    if achievement or game or spent:
+        board_ranks.record(user_id, achievement + game - spent, boards=BALANCE_BOARDS)
+    if manual:
+        board_ranks.record(user_id, manual, boards=('global',))
+    if achievement or game or manual or spent:
+        _publish_total(row)
+
+    if achievement or game:
+        month = month or current_month()
+        for column, delta in (("achievement_points", achievement), ("game_points", game)):
+            if delta:
+                _credit_monthly_points([user_id], {user_id: delta}, column, month)
+        if month == current_month():
+            board_ranks.record(user_id, achievement + game, boards=('monthly',))
+    return row
+
+
+def set_monthly_manual_points(user_id: str, points: int) -> MonthlyPoints:
+    """
+    Set the manual 'monthly' leaderboard points of a user for the current month.
+
+    Args:
+        user_id (str): User identifier
+        points (int): Manual points for the current month
+
+    Returns:
+        MonthlyPoints: The user's rollup row of the current month
+    """
+    bucket = _get_monthly_points(user_id, current_month())
+    board_ranks.record(user_id, points - bucket.manual_points, boards=('monthly',))
+    bucket.manual_points = points
+    return bucket
+
+
+def _ensure_user_points_row(user_id: str) -> None:
+    """Insert the balance row of a user if it does not exist yet (built from the source tables)"""
+    if db.session.get(UserPoints, user_id) is not None:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(UserPoints(user_id=user_id, **_compute_user_points([user_id])[user_id]))
+    except IntegrityError:
+        pass  # inserted meanwhile by a parallel request
+
+
+def _update_user_points(user_id: str, reference: str, cost: int = 0, spent: int = 0, manual: int = 0):
+    """
+    Add deltas to a balance with one UPDATE, only if its total covers cost.
+
+    Returns:
+        UserPoints: The refreshed balance row, or None if the balance was too low
+    """
+    _ensure_user_points_row(user_id)
+    statement = (
+        update(UserPoints)
+        .where(UserPoints.user_id == user_id)
+        .values(spent_points=UserPoints.spent_points + spent, manual_points=UserPoints.manual_points + manual)
+        .execution_options(synchronize_session=False)
+    )
+    if cost > 0:
+        total = UserPoints.achievement_points + UserPoints.game_points + UserPoints.manual_points - UserPoints.spent_points
+        statement = statement.where(total >= cost)
+    if db.session.execute(statement).rowcount != 1:
+        return None
+
+    row = db.session.get(UserPoints, user_id, populate_existing=True)
+    post_points(user_id, reference, manual=manual, spent=spent)
+    if spent:
+        board_ranks.record(user_id, -spent, boards=BALANCE_BOARDS)
+    if manual:
+        board_ranks.record(user_id, manual, boards=('global',))
+    _publish_total(row)
+    return row
+
+
+def spend_user_points(user_id: str, spent: int = 0, donated: int = 0, reference: str = 'adjustment'):
+    """
+    Atomically take points from a user's balance if the user can afford them.
+
+    The balance check and the write are one conditional UPDATE, so parallel
+    redemptions or donations of the same user cannot both pass the check.
+    Like adjust_user_points(), call it before staging the source row.
+
+    Args:
+        user_id (str): User identifier
+        spent (int): Points spent on a redemption (added to spent_points)
+        donated (int): Points donated to another user (taken from manual_points)
+        reference (str): What caused the change, recorded in the points ledger
+
+    Returns:
+        UserPoints: The updated balance row, or None (nothing changed) if the
+            available points do not cover spent + donated
+    """
+    return _update_user_points(user_id, reference, cost=spent + donated, spent=spent, manual=-donated)
+
+
+def receive_user_points(user_id: str, manual: int, reference: str = 'adjustment') -> UserPoints:
+    """Atomically add donated manual points to a user's balance (counterpart of spend_user_points)"""
+    return _update_user_points(user_id, reference, manual=manual)
+
+
+def award_user_points(awards: dict, reference: str, source: str = 'manual') -> None:
+    """
+    Credit points of one source to many users in the current transaction.
+
+    Missing balance rows are inserted in bulk, then every chunk of users is
+    credited with one UPDATE adding each user's amount in SQL, so parallel
+    writes to the same balances are not overwritten. Like adjust_user_points(),
+    call it before changing the users' source rows (manual leaderboard
+    entries, user achievements, participations).
+
+    Args:
+        awards (dict): user_id -> points to add
+        reference (str): What caused the change, recorded in the points ledger
+        source (str): 'manual' ('global' manual points), 'achievement' or 'game'
+            (both also added to the current month's rollup)
+    """
+    column = LEDGER_SOURCES[source]
+    awards = {user_id: amount for user_id, amount in awards.items() if amount}
+    for chunk in chunked(awards):
+        _credit_user_points(chunk, awards, source, reference)
+        if source in ('achievement', 'game'):
+            _credit_monthly_points(chunk, awards, column)
+    if source == 'manual':
+        board_ranks.invalidate_after_commit(['global'])
+    else:
+        board_ranks.invalidate_after_commit([*BALANCE_BOARDS, 'monthly'])
+
+
+def _credit_user_points(user_ids: list, awards: dict, source: str, reference: str) -> None:
+    """Add each user's amount to one balance column: missing rows inserted in bulk, then one UPDATE and one ledger INSERT"""
+    column = LEDGER_SOURCES[source]
+    existing = {user_id for (user_id,) in db.session.query(UserPoints.user_id).filter(UserPoints.user_id.in_(user_ids))}
+    missing = [user_id for user_id in user_ids if user_id not in existing]
+    if missing:
+        try:
+            with db.session.begin_nested():
+                db.session.add_all(UserPoints(user_id=user_id, **values)
+                                   for user_id, values in _compute_user_points(missing).items())
+        except IntegrityError:
+            for user_id in missing:  # some were inserted meanwhile by a parallel request
+                _ensure_user_points_row(user_id)
+
+    db.session.execute(
+        update(UserPoints)
+        .where(UserPoints.user_id.in_(user_ids))
+        .values({column: getattr(UserPoints, column) + case(
+            {user_id: awards[user_id] for user_id in user_ids}, value=UserPoints.user_id, else_=0
+        )})
+        .execution_options(synchronize_session=False)
+    )
+    post_points_bulk((user_id, reference, {source: awards[user_id]}) for user_id in user_ids)
+    for row in UserPoints.query.filter(UserPoints.user_id.in_(user_ids)).populate_existing().all():
+        _publish_total(row)
+
+
+def reprice_achievements(deltas: dict, reference: str) -> int:
+    """
+    Apply new point values of achievements to the balances of their holders.
+
+    Only achievement points move: each holder's balance by the sum of the
+    deltas of the achievements they hold, and the monthly rollup bucket of
+    the month each achievement was (first) unlocked by the same delta, so
+    game and manual points and every other month stay as they are. Call it
+    while the achievement catalog still holds the old values (before the
+    new ones commit): balance rows built on first use are computed with them.
+
+    Args:
+        deltas (dict): achievement id -> new points - old points
+        reference (str): What caused the change, recorded in the points ledger
+
+    Returns:
+        int: number of holders whose balance changed
+    """
+    # Imported here to avoid circular imports (routes import this module)
+    from routes.achievements import UserAchievement
+
+    deltas = {achievement_id: delta for achievement_id, delta in deltas.items() if delta}
+    holders, months = {}, {}  # user -> delta; month -> {user -> delta}
+    for chunk in chunked(list(deltas)):
+        unlocked = (
+            db.session.query(UserAchievement.user_id, UserAchievement.achievement_id, db.func.min(UserAchievement.unlocked_at))
+            .filter(UserAchievement.achievement_id.in_(chunk))
+            .group_by(UserAchievement.user_id, UserAchievement.achievement_id)
+            .all()
+        )
+        for user_id, achievement_id, unlocked_at in unlocked:
+            holders[user_id] = holders.get(user_id, 0) + deltas[achievement_id]
+            bucket = months.setdefault(month_of(unlocked_at), {})
+            bucket[user_id] = bucket.get(user_id, 0) + deltas[achievement_id]
+
+    holders = {user_id: delta for user_id, delta in holders.items() if delta}
+    for chunk in chunked(list(holders)):
+        _credit_user_points(chunk, holders, 'achievement', reference)
+    for month, awards in months.items():
+        for chunk in chunked([user_id for user_id, delta in awards.items() if delta]):
+            _credit_monthly_points(chunk, awards, 'achievement_points', month)
+    board_ranks.invalidate_after_commit([*BALANCE_BOARDS, 'monthly'])
+    return len(holders)
+
+
+def _credit_monthly_points(user_ids: list, awards: dict, column: str, month: str = None) -> None:
+    """Add awarded points to a month's rollup (default current month) of each user: one UPDATE, then one INSERT of the missing rows"""
+    month = month or current_month()
+    existing = {
+        user_id for (user_id,) in db.session.query(MonthlyPoints.user_id)
+        .filter(MonthlyPoints.month == month, MonthlyPoints.user_id.in_(user_ids))
+    }
+    if existing:
+        db.session.execute(
+            update(MonthlyPoints)
+            .where(MonthlyPoints.month == month, MonthlyPoints.user_id.in_(existing))
+            .values({column: getattr(MonthlyPoints, column) + case(
+                {user_id: awards[user_id] for user_id in existing}, value=MonthlyPoints.user_id, else_=0
+            )})
+            .execution_options(synchronize_session=False)
+        )
+    missing = [user_id for user_id in user_ids if user_id not in existing]
+    if not missing:
+        return
+    empty = {"achievement_points": 0, "game_points": 0, "manual_points": 0}
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(MonthlyPoints), [
+                {**empty, "user_id": user_id, "month": month, column: awards[user_id]} for user_id in missing
+            ])
+    except IntegrityError:
+        for user_id in missing:  # some were inserted meanwhile by a parallel request
+            bucket = _get_monthly_points(user_id, month)
+            setattr(bucket, column, getattr(bucket, column) + awards[user_id])
+
+
+def _publish_total(row: UserPoints):
+    broadcaster.publish_after_commit({
+        "type": "points",
+        "user": row.user_id,
+        "total_points": row.available_points,
+        "total_progress": row.game_points
+    })
+
+
+def refresh_user_points(user_ids) -> None:
+    """
+    Recompute the balances of the given users from the source tables.
+
+    Used by write paths that bulk-delete source rows (user, achievement or
+    competition removal) where per-row deltas are not known.
+
+    Args:
+        user_ids (iterable): Users whose balance should be recomputed
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    ledger = ledger_balance(user_ids)
+    for user_id, values in _compute_user_points(user_ids).items():
+        _post_difference(user_id, ledger.get(user_id), values, 'recompute')
+        _ensure_user_points_row(user_id)
+        row = db.session.get(UserPoints, user_id)
+        for column, points in values.items():
+            setattr(row, column, points)
+        _publish_total(row)
+    board_ranks.invalidate_after_commit()
+
+
+def _post_difference(user_id: str, ledger: dict, values: dict, reference: str) -> None:
+    """Post the difference between a recomputed balance and the user's ledger balance"""
+    ledger, values = ledger or {}, values or {}
+    deltas = {source: values.get(column, 0) - ledger.get(column, 0) for source, column in LEDGER_SOURCES.items()}
+    post_points(user_id, reference, **deltas)
+
+
+def rebuild_user_points() -> int:
+    """
+    Regenerate the whole user_points table from the source tables.
+
+    Differences to the points ledger are posted as "rebuild" transactions,
+    so the ledger keeps agreeing with the rebuilt balances.
+
+    Returns:
+        int: Number of balance rows written
+    """
+    balances = _compute_user_points()
+    ledger = {
+        account: values for account, values in ledger_balance().items()
+        if not account.startswith(SYSTEM_ACCOUNT_PREFIX)
+    }
+    for user_id in set(balances) | set(ledger):
+        _post_difference(user_id, ledger.get(user_id), balances.get(user_id), 'rebuild')
+    UserPoints.query.delete()
+    db.session.add_all(UserPoints(user_id=user_id, **values) for user_id, values in balances.items())
+    board_ranks.invalidate_after_commit()
+    db.session.commit()
+    return len(balances)
+
+
+def rebuild_monthly_points() -> int:
+    """
+    Regenerate the monthly_points rollup from the source tables.
+
+    Achievements are bucketed by unlock month and manual 'monthly' entries by
+    creation month. Participation keeps no history, so its progress is
+    bucketed by the month it was last updated.
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    # Imported here to avoid circular imports (routes import this module)
+    from routes.achievements import Achievement, UserAchievement
+    from routes.games import Participation
+    from routes.leaderboards import ManualLeaderboardEntry
+
+    buckets = {}
+
+    def bucket(user_id, moment):
+        key = (user_id, month_of(moment))
+        if key not in buckets:
+            buckets[key] = MonthlyPoints(user_id=key[0], month=key[1], achievement_points=0, game_points=0, manual_points=0)
+        return buckets[key]
+
+    unlocked = (
+        db.session.query(UserAchievement.user_id, Achievement.id, Achievement.rarity, db.func.min(UserAchievement.unlocked_at))
+        .join(Achievement, Achievement.id == UserAchievement.achievement_id)
+        .group_by(UserAchievement.user_id, Achievement.id, Achievement.rarity)
+        .all()
+    )
+    for user_id, _, rarity, unlocked_at in unlocked:
+        bucket(user_id, unlocked_at).achievement_points += get_achievement_points(rarity)
+    for user_id, progress, updated_at in db.session.query(Participation.user_id, Participation.progress, Participation.updated_at).all():
+        bucket(user_id, updated_at).game_points += int(progress or 0)
+    manual_rows = (
+        db.session.query(ManualLeaderboardEntry.user, ManualLeaderboardEntry.points, ManualLeaderboardEntry.created_at)
+        .filter(ManualLeaderboardEntry.board == 'monthly')
+        .order_by(ManualLeaderboardEntry.id.asc())
+        .all()
+    )
+    for user_id, points, created_at in manual_rows:
+        bucket(user_id, created_at).manual_points = int(points)
+
+    MonthlyPoints.query.delete()
+    db.session.add_all(buckets.values())
+    board_ranks.invalidate_after_commit(['monthly'])
+    db.session.commit()
+    return len(buckets)
+
+
+def ensure_user_points() -> None:
+    """Backfill the points ledger, user_points and monthly_points tables once if they are still empty (e.g. an older database)"""
+    if PointsLedgerEntry.query.first() is None:
+        backfill_points_ledger()
+        db.session.commit()
+    if UserPoints.query.first() is None:
+        rebuild_user_points()
+    if MonthlyPoints.query.first() is None:
+        rebuild_monthly_points()
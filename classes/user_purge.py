@@ -0,0 +1,177 @@
+"""
+User Purge Jobs
+===============
+
+This module removes every row that belongs to a user, across all tables,
+outside of the request that asked for it.
+
+/leaderboards/remove queues a UserPurgeJob and answers 202 right away; a
+single background worker then deletes the user's rows table by table in
+chunks of PURGE_CHUNK_SIZE, committing after each chunk so no transaction
+holds the database for long. The job row records progress and is polled
+through /leaderboards/remove/status/<job_id>.
+
+Login accounts (the user table) are kept: the purge removes the user's
+gamification data, not their ability to sign in. The points ledger is
+append-only, so the user's legs are kept: a closing transaction moves
+their remaining balance to a shared removed-users account, which leaves
+the account at zero and the double-entry ledger balanced.
+"""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+
+from utils.broadcaster import broadcaster
+from utils.db import db, run_after_commit
+from utils.rank_index import board_ranks
+from utils.utils import L
+
+PURGE_CHUNK_SIZE = 500  # rows deleted per transaction
+
+# One worker: purges run one after another instead of competing for the database
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='user-purge')
+
+
+class UserPurgeJob(db.Model):
+    """
+    Background removal of all data of one user.
+
+    Attributes:
+        id (str): Primary key, random job identifier
+        user_id (str): User whose rows are removed
+        status (str): queued, running, done or failed
+        deleted_rows (int): Rows deleted so far
+        error (str): Failure message when status is failed
+        created_at (datetime): When the job was queued
+        finished_at (datetime): When the job finished or failed
+    """
+    __tablename__ = 'user_purge_jobs'
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.String(120), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    deleted_rows = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def serialize(self):
+        """Convert the job to a dictionary for JSON serialization"""
+        return {
+            "job_id": self.id,
+            "user": self.user_id,
+            "status": self.status,
+            "deleted_rows": self.deleted_rows,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+def _user_rows():
+    """(model, user column) of every table holding per-user rows with an integer id"""
+    # Imported here to avoid circular imports (routes import this module)
+    from routes.achievements import UserAchievement, Celebration
+    from routes.games import Participation, UserCompetition
+    from routes.leaderboards import ManualLeaderboard, ManualLeaderboardEntry, HallOfFameEntry, Prediction, PredictionTarget
+    from routes.rewards import Redemption
+    from routes.social import UserTeam, SocialActivity, Challenge
+
+    return [
+        (ManualLeaderboardEntry, ManualLeaderboardEntry.user),
+        (ManualLeaderboard, ManualLeaderboard.user),
+        (UserAchievement, UserAchievement.user_id),
+        (Celebration, Celebration.user_id),
+        (Participation, Participation.user_id),
+        (UserCompetition, UserCompetition.user_id),
+        (Redemption, Redemption.user_id),
+        (UserTeam, UserTeam.user_id),
+        (SocialActivity, SocialActivity.user_id),
+        (Challenge, Challenge.challenger),
+        (Challenge, Challenge.challenged),
+        (PredictionTarget, PredictionTarget.predictor),
+        (Prediction, Prediction.user_id),
+        (HallOfFameEntry, HallOfFameEntry.user),
+    ]
+
+
+def start_user_purge(user_id: str) -> UserPurgeJob:
+    """
+    Queue the removal of all rows of a user.
+
+    A job already queued or running for the same user is returned instead
+    of starting a second one.
+
+    Args:
+        user_id (str): User to remove
+
+    Returns:
+        UserPurgeJob: The queued (or already active) job
+    """
+    job = (
+        UserPurgeJob.query
+        .filter(UserPurgeJob.user_id == user_id, UserPurgeJob.status.in_(('queued', 'running')))
+        .first()
+    )
+    if job:
+        return job
+    job = UserPurgeJob(user_id=user_id)
+    db.session.add(job)
+    db.session.commit()
+    _executor.submit(_run_purge, current_app._get_current_object(), job.id)
+    return job
+
+
+def _delete_in_chunks(job: UserPurgeJob, model, column) -> None:
+    while True:
+        ids = [row_id for (row_id,) in db.session.query(model.id).filter(column == job.user_id).limit(PURGE_CHUNK_SIZE).all()]
+        if not ids:
+            return
+        model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+        job.deleted_rows += len(ids)
+        db.session.commit()
+
+
+def _run_purge(app, job_id: str) -> None:
+    """Worker body: delete the user's rows chunk by chunk, then the derived balances"""
+    from classes.celebration_feed import celebrations
+    from classes.points_ledger import close_account
+    from classes.user_points import UserPoints, MonthlyPoints
+    from routes.achievements import reconcile_unlock_counts
+    from routes.leaderboards import PredictorAccuracy
+
+    with app.app_context():
+        job = db.session.get(UserPurgeJob, job_id)
+        job.status = 'running'
+        db.session.commit()
+        try:
+            celebrations.forget_user(job.user_id)  # so queued celebrations are not written after their rows are deleted
+            for model, column in _user_rows():
+                _delete_in_chunks(job, model, column)
+            # Balances last, so a balance rebuilt on first use meanwhile is dropped as well
+            job.deleted_rows += UserPoints.query.filter_by(user_id=job.user_id).delete()
+            job.deleted_rows += MonthlyPoints.query.filter_by(user_id=job.user_id).delete()
+            job.deleted_rows += PredictorAccuracy.query.filter_by(user_id=job.user_id).delete()
+            # Ledger legs (and checkpoints) are kept; the remaining balance is closed out
+            close_account(job.user_id, reference="user-removed")
+            # The user's unlocks are gone; recount the achievements' unlock counters
+            reconcile_unlock_counts()
+            job.status = 'done'
+            job.finished_at = datetime.utcnow()
+            board_ranks.invalidate_after_commit()
+            broadcaster.publish_after_commit({"type": "user_removed", "user": job.user_id})
+            user_id = job.user_id
+            run_after_commit(lambda: celebrations.forget_user(user_id))
+            db.session.commit()
+            L.log(f"Purged all data for user: {job.user_id} ({job.deleted_rows} rows)")
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(UserPurgeJob, job_id)
+            job.status = 'failed'
+            job.error = str(e)[:500]
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            L.log(f"User purge failed for {job.user_id}: {str(e)}")
@@ -16,19 +16,27 @@ Key Features:
 """
 
 import datetime
+import json
 import os
+import queue
 from collections import defaultdict
 from datetime import timedelta
 
+import click
+
 # Flask and web framework imports
-from flask import Flask, request, g, jsonify, redirect, url_for, render_template
+from flask import Flask, Response, request, g, jsonify, redirect, url_for, render_template
 from flask_cors import CORS
 from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity
 from dotenv import load_dotenv
 
 # Database and utility imports
 from utils.db import db
-from utils.utils import L, get_achievement_points
+from utils.utils import L
+from utils.snapshot_cache import snapshots, cached_response
+from utils.broadcaster import broadcaster
+from utils.user_directory import user_directory
+from utils.achievement_catalog import DEFAULT_RARITY_POINTS
 
 # Route blueprints (modular API endpoints)
 from routes.login import login_bp
@@ -41,6 +49,7 @@ from routes.social import social_bp, UserTeam
 
 # Database models
 from classes.user import User
+from classes.user_points import UserPoints, rebuild_user_points, rebuild_monthly_points, ensure_user_points
 from routes.games import Competition, Participation, Game, UserCompetition
 from routes.achievements import Achievement, UserAchievement
 
@@ -108,73 +117,49 @@ app.register_blueprint(social_bp, url_prefix='/social')            # Social feat
 # MAIN ROUTES
 # =============================================================================
 
-@app.route("/")
-def homepage():
+def _players_grouped():
     """
-    Main homepage route that displays the gamification dashboard.
-    
-    This route aggregates data from multiple sources to show:
+    Aggregate data of every user that took part in any activity.
+
+    Collects:
     - All users who have participated in any activity
     - Their competition participations (from both games and competitions routes)
     - Achievement points earned
     - Manual points (from donations)
     - Spent points (from redemptions)
     - Total calculated points
-    
+
+    Point totals come from the materialized user_points table, so the whole
+    listing costs a constant number of queries.
+
     Returns:
-        Rendered homepage.html template with all user data
+        list: One dictionary per user
     """
-    
     # =============================================================================
     # COLLECT ALL USERS FROM DIFFERENT ACTIVITY SOURCES
     # =============================================================================
-    
-    # Get all users who have participated in competitions (from both routes)
-    all_users = set()
-    
-    # Get users from games route (Participation table) - tracks progress points
-    games_users = db.session.query(Participation.user_id).distinct().all()
-    for (user_id,) in games_users:
-        all_users.add(user_id)
-    
-    # Get users from competitions route (UserCompetition table) - tracks membership only
-    competitions_users = db.session.query(UserCompetition.user_id).distinct().all()
-    for (user_id,) in competitions_users:
-        all_users.add(user_id)
-    
-    # Get users who have unlocked achievements
-    achievement_users = db.session.query(UserAchievement.user_id).distinct().all()
-    for (user_id,) in achievement_users:
-        all_users.add(user_id)
-    
-    # Get users who have manual leaderboard entries (from donations)
-    from routes.leaderboards import ManualLeaderboardEntry
-    manual_users = db.session.query(ManualLeaderboardEntry.user).distinct().all()
-    for (user,) in manual_users:
-        all_users.add(user)
-    
+
+    # Users from games route (Participation), competitions route (UserCompetition),
+    # achievements and manual leaderboard entries (donations), kept in memory
+    # by the user directory
+    all_users = user_directory.active_users()
+
     # Initialize grouped data for all users
     grouped = defaultdict(lambda: {"competitions": [], "total_progress": 0, "achievement_points": 0})
-    
+
     # Add competitions from games route (Participation table)
     games_participations = (
         db.session.query(
             Participation.user_id,
             Competition.title,
-            Participation.progress,
         )
         .join(Competition, Competition.id == Participation.competition_id)
         .all()
     )
-    
-    for user_id, competition_title, progress in games_participations:
+
+    for user_id, competition_title in games_participations:
         grouped[user_id]["competitions"].append(competition_title)
-        try:
-            grouped[user_id]["total_progress"] += int(progress or 0)
-        except Exception:
-            # if progress is not numeric, ignore in total
-            pass
-    
+
     # Add competitions from competitions route (UserCompetition table)
     competitions_participations = (
         db.session.query(
@@ -184,45 +169,45 @@ def homepage():
         .join(Competition, Competition.id == UserCompetition.competition_id)
         .all()
     )
-    
+
     for user_id, competition_title in competitions_participations:
         grouped[user_id]["competitions"].append(competition_title)
 
-    # Calculate achievement points for each user
-
-    def _calculate_user_achievement_points(user_id: str) -> int:
-        """Calculate total achievement points for a user based on rarity"""
-        unlocked = UserAchievement.query.filter_by(user_id=user_id).all()
-        total_points = 0
-        for ua in unlocked:
-            achievement = Achievement.query.get(ua.achievement_id)
-            if achievement:
-                total_points += get_achievement_points(achievement.rarity)
-        return total_points
-
-    # Add achievement points, manual points, and spent points to each user
+    # Achievement, game, manual and spent points from the materialized balances
+    balances = {row.user_id: row for row in UserPoints.query.all()}
     for username in all_users:
-        grouped[username]["achievement_points"] = _calculate_user_achievement_points(username)
-        # Calculate spent points from redemptions
-        spent = db.session.query(db.func.coalesce(db.func.sum(Redemption.points), 0)).filter_by(user_id=username).scalar() or 0
-        grouped[username]["spent_points"] = int(spent)
-        # Calculate manual leaderboard points (donations)
-        from routes.leaderboards import ManualLeaderboardEntry
-        manual_entry = ManualLeaderboardEntry.query.filter_by(user=username, board='global').first()
-        grouped[username]["manual_points"] = manual_entry.points if manual_entry else 0
-
-    players_grouped = [
+        balance = balances.get(username)
+        grouped[username]["total_progress"] = balance.game_points if balance else 0
+        grouped[username]["achievement_points"] = balance.achievement_points if balance else 0
+        grouped[username]["spent_points"] = balance.spent_points if balance else 0
+        grouped[username]["total_points"] = balance.available_points if balance else 0
+
+    return [
         {
             "username": username,
             "competitions": sorted(set(data["competitions"])),
             "total_progress": data["total_progress"],
             "achievement_points": data["achievement_points"],
             "spent_points": data["spent_points"],
-            "total_points": max(0, data["total_progress"] + data["achievement_points"] + data["manual_points"] - data["spent_points"]),
+            "total_points": data["total_points"],
         }
         for username, data in grouped.items()
     ]
 
+
+@app.route("/")
+def homepage():
+    """
+    Main homepage route that displays the gamification dashboard.
+    
+    This route aggregates data from multiple sources to show every user's
+    competitions and points (see _players_grouped).
+    
+    Returns:
+        Rendered homepage.html template with all user data
+    """
+    players_grouped = snapshots.get('players_grouped', _players_grouped)
+
     # competitions
     competitions = Competition.query.all()
 
@@ -239,109 +224,142 @@ def homepage():
 
 @app.route("/api/players_grouped")
 def api_players_grouped():
-    # Get all users who have participated in competitions (from both routes)
-    from collections import defaultdict
-    
-    # Get all users from both Participation (games route) and UserCompetition (competitions route)
-    all_users = set()
-    
-    # Get users from games route (Participation table)
-    games_users = db.session.query(Participation.user_id).distinct().all()
-    for (user_id,) in games_users:
-        all_users.add(user_id)
-    
-    # Get users from competitions route (UserCompetition table)
-    competitions_users = db.session.query(UserCompetition.user_id).distinct().all()
-    for (user_id,) in competitions_users:
-        all_users.add(user_id)
-    
-    # Get users from achievements
-    achievement_users = db.session.query(UserAchievement.user_id).distinct().all()
-    for (user_id,) in achievement_users:
-        all_users.add(user_id)
-    
-    # Get users from manual leaderboard entries
-    from routes.leaderboards import ManualLeaderboardEntry
-    manual_users = db.session.query(ManualLeaderboardEntry.user).distinct().all()
-    for (user,) in manual_users:
-        all_users.add(user)
-    
-    # Initialize grouped data for all users
-    grouped = defaultdict(lambda: {"competitions": [], "total_progress": 0, "achievement_points": 0})
-    
-    # Add competitions from games route (Participation table)
-    games_participations = (
-        db.session.query(
-            Participation.user_id,
-            Competition.title,
-            Participation.progress,
-        )
-        .join(Competition, Competition.id == Participation.competition_id)
-        .all()
-    )
-    
-    for user_id, competition_title, progress in games_participations:
-        grouped[user_id]["competitions"].append(competition_title)
-        try:
-            grouped[user_id]["total_progress"] += int(progress or 0)
-        except Exception:
-            # if progress is not numeric, ignore in total
-            pass
-    
-    # Add competitions from competitions route (UserCompetition table)
-    competitions_participations = (
-        db.session.query(
-            UserCompetition.user_id,
-            Competition.title,
-        )
-        .join(Competition, Competition.id == UserCompetition.competition_id)
-        .all()
-    )
-    
-    for user_id, competition_title in competitions_participations:
-        grouped[user_id]["competitions"].append(competition_title)
+    # Served from the versioned snapshot; unchanged polls get 304 via ETag
+    return cached_response('players_grouped', lambda: jsonify(snapshots.get('players_grouped', _players_grouped)))
 
-    # Calculate achievement points for each user
 
-    def _calculate_user_achievement_points(user_id: str) -> int:
-        """Calculate total achievement points for a user based on rarity"""
-        unlocked = UserAchievement.query.filter_by(user_id=user_id).all()
-        total_points = 0
-        for ua in unlocked:
-            achievement = Achievement.query.get(ua.achievement_id)
-            if achievement:
-                total_points += get_achievement_points(achievement.rarity)
-        return total_points
+@app.route("/api/stream")
+def api_stream():
+    """
+    Server-Sent Events stream of live deltas, fed by the in-process broadcaster.
+
+    Event types (data is JSON):
+    - points: {user, total_points, total_progress} after any balance change
+    - membership: {action: joined|left, user, competition_id, competition, competitions}
+    - progress: {user, competition_id, progress}
+    - competition: {action: created|removed, competition_id, competition, ...}
+    - achievement: {action: unlocked|locked, user, achievement_id, achievement}
+    - user_removed: {user}
+    - resync: the client fell behind and should reload /api/players_grouped
+    """
+    # curl -N http://127.0.0.1:5001/api/stream
+    subscriber = broadcaster.subscribe()
 
-    # Add achievement points, manual points, and spent points to each user
-    for username in all_users:
-        grouped[username]["achievement_points"] = _calculate_user_achievement_points(username)
-        # Calculate spent points from redemptions
-        spent = db.session.query(db.func.coalesce(db.func.sum(Redemption.points), 0)).filter_by(user_id=username).scalar() or 0
-        grouped[username]["spent_points"] = int(spent)
-        # Calculate manual leaderboard points (donations)
-        from routes.leaderboards import ManualLeaderboardEntry
-        manual_entry = ManualLeaderboardEntry.query.filter_by(user=username, board='global').first()
-        grouped[username]["manual_points"] = manual_entry.points if manual_entry else 0
-
-    players_grouped = [
-        {
-            "username": username,
-            "competitions": sorted(set(data["competitions"])),
-            "total_progress": data["total_progress"],
-            "achievement_points": data["achievement_points"],
-            "spent_points": data["spent_points"],
-            "total_points": max(0, data["total_progress"] + data["achievement_points"] + data["manual_points"] - data["spent_points"]),
-        }
-        for username, data in grouped.items()
-    ]
+    def events():
+        try:
+            yield "retry: 3000\n\n"
+            while not subscriber.overflowed:
+                try:
+                    event = subscriber.events.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            yield "event: resync\ndata: {}\n\n"
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return Response(events(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# =============================================================================
+# MAINTENANCE COMMANDS
+# =============================================================================
 
-    return jsonify(players_grouped)
+@app.cli.command("rebuild-user-points")
+def rebuild_user_points_command():
+    """Regenerate the user_points balance table from the source tables."""
+    # flask --app main rebuild-user-points
+    db.create_all()
+    count = rebuild_user_points()
+    print(f"Rebuilt {count} user balances")
+
+
+@app.cli.command("rebuild-monthly-points")
+def rebuild_monthly_points_command():
+    """Regenerate the monthly_points rollup from the source tables."""
+    # flask --app main rebuild-monthly-points
+    db.create_all()
+    count = rebuild_monthly_points()
+    print(f"Rebuilt {count} monthly buckets")
+
+
+@app.cli.command("set-rarity-points")
+@click.argument("rarity", type=click.Choice(list(DEFAULT_RARITY_POINTS)))
+@click.argument("points", type=click.IntRange(min=0))
+def set_rarity_points_command(rarity, points):
+    """Configure the points of an achievement rarity and apply the change to every balance (server stopped)."""
+    # flask --app main set-rarity-points epic 50
+    # A running server keeps its catalog and rank indexes: use PUT /achievements/rarity-points there
+    from routes.achievements import set_rarity_points
+    db.create_all()
+    changed = set_rarity_points(rarity, points)
+    print(f"{rarity} achievements are now worth {points} points ({changed} balances changed)")
+
+
+@app.cli.command("backfill-points-ledger")
+def backfill_points_ledger_command():
+    """Post the existing point sources into an empty points ledger (migration of older databases)."""
+    # flask --app main backfill-points-ledger
+    from classes.points_ledger import backfill_points_ledger
+    db.create_all()
+    count = backfill_points_ledger()
+    db.session.commit()
+    print(f"Backfilled {count} ledger entries" if count else "Ledger already populated, nothing to backfill")
+
+
+@app.cli.command("checkpoint-points-ledger")
+def checkpoint_points_ledger_command():
+    """Checkpoint ledger accounts with a long tail of entries since their last checkpoint."""
+    # flask --app main checkpoint-points-ledger
+    from classes.points_ledger import checkpoint_points_ledger
+    db.create_all()
+    count = checkpoint_points_ledger()
+    print(f"Wrote {count} checkpoints")
+
+
+@app.cli.command("reconcile-achievement-stats")
+def reconcile_achievement_stats_command():
+    """Recount the per-achievement unlock counters from the user achievements."""
+    # flask --app main reconcile-achievement-stats
+    from routes.achievements import reconcile_unlock_counts
+    db.create_all()
+    count = reconcile_unlock_counts()
+    db.session.commit()
+    print(f"Fixed {count} unlock counters")
+
+
+@app.cli.command("archive-hall-of-fame")
+def archive_hall_of_fame_command():
+    """Archive the hall-of-fame top players of every closed month not archived yet and resolve due predictions."""
+    # flask --app main archive-hall-of-fame
+    from routes.leaderboards import archive_closed_periods, resolve_predictions
+    db.create_all()
+    count = archive_closed_periods()
+    resolved = resolve_predictions()
+    db.session.commit()
+    print(f"Archived {count} periods, resolved {resolved} predictions")
+
+
+@app.cli.command("resolve-predictions")
+def resolve_predictions_command():
+    """Resolve every structured prediction whose date's month has closed."""
+    # flask --app main resolve-predictions
+    from routes.leaderboards import resolve_predictions
+    db.create_all()
+    count = resolve_predictions()
+    db.session.commit()
+    print(f"Resolved {count} predictions")
 
 
 
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        ensure_user_points()  # backfill balances for databases created before user_points existed
+        from routes.achievements import reconcile_unlock_counts
+        reconcile_unlock_counts()  # unlock counters of databases created before they existed
+        db.session.commit()
     # Disable reloader so only one process listens and doesn't respawn
     app.run(host='0.0.0.0', port=5001, debug=False, use_reloader=False)
\ No newline at end of file
@@ -1,13 +1,27 @@
 from flask import Blueprint, request, jsonify
-from utils.utils import users, L, get_achievement_points
+from utils.utils import users, L, chunked
 #from werkzeug.security import generate_password_hash, check_password_hash, jwt_required, get_jwt_identity
 from flask_jwt_extended import create_access_token
 from classes.user import User
+from classes.user_points import adjust_user_points, award_user_points, month_of, reprice_achievements
+from classes.achievement_rules import AchievementRule, RULE_METRICS, rule_index
+from classes.celebration_feed import celebrations
+from utils.rank_index import board_ranks
+from utils.broadcaster import broadcaster
+from utils.achievement_catalog import DEFAULT_RARITY_POINTS, achievement_catalog, load_rarity_points, points_for
+from utils.user_directory import user_directory
+from utils.unlock_bitmaps import unlock_bitmaps, is_unlocked
+from utils.snapshot_cache import snapshots
 from utils.db import db
+from collections import Counter
 from datetime import datetime
+from sqlalchemy import case, insert, update
+from sqlalchemy.exc import IntegrityError
 from flask_jwt_extended import jwt_required, get_jwt_identity
 achievements_bp = Blueprint('achievements_bp', __name__)
 
+MAX_BULK_UNLOCKS = 5000  # (user, achievement) pairs accepted by one /achievements/unlock/bulk call
+
 class Achievement(db.Model):
     __tablename__ = 'achievements'
     id = db.Column(db.Integer, primary_key=True)
@@ -17,6 +31,18 @@ class Achievement(db.Model):
     rarity = db.Column(db.String(20), default="common")  # common, rare, epic, legendary
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class AchievementRarityPoints(db.Model):
+    """Configured points of a rarity (overrides the defaults in utils/achievement_catalog.py)"""
+    __tablename__ = 'achievement_rarity_points'
+    rarity = db.Column(db.String(20), primary_key=True)
+    points = db.Column(db.Integer, nullable=False)
+
+class AchievementUnlockCount(db.Model):
+    """Number of users that unlocked an achievement (kept by every unlock/lock path, recounted by reconcile_unlock_counts)"""
+    __tablename__ = 'achievement_unlock_counts'
+    achievement_id = db.Column(db.Integer, db.ForeignKey('achievements.id'), primary_key=True)
+    unlocks = db.Column(db.Integer, nullable=False, default=0)
+
 class UserAchievement(db.Model):
     __tablename__ = 'user_achievements'
     id = db.Column(db.Integer, primary_key=True)
@@ -40,7 +66,170 @@ def _uid_or_anon() -> str:
     return user if user else 'anonymous'
 
 
-def _ser(a: Achievement):
+def _unlock_points(ua: UserAchievement) -> int:
+    """Points a user achievement contributes to the balance (0 if its achievement is gone)"""
+    return achievement_catalog.points(ua.achievement_id)
+
+
+def _achievement_name(ua: UserAchievement):
+    entry = achievement_catalog.get(ua.achievement_id)
+    return entry.name if entry else None
+
+
+def _publish_achievement(user_id: str, achievement_id: int, name, action: str):
+    """Push an unlocked/locked delta to /api/stream clients once the transaction commits"""
+    broadcaster.publish_after_commit({
+        "type": "achievement", "action": action, "user": user_id,
+        "achievement_id": achievement_id, "achievement": name
+    })
+
+
+def _count_unlocks(deltas: dict):
+    """
+    Add unlock count deltas (achievement id -> delta) in the current transaction.
+
+    Call after staging the unlock/lock itself: existing counters are moved
+    with one UPDATE adding each delta in SQL, and a missing counter is
+    created from a recount, which already includes the staged change.
+    """
+    deltas = {achievement_id: delta for achievement_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    existing = {
+        achievement_id for (achievement_id,) in
+        db.session.query(AchievementUnlockCount.achievement_id).filter(AchievementUnlockCount.achievement_id.in_(deltas))
+    }
+    if existing:
+        db.session.execute(
+            update(AchievementUnlockCount)
+            .where(AchievementUnlockCount.achievement_id.in_(existing))
+            .values(unlocks=AchievementUnlockCount.unlocks + case(
+                {achievement_id: deltas[achievement_id] for achievement_id in existing},
+                value=AchievementUnlockCount.achievement_id, else_=0
+            ))
+            .execution_options(synchronize_session=False)
+        )
+    missing = set(deltas) - existing
+    if missing:
+        try:
+            with db.session.begin_nested():
+                counts = _recount_unlocks(missing)
+                db.session.execute(insert(AchievementUnlockCount), [
+                    {"achievement_id": achievement_id, "unlocks": counts.get(achievement_id, 0)} for achievement_id in missing
+                ])
+        except IntegrityError:
+            _count_unlocks({achievement_id: deltas[achievement_id] for achievement_id in missing})  # created meanwhile
+
+
+def _recount_unlocks(achievement_ids=None) -> dict:
+    """Achievement id -> number of distinct users that unlocked it, in one grouped query"""
+    query = (
+        db.session.query(UserAchievement.achievement_id, db.func.count(db.distinct(UserAchievement.user_id)))
+        .group_by(UserAchievement.achievement_id)
+    )
+    if achievement_ids is not None:
+        query = query.filter(UserAchievement.achievement_id.in_(achievement_ids))
+    return dict(query.all())
+
+
+def reconcile_unlock_counts() -> int:
+    """
+    Recount every achievement's unlock counter from user_achievements (set-based).
+
+    Exposed as `flask reconcile-achievement-stats`; also run after a user purge.
+
+    Returns:
+        int: number of counters that were wrong or missing
+    """
+    counts = _recount_unlocks()
+    stored = dict(db.session.query(AchievementUnlockCount.achievement_id, AchievementUnlockCount.unlocks).all())
+    achievement_ids = [achievement_id for (achievement_id,) in db.session.query(Achievement.id).all()]
+    fixed = {achievement_id: counts.get(achievement_id, 0) for achievement_id in achievement_ids
+             if stored.get(achievement_id) != counts.get(achievement_id, 0)}
+    for achievement_id, unlocks in fixed.items():
+        db.session.merge(AchievementUnlockCount(achievement_id=achievement_id, unlocks=unlocks))
+    return len(fixed)
+
+
+def _unlock_stats() -> tuple:
+    """(achievement id -> unlock count, number of known users) for the percentages"""
+    counts = snapshots.get(
+        'achievement_unlock_counts',
+        lambda: dict(db.session.query(AchievementUnlockCount.achievement_id, AchievementUnlockCount.unlocks).all()),
+        tables=('achievement_unlock_counts',)
+    )
+    return counts, user_directory.count()
+
+
+def _unlocked_percent(unlocks: int, users: int) -> float:
+    return round(100.0 * unlocks / users, 1) if users else 0.0
+
+
+def _celebration_message(user_id: str, name: str) -> str:
+    return f"{user_id} has unlocked {name} achievement! 🎉"
+
+
+def grant_achievements(pairs, bulk: bool = False) -> list:
+    """
+    Unlock many (user, achievement id) pairs in the current transaction (the caller commits).
+
+    Pairs naming an unknown achievement or already unlocked are skipped; the
+    existing unlocks are found with one query per chunk of users, and the
+    UserAchievement rows are written with one bulk INSERT; their celebrations
+    go to the celebration feed, which persists them in batches.
+    With bulk, balances are credited with one UPDATE per achievement and chunk
+    of users (award_user_points) instead of per unlock, and the boards are
+    rebuilt on next use rather than updated in place.
+
+    Returns:
+        list: (user_id, CatalogEntry) of every unlock made
+    """
+    wanted = {}
+    for user_id, achievement_id in pairs:
+        entry = achievement_catalog.get(achievement_id)
+        if entry:
+            wanted.setdefault(user_id, {})[entry.id] = entry
+    if not wanted:
+        return []
+
+    achievement_ids = {achievement_id for entries in wanted.values() for achievement_id in entries}
+    for chunk in chunked(wanted):
+        existing = (
+            db.session.query(UserAchievement.user_id, UserAchievement.achievement_id)
+            .filter(UserAchievement.user_id.in_(chunk), UserAchievement.achievement_id.in_(achievement_ids))
+            .all()
+        )
+        for user_id, achievement_id in existing:
+            wanted[user_id].pop(achievement_id, None)
+
+    granted = [(user_id, entry) for user_id, entries in wanted.items() for entry in entries.values()]
+    if not granted:
+        return []
+    # Credit the materialized balances before the source rows are written
+    if bulk:
+        by_achievement = {}
+        for user_id, entry in granted:
+            by_achievement.setdefault(entry, {})[user_id] = entry.points
+        for entry, awards in by_achievement.items():
+            award_user_points(awards, reference=f"achievement:{entry.id}", source='achievement')
+    else:
+        for user_id, entry in granted:
+            adjust_user_points(user_id, achievement=entry.points, reference=f"achievement:{entry.id}")
+    for user_id, entry in granted:
+        _publish_achievement(user_id, entry.id, entry.name, 'unlocked')
+    now = datetime.utcnow()
+    db.session.execute(insert(UserAchievement), [
+        {"user_id": user_id, "achievement_id": entry.id, "unlocked_at": now} for user_id, entry in granted
+    ])
+    _count_unlocks(Counter(entry.id for _, entry in granted))
+    celebrations.add_after_commit(
+        (user_id, entry.name, _celebration_message(user_id, entry.name)) for user_id, entry in granted
+    )
+    return granted
+
+
+def _ser(a):
+    """Achievement (model or CatalogEntry) as returned by the listings"""
     return {
         'id': a.id,
         'name': a.name,
@@ -54,23 +243,41 @@ def _ser(a: Achievement):
 def achievements_available():
     user_id = _uid_or_anon()
     
-    # Get all achievements
-    q = Achievement.query
-    items = q.order_by(Achievement.name.asc()).all()
+    # Cached catalog (by name) and the user's unlocked bitmap instead of loading both per call
+    items = achievement_catalog.entries('name')
+    unlocked = unlock_bitmaps.get(user_id)
     
-    # Get user's unlocked achievements
-    unlocked_ids = {ua.achievement_id for ua in UserAchievement.query.filter_by(user_id=user_id).all()}
+    # Precomputed unlock counters (cached until they change) instead of a COUNT per achievement
+    counts, users = _unlock_stats()
     
     # Create response with user-specific status
     result = []
     for a in items:
+        user_unlocked = is_unlocked(unlocked, a.id)
         achievement_data = _ser(a)
-        achievement_data['user_unlocked'] = a.id in unlocked_ids
-        achievement_data['locked'] = 'unlocked' if a.id in unlocked_ids else 'locked'
+        achievement_data['user_unlocked'] = user_unlocked
+        achievement_data['locked'] = 'unlocked' if user_unlocked else 'locked'
+        achievement_data['unlocks'] = counts.get(a.id, 0)
+        achievement_data['unlocked_percent'] = _unlocked_percent(counts.get(a.id, 0), users)
         result.append(achievement_data)
     
     return jsonify(result), 200
 
+@achievements_bp.get('/stats')  # unlock statistics # GET http://127.0.0.1:5001/achievements/stats
+def achievements_stats():
+    counts, users = _unlock_stats()
+    items = achievement_catalog.entries('name')
+    return jsonify({
+        'total_users': users,
+        'achievements': [{
+            'id': a.id,
+            'name': a.name,
+            'rarity': a.rarity,
+            'unlocks': counts.get(a.id, 0),
+            'unlocked_percent': _unlocked_percent(counts.get(a.id, 0), users)
+        } for a in items]
+    }), 200
+
 @achievements_bp.post('/unlock')  # unlock achievements
 @jwt_required(optional=True)
 def achievements_unlock():
@@ -79,7 +286,7 @@ def achievements_unlock():
     if not achievement_id:
         return jsonify({'error': 'achievement_id is required'}), 400
 
-    a = Achievement.query.get(achievement_id)
+    a = achievement_catalog.get(achievement_id)
     if not a:
         return jsonify({'error': 'achievement not found'}), 404
 
@@ -90,18 +297,15 @@ def achievements_unlock():
     if existing:
         return jsonify({'error': 'achievement already unlocked by this user'}), 400
 
-    # Create user achievement record (don't change global achievement status)
+    # Credit the materialized balance, then create user achievement record (don't change global achievement status)
+    adjust_user_points(user_id, achievement=a.points, reference=f"achievement:{a.id}")
     ua = UserAchievement(user_id=user_id, achievement_id=a.id)
     db.session.add(ua)
+    _count_unlocks({a.id: 1})
     
-    # Create automatic celebration
-    celebration_message = f"{user_id} has unlocked {a.name} achievement! 🎉"
-    celebration = Celebration(
-        user_id=user_id,
-        achievement_name=a.name,
-        message=celebration_message
-    )
-    db.session.add(celebration)
+    # Create automatic celebration (shown right away, persisted by the feed's background writer)
+    celebrations.add_after_commit([(user_id, a.name, _celebration_message(user_id, a.name))])
+    _publish_achievement(user_id, a.id, a.name, 'unlocked')
     
     db.session.commit()
 
@@ -109,6 +313,52 @@ def achievements_unlock():
     return jsonify({'message': 'unlocked', 'achievement': a.name, 'user': user_id}), 200
 
 
+@achievements_bp.post('/unlock/bulk')  # unlock achievements for many users # POST http://127.0.0.1:5001/achievements/unlock/bulk - {"unlocks": [{"user": "alice", "achievement_id": 1}, {"user": "bob", "achievement_id": 1}]}
+@jwt_required(optional=True)
+def achievements_unlock_bulk():
+    data = request.get_json(silent=True) or {}
+    unlocks = data.get('unlocks')
+    if not isinstance(unlocks, list) or not unlocks:
+        return jsonify({'error': 'unlocks must be a non-empty list'}), 400
+    if len(unlocks) > MAX_BULK_UNLOCKS:
+        return jsonify({'error': f'at most {MAX_BULK_UNLOCKS} unlocks per request'}), 400
+
+    results = []
+    pairs = []  # (result, user, achievement id)
+    for index, unlock in enumerate(unlocks):
+        unlock = unlock if isinstance(unlock, dict) else {}
+        user, entry = unlock.get('user'), achievement_catalog.get(unlock.get('achievement_id'))
+        result = {'index': index, 'user': user, 'achievement_id': unlock.get('achievement_id')}
+        results.append(result)
+        if not user or not isinstance(user, str):
+            result.update(status='error', message='user is required')
+        elif not entry:
+            result.update(status='error', message='achievement not found')
+        else:
+            result.update(achievement_id=entry.id)
+            pairs.append((result, user, entry.id))
+
+    # One set-based existence check, bulk inserts and a single commit for the whole request
+    granted = grant_achievements(((user, achievement_id) for _, user, achievement_id in pairs), bulk=True)
+    granted = {(user_id, entry.id) for user_id, entry in granted}
+    db.session.commit()
+    for result, user, achievement_id in pairs:
+        if (user, achievement_id) in granted:
+            granted.discard((user, achievement_id))  # a repeated pair is reported once
+            result.update(status='unlocked')
+        else:
+            result.update(status='already unlocked')
+
+    unlocked = sum(1 for result in results if result['status'] == 'unlocked')
+    L.log(f'Bulk unlock by {_uid_or_anon()}: {unlocked} achievements')
+    return jsonify({
+        'unlocked': unlocked,
+        'already_unlocked': sum(1 for result in results if result['status'] == 'already unlocked'),
+        'failed': sum(1 for result in results if result['status'] == 'error'),
+        'results': results
+    }), 200
+
+
 @achievements_bp.post('/lock')  # lock achievements
 @jwt_required(optional=True)
 def achievements_lock():
@@ -124,8 +374,13 @@ def achievements_lock():
     if not user_achievement:
         return jsonify({'error': 'achievement not unlocked by this user'}), 400
     
-    # Remove the user achievement (lock it)
+    # Remove the user achievement (lock it) and its points from the balance
+    adjust_user_points(user_id, achievement=-_unlock_points(user_achievement), month=month_of(user_achievement.unlocked_at),
+                       reference=f"achievement:{user_achievement.achievement_id}")
     db.session.delete(user_achievement)
+    _count_unlocks({user_achievement.achievement_id: -1})
+    board_ranks.invalidate_after_commit()  # the user may no longer be on the boards
+    _publish_achievement(user_id, user_achievement.achievement_id, _achievement_name(user_achievement), 'locked')
     db.session.commit()
     
     L.log(f'Achievement locked by {user_id}: {achievement_id}')
@@ -136,22 +391,19 @@ def achievements_lock():
 @jwt_required(optional=True)
 def achievements_my_progress():
     user_id = _uid_or_anon()
-    unlocked = UserAchievement.query.filter_by(user_id=user_id).all()
-    unlocked_ids = {u.achievement_id for u in unlocked}
-    all_ach = Achievement.query.all()
+    bitmap = unlock_bitmaps.get(user_id)
+    unlocked, locked = [], []
+    for a in achievement_catalog.entries():
+        (unlocked if is_unlocked(bitmap, a.id) else locked).append(a)
     
-    # Calculate total points based on rarity
-    total_points = 0
-    for ua in unlocked:
-        achievement = Achievement.query.get(ua.achievement_id)
-        if achievement:
-                total_points += get_achievement_points(achievement.rarity)
+    # Calculate total points based on rarity (from the cached catalog)
+    total_points = sum(a.points for a in unlocked)
     
     return jsonify({
         'user_id': user_id,
         'total_points': total_points,
-        'unlocked': [_ser(a) for a in all_ach if a.id in unlocked_ids],
-        'locked':   [_ser(a) for a in all_ach if a.id not in unlocked_ids]
+        'unlocked': [_ser(a) for a in unlocked],
+        'locked':   [_ser(a) for a in locked]
     }), 200
 
 @achievements_bp.post('/create-custom')  # create custom achievements # POST http://127.0.0.1:5001/achievements/create-custom - {"name":"My Custom Achievement", "description": "ok?", "rarity": "rare" }
@@ -168,23 +420,61 @@ def achievements_create_custom():
         rarity=data.get('rarity', 'common')
     )
     db.session.add(a)
+    db.session.flush()
+    db.session.add(AchievementUnlockCount(achievement_id=a.id, unlocks=0))
+    achievement_catalog.invalidate_after_commit()
     db.session.commit()
     return jsonify(_ser(a)), 201
 
+def set_rarity_points(rarity: str, points: int) -> int:
+    """
+    Configure the points of a rarity and apply the change to every balance.
+
+    Runs in the serving process (PUT /achievements/rarity-points), so the
+    achievement catalog is dropped when the new value commits. Holders of
+    the repriced achievements get the difference on their achievement
+    points, in their balance and in the rollup month of the unlock (see
+    reprice_achievements); nothing else is recomputed.
+
+    Returns:
+        int: number of users whose balance changed
+    """
+    # Old values from the catalog, new ones from the configured table with this rarity changed
+    rarity_points = {**load_rarity_points(), rarity: points}
+    deltas = {
+        entry.id: points_for(rarity_points, entry.rarity) - entry.points
+        for entry in achievement_catalog.entries()
+    }
+    changed = reprice_achievements(deltas, reference=f"rarity:{rarity}")
+    db.session.merge(AchievementRarityPoints(rarity=rarity, points=points))
+    achievement_catalog.invalidate_after_commit()
+    db.session.commit()
+    L.log(f"{rarity} achievements are now worth {points} points ({changed} balances changed)")
+    return changed
+
+@achievements_bp.put('/rarity-points')  # configure rarity points # PUT http://127.0.0.1:5001/achievements/rarity-points - {"rarity": "epic", "points": 50}
+@jwt_required()
+def achievements_set_rarity_points():
+    data = request.get_json(silent=True) or {}
+    rarity = data.get('rarity')
+    if not rarity or data.get('points') is None:
+        return jsonify({'error': 'rarity and points are required'}), 400
+    if rarity not in DEFAULT_RARITY_POINTS:
+        return jsonify({'error': f'rarity must be one of: {", ".join(DEFAULT_RARITY_POINTS)}'}), 400
+    try:
+        points = int(data.get('points'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'points must be an integer'}), 400
+    if points < 0:
+        return jsonify({'error': 'points must not be negative'}), 400
+    changed = set_rarity_points(rarity, points)
+    return jsonify({'rarity': rarity, 'points': achievement_catalog.rarity_points(rarity), 'balances_changed': changed}), 200
+
 @achievements_bp.get('/celebrations')  # view celebrations
 @jwt_required(optional=True)
 def achievements_celebrations():
-    celebrations = Celebration.query.order_by(Celebration.created_at.desc()).limit(20).all()
-    celebration_data = []
-    for c in celebrations:
-        celebration_data.append({
-            'id': c.id,
-            'user_id': c.user_id,
-            'achievement_name': c.achievement_name,
-            'message': c.message,
-            'created_at': c.created_at.isoformat() if c.created_at else None
-        })
-    return jsonify({'celebrations': celebration_data}), 200
+    # Served from the in-memory ring buffer of recent celebrations
+    return jsonify({'celebrations': celebrations.recent(20)}), 200
 
 @achievements_bp.delete('/achievement/remove')  # Remove achievement
 @jwt_required(optional=True)
@@ -198,10 +488,18 @@ def remove_achievement():
     if not achievement:
         return jsonify({'error': 'achievement not found'}), 404
     
-    # Remove all user achievements first
+    # Take the points back from every holder (in the month they unlocked it), then remove all user achievements
+    points = achievement_catalog.points(achievement.id)
+    for ua in UserAchievement.query.filter_by(achievement_id=achievement_id).all():
+        adjust_user_points(ua.user_id, achievement=-points, month=month_of(ua.unlocked_at), reference=f"achievement:{achievement_id}")
     UserAchievement.query.filter_by(achievement_id=achievement_id).delete()
+    AchievementRule.query.filter_by(achievement_id=achievement_id).delete()
+    AchievementUnlockCount.query.filter_by(achievement_id=achievement_id).delete()
+    rule_index.invalidate_after_commit()
     # Remove the achievement
     db.session.delete(achievement)
+    board_ranks.invalidate_after_commit()  # holders may no longer be on the boards
+    achievement_catalog.invalidate_after_commit()
     db.session.commit()
     
     return jsonify({'message': 'achievement removed'}), 200
@@ -218,7 +516,66 @@ def remove_user_achievement():
     if not user_achievement:
         return jsonify({'error': 'user achievement not found'}), 404
     
+    adjust_user_points(user_achievement.user_id, achievement=-_unlock_points(user_achievement),
+                       month=month_of(user_achievement.unlocked_at), reference=f"achievement:{user_achievement.achievement_id}")
     db.session.delete(user_achievement)
+    _count_unlocks({user_achievement.achievement_id: -1})
+    board_ranks.invalidate_after_commit()  # the user may no longer be on the boards
+    _publish_achievement(user_achievement.user_id, user_achievement.achievement_id,
+                         _achievement_name(user_achievement), 'locked')
     db.session.commit()
     
     return jsonify({'message': 'user achievement removed'}), 200
+
+
+@achievements_bp.post('/rules/create')  # Create an unlock rule # POST http://127.0.0.1:5001/achievements/rules/create - {"achievement_id": 1, "metric": "competition_progress", "competition_id": 1, "threshold": 100}
+#@jwt_required(optional=True)
+def create_achievement_rule():
+    from routes.games import Competition
+
+    data = request.get_json(silent=True) or {}
+    metric = data.get('metric')
+    if metric not in RULE_METRICS:
+        return jsonify({'error': f'metric must be one of: {", ".join(RULE_METRICS)}'}), 400
+    try:
+        threshold = int(data.get('threshold'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'threshold must be an integer'}), 400
+    if not achievement_catalog.get(data.get('achievement_id')):
+        return jsonify({'error': 'achievement not found'}), 404
+
+    competition_id = None
+    if RULE_METRICS[metric]:
+        competition = Competition.query.get(data.get('competition_id')) if data.get('competition_id') else None
+        if not competition:
+            return jsonify({'error': f'competition_id of an existing competition is required for {metric} rules'}), 400
+        competition_id = competition.id
+
+    rule = AchievementRule(achievement_id=int(data['achievement_id']), metric=metric,
+                           competition_id=competition_id, threshold=threshold)
+    db.session.add(rule)
+    rule_index.invalidate_after_commit()
+    db.session.commit()
+    return jsonify(rule.serialize()), 201
+
+@achievements_bp.get('/rules')  # View unlock rules # GET http://127.0.0.1:5001/achievements/rules
+def achievement_rules():
+    rules = AchievementRule.query.order_by(AchievementRule.id.asc()).all()
+    return jsonify({'rules': [rule.serialize() for rule in rules]}), 200
+
+@achievements_bp.delete('/rules/remove')  # Remove an unlock rule
+#@jwt_required(optional=True)
+def remove_achievement_rule():
+    data = request.get_json(silent=True) or {}
+    rule_id = data.get('id')
+    if not rule_id:
+        return jsonify({'error': 'id is required'}), 400
+
+    rule = AchievementRule.query.get(rule_id)
+    if not rule:
+        return jsonify({'error': 'rule not found'}), 404
+
+    db.session.delete(rule)
+    rule_index.invalidate_after_commit()
+    db.session.commit()
+    return jsonify({'message': 'rule removed'}), 200
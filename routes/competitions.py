@@ -3,7 +3,11 @@ from utils.utils import L
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from utils.db import db
 from datetime import datetime
+from classes.user_points import adjust_user_points
+from utils.rank_index import board_ranks
 from routes.games import Competition, Participation, UserCompetition  # 👈 use Competition, Participation, and UserCompetition from games.py
+from routes.games import publish_membership, publish_competition
+from classes.achievement_rules import AchievementRule, evaluate_rules, competitions_joined, rule_index
 
 competitions_bp = Blueprint('competitions_bp', __name__)
 
@@ -49,15 +53,20 @@ def _join_competition(category: str, default_title: str, description: str):
                 is_active=True
             )
             db.session.add(comp)
+            db.session.flush()
+            publish_competition(comp, 'created')
             db.session.commit()
 
         user_id = _uid_or_anon()
         # Allow duplicate competitions - users can join multiple of the same competition
         uc = UserCompetition(user_id=user_id, competition_id=comp.id)
         db.session.add(uc)
+        publish_membership(user_id, comp, 'joined', progress=0)
+        unlocked = evaluate_rules(user_id, 'competitions_joined', lambda: competitions_joined(user_id))
         db.session.commit()
         L.log(f"Competition joined by {user_id}: {comp.title}")
-        return jsonify({"message": "joined", "competition": _ser(comp)}), 200
+        return jsonify({"message": "joined", "competition": _ser(comp),
+                        "achievements_unlocked": [entry.name for entry in unlocked]}), 200
     except Exception as e:
         L.log(f"Error in _join_competition: {str(e)}")
         db.session.rollback()
@@ -326,10 +335,13 @@ def competitions_join():
     # Allow duplicate competitions - users can join multiple of the same competition
     uc = UserCompetition(user_id=user_id, competition_id=competition_id)
     db.session.add(uc)
+    publish_membership(user_id, comp, 'joined', progress=0)
+    unlocked = evaluate_rules(user_id, 'competitions_joined', lambda: competitions_joined(user_id))
     db.session.commit()
     
     L.log(f"Competition joined by {user_id}: {comp.title}")
-    return jsonify({"message": "joined", "competition": _ser(comp)}), 200
+    return jsonify({"message": "joined", "competition": _ser(comp),
+                    "achievements_unlocked": [entry.name for entry in unlocked]}), 200
 
 @competitions_bp.delete("/leave")
 # DELETE http://127.0.0.1:5001/competitions/leave
@@ -378,9 +390,13 @@ def competitions_leave():
             L.log(f"Removed UserCompetition record")
         
         if participation:
+            adjust_user_points(user_id, game=-int(participation.progress or 0), reference=f"competition:{participation.competition_id}")
             db.session.delete(participation)
+            board_ranks.invalidate_after_commit()  # the user may no longer be on the boards
             L.log(f"Removed Participation record")
         
+        entries = int(bool(user_competition)) + int(bool(participation))
+        publish_membership(user_id, (user_competition or participation).competition, 'left', entries=entries)
         db.session.commit()
         
         L.log(f"Competition left by {user_id}: {competition_id}")
@@ -413,11 +429,25 @@ def competitions_remove():
         # Delete all user participations first (UserCompetition)
         UserCompetition.query.filter_by(competition_id=competition_id).delete()
         
-        # Delete all game participations (Participation)
+        # Delete all game participations (Participation), taking their progress points back
+        progress_by_user = (
+            db.session.query(Participation.user_id, db.func.coalesce(db.func.sum(Participation.progress), 0))
+            .filter_by(competition_id=competition_id)
+            .group_by(Participation.user_id)
+            .all()
+        )
+        for participant, progress in progress_by_user:
+            adjust_user_points(participant, game=-int(progress), reference=f"competition:{competition_id}")
         Participation.query.filter_by(competition_id=competition_id).delete()
         
+        # Delete the unlock rules watching the competition
+        AchievementRule.query.filter_by(competition_id=competition_id).delete()
+        rule_index.invalidate_after_commit()
+        
         # Delete the competition itself
+        publish_competition(comp, 'removed')
         db.session.delete(comp)
+        board_ranks.invalidate_after_commit()  # participants may no longer be on the boards
         db.session.commit()
         
         L.log(f"Competition deleted: {comp_title} (ID: {competition_id})")
@@ -21,13 +21,19 @@ Key Features:
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from utils.db import db
-from utils.utils import movies, L
+from utils.utils import movies, L, chunked
+from classes.user_points import adjust_user_points, award_user_points
+from classes.achievement_rules import AchievementRule, evaluate_rules, evaluate_rules_batch, competitions_joined, rule_index
+from utils.rank_index import board_ranks
+from utils.broadcaster import broadcaster
 from datetime import datetime
 import json
 
 # Create Flask blueprint for games routes
 games_bp = Blueprint('games_bp', __name__)
 
+MAX_BATCH_PROGRESS = 5000  # records accepted by one /games/progress/batch call
+
 # =============================================================================
 # DATABASE MODELS
 # =============================================================================
@@ -144,6 +150,65 @@ def _uid_or_anon() -> str:
     return user if user else 'anonymous'
 
 
+def user_competition_titles(user_id: str) -> list:
+    """
+    Titles of every competition a user joined through either route, as listed on the homepage.
+    
+    Args:
+        user_id (str): User identifier
+        
+    Returns:
+        list: Sorted unique competition titles
+    """
+    titles = set()
+    for model in (Participation, UserCompetition):
+        rows = (
+            db.session.query(Competition.title)
+            .join(model, model.competition_id == Competition.id)
+            .filter(model.user_id == user_id)
+            .all()
+        )
+        titles.update(title for (title,) in rows)
+    return sorted(titles)
+
+
+def publish_membership(user_id: str, comp: Competition, action: str, **details):
+    """
+    Push a joined/left delta to /api/stream clients once the transaction commits.
+    
+    Call after the membership row is added or deleted: the event carries the
+    user's resulting competition list.
+    
+    Args:
+        user_id (str): User identifier
+        comp (Competition): Competition joined or left
+        action (str): 'joined' or 'left'
+        details: Extra fields (progress of a new participation, entries removed)
+    """
+    broadcaster.publish_after_commit({
+        "type": "membership",
+        "action": action,
+        "user": user_id,
+        "competition_id": comp.id,
+        "competition": comp.title,
+        "competitions": user_competition_titles(user_id),
+        **details
+    })
+
+
+def publish_competition(comp: Competition, action: str):
+    """Push a created/removed competition delta to /api/stream clients once the transaction commits"""
+    event = {"type": "competition", "action": action, "competition_id": comp.id, "competition": comp.title}
+    if action == 'created':
+        event.update({
+            "description": comp.description,
+            "start_at": comp.start_at.isoformat() if comp.start_at else None,
+            "end_at": comp.end_at.isoformat() if comp.end_at else None,
+            "is_active": comp.is_active
+        })
+    broadcaster.publish_after_commit(event)
+
+
 def _parse_dt(s):
     """
     Parse datetime string from ISO format.
@@ -222,6 +287,8 @@ def create_game():
             is_active=bool(data.get('is_active', True))
         )
         db.session.add(comp)
+        db.session.flush()
+        publish_competition(comp, 'created')
         db.session.commit()
         L.log(f'Competition created #{comp.id} "{comp.title}"')
         
@@ -307,8 +374,12 @@ def join_game():
 
     p = Participation(user_id=user_id, competition_id=comp_id, progress=0)
     db.session.add(p)
+    board_ranks.record(user_id, 0)  # participants are ranked even with 0 points
+    publish_membership(user_id, comp, 'joined', progress=0)
+    unlocked = evaluate_rules(user_id, 'competitions_joined', lambda: competitions_joined(user_id))
     db.session.commit()
-    return jsonify({'message': 'joined', 'participation_id': p.id}), 201
+    return jsonify({'message': 'joined', 'participation_id': p.id,
+                    'achievements_unlocked': [entry.name for entry in unlocked]}), 201
 
 @games_bp.put('/progress/update')  # competition progress and update #postman - http://127.0.0.1:5001/games/progress/update - PUT { "competition_id": "Game Name", "delta": 10}
 @jwt_required(optional=True)
@@ -335,12 +406,117 @@ def update_progress_game():
         return jsonify({'error': f'You have not joined the competition "{comp.title}" (ID: {comp.id}). Please join the competition first before updating progress.'}), 404
 
     try:
-        p.progress = int(p.progress) + int(delta)
+        delta = int(delta)
+        progress = int(p.progress) + delta
     except Exception:
         return jsonify({'error': 'delta must be an integer'}), 400
 
+    # Keep the materialized balance in the same transaction
+    adjust_user_points(user_id, game=delta, reference=f"competition:{comp.id}")
+    p.progress = progress
+    broadcaster.publish_after_commit({"type": "progress", "user": user_id, "competition_id": comp.id, "progress": progress})
+    unlocked = evaluate_rules(user_id, 'competition_progress', progress, competition_id=comp.id)
     db.session.commit()
-    return jsonify({'message': 'progress updated', 'progress': p.progress}), 200
+    return jsonify({'message': 'progress updated', 'progress': p.progress,
+                    'achievements_unlocked': [entry.name for entry in unlocked]}), 200
+
+@games_bp.post('/progress/batch')  # many progress deltas in one transaction #postman - http://127.0.0.1:5001/games/progress/batch - POST {"updates": [{"user": "alice", "competition_id": 1, "delta": 5}, {"user": "bob", "competition_id": "Game Name", "delta": 3}]}
+@jwt_required(optional=True)
+def update_progress_batch():
+    data = request.get_json(silent=True) or {}
+    updates = data.get('updates')
+    if not isinstance(updates, list) or not updates:
+        return jsonify({'error': 'updates must be a non-empty list'}), 400
+    if len(updates) > MAX_BATCH_PROGRESS:
+        return jsonify({'error': f'at most {MAX_BATCH_PROGRESS} updates per request'}), 400
+    caller = _uid_or_anon()
+
+    # Validate every record, then resolve all competitions (by ID or by name) with one query
+    results = []
+    records = []  # (result, user, competition ID or name, delta)
+    for index, record in enumerate(updates):
+        record = record if isinstance(record, dict) else {}
+        user, comp_id_or_name = record.get('user') or caller, record.get('competition_id')
+        result = {'index': index, 'user': user, 'competition_id': comp_id_or_name, 'delta': record.get('delta', 0)}
+        results.append(result)
+        try:
+            delta = result['delta'] = int(record.get('delta', 0))
+        except (TypeError, ValueError):
+            result.update(status='error', message='delta must be an integer')
+            continue
+        if not isinstance(user, str):
+            result.update(status='error', message='user must be a string')
+        elif comp_id_or_name is None or comp_id_or_name == '':
+            result.update(status='error', message='competition_id is required')
+        elif isinstance(comp_id_or_name, bool) or not isinstance(comp_id_or_name, (int, str)):
+            result.update(status='error', message='competition_id must be an ID or a competition name')
+        else:
+            records.append((result, user, comp_id_or_name, delta))
+
+    def is_id(ref):  # refs are validated str/int (never bool) above
+        return isinstance(ref, int) or ref.isdigit()
+
+    ids = {int(ref) for _, _, ref, _ in records if is_id(ref)}
+    titles = {ref for _, _, ref, _ in records if not is_id(ref)}
+    by_id, by_title = {}, {}
+    if ids or titles:
+        for comp in Competition.query.filter(db.or_(Competition.id.in_(ids), Competition.title.in_(titles))).order_by(Competition.id.asc()):
+            by_id[comp.id] = comp
+            by_title.setdefault(comp.title, comp)  # same competition as .first() of the single update
+
+    # Coalesce the deltas per (user, competition)
+    totals = {}
+    keyed = []  # (result, key)
+    for result, user, ref, delta in records:
+        comp = by_id.get(int(ref)) if is_id(ref) else by_title.get(ref)
+        if not comp:
+            result.update(status='error', message='competition not found')
+            continue
+        result.update(competition_id=comp.id)
+        totals[(user, comp.id)] = totals.get((user, comp.id), 0) + delta
+        keyed.append((result, (user, comp.id)))
+
+    # Participations of every key, one query per chunk of users
+    participations = {}
+    comp_ids = {comp_id for _, comp_id in totals}
+    for chunk in chunked({user for user, _ in totals}):
+        for p in (Participation.query.filter(Participation.user_id.in_(chunk), Participation.competition_id.in_(comp_ids))
+                  .order_by(Participation.id.desc())):
+            participations[(p.user_id, p.competition_id)] = p  # lowest id wins, like .first()
+    for key in [key for key in totals if key not in participations]:
+        del totals[key]
+
+    # Credit the materialized balances (one UPDATE per competition and chunk of users), then the progress rows
+    by_competition = {}
+    for (user, comp_id), total in totals.items():
+        by_competition.setdefault(comp_id, {})[user] = total
+    for comp_id, awards in by_competition.items():
+        award_user_points(awards, reference=f"competition:{comp_id}", source='game')
+    progress = {}
+    for key, total in totals.items():
+        p = participations[key]
+        progress[key] = int(p.progress or 0) + total
+        if total:
+            p.progress = progress[key]
+            broadcaster.publish_after_commit({"type": "progress", "user": key[0], "competition_id": key[1], "progress": progress[key]})
+    unlocked = evaluate_rules_batch('competition_progress', ((user, value, comp_id) for (user, comp_id), value in progress.items()))
+    db.session.commit()
+
+    for result, key in keyed:
+        if key in progress:
+            result.update(status='applied', progress=progress[key])
+        else:
+            result.update(status='error', message='competition not joined')
+
+    applied = sum(1 for result in results if result['status'] == 'applied')
+    L.log(f'Batch progress by {caller}: {applied} updates for {len(progress)} participations')
+    return jsonify({
+        'applied': applied,
+        'failed': len(results) - applied,
+        'participations_updated': sum(1 for total in totals.values() if total),
+        'achievements_unlocked': [{'user': user, 'achievement': entry.name} for user, entry in unlocked],
+        'results': results
+    }), 200
 
 @games_bp.get('/rules/update')  # view rules #postman - http://127.0.0.1:5001/games/rules/update - GET
 def update_rules_game():
@@ -376,10 +552,22 @@ def remove_competition():
     if not comp:
         return jsonify({'error': 'competition not found'}), 404
     
-    # Remove all participations first
+    # Take the progress points back from every participant, then remove all participations
+    progress_by_user = (
+        db.session.query(Participation.user_id, db.func.coalesce(db.func.sum(Participation.progress), 0))
+        .filter_by(competition_id=comp_id)
+        .group_by(Participation.user_id)
+        .all()
+    )
+    for participant, progress in progress_by_user:
+        adjust_user_points(participant, game=-int(progress), reference=f"competition:{comp_id}")
     Participation.query.filter_by(competition_id=comp_id).delete()
+    AchievementRule.query.filter_by(competition_id=comp_id).delete()
+    rule_index.invalidate_after_commit()
     # Remove the competition
+    publish_competition(comp, 'removed')
     db.session.delete(comp)
+    board_ranks.invalidate_after_commit()  # participants may no longer be on the boards
     db.session.commit()
     
     return jsonify({'message': 'competition removed'}), 200
@@ -396,7 +584,11 @@ def remove_participation():
     if not participation:
         return jsonify({'error': 'participation not found'}), 404
     
+    adjust_user_points(participation.user_id, game=-int(participation.progress or 0),
+                       reference=f"competition:{participation.competition_id}")
     db.session.delete(participation)
+    board_ranks.invalidate_after_commit()  # the user may no longer be on the boards
+    publish_membership(participation.user_id, participation.competition, 'left', entries=1)
     db.session.commit()
     
     return jsonify({'message': 'participation removed'}), 200
@@ -1,10 +1,23 @@
-from flask import Blueprint, jsonify, request
+import base64
+import bisect
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, current_app, jsonify, request
 from utils.utils import L, get_achievement_points
+from utils.achievement_catalog import achievement_catalog
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request, jwt_required
+from sqlalchemy.exc import IntegrityError
 from utils.db import db
-from datetime import datetime
+from datetime import datetime, timedelta
 from routes.achievements import UserAchievement, Achievement
 from routes.social import UserTeam
+from classes.user_points import UserPoints, MonthlyPoints, adjust_user_points, refresh_user_points, set_monthly_manual_points, current_month
+from classes.points_ledger import LEDGER_SOURCES, ledger_balance_before
+from classes.user_purge import UserPurgeJob, start_user_purge
+from utils.rank_index import board_ranks
+from utils.snapshot_cache import snapshots, cached_response
+from utils.broadcaster import broadcaster
 # Redemption imported inside functions to avoid circular import
 from routes.games import Competition
 
@@ -19,14 +32,40 @@ class ManualLeaderboard(db.Model):
 
 class ManualLeaderboardEntry(db.Model):
     __tablename__ = 'manual_leaderboard_entries'
+    # One entry per user and board (tables created before this constraint may hold duplicates; the first one counts)
+    __table_args__ = (db.UniqueConstraint('user', 'board'),)
     id = db.Column(db.Integer, primary_key=True)
     user = db.Column(db.String(120), nullable=False)
     points = db.Column(db.Integer, nullable=False, default=0)
-    board = db.Column(db.String(50), nullable=False, default='global')  # global|team|monthly|hall_of_fame
+    board = db.Column(db.String(50), nullable=False, default='global')  # global|team|monthly (hall of fame: see HallOfFameEntry)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+class HallOfFameEntry(db.Model):
+    __tablename__ = 'hall_of_fame_archive'  # top N of each closed period, written once at close
+    __table_args__ = (db.UniqueConstraint('period', 'rank'),)
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(20), nullable=False, index=True)  # 'YYYY-MM'
+    rank = db.Column(db.Integer, nullable=False)
+    user = db.Column(db.String(120), nullable=False)
+    points = db.Column(db.Integer, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def serialize(self):
+        return {"period": self.period, "rank": self.rank, "user": self.user, "points": self.points}
+
 
 # ---------- HELPERS ----------
+BOARDS = ("global", "team", "monthly", "hall_of_fame")
+HALL_OF_FAME_SIZE = 10  # players archived per closed period
+MONTH_PATTERN = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+
+def _board_name(board: str):
+    """Normalize a board name from a URL or body ('hall-of-fame' -> 'hall_of_fame'), None if unknown"""
+    board = (board or '').lower().replace('-', '_')
+    return board if board in BOARDS else None
+
+
 def _uid_or_anon() -> str:
     try:
         # Allow missing token without raising
@@ -39,15 +78,525 @@ def _uid_or_anon() -> str:
 
 def _calculate_user_achievement_points(user_id: str) -> int:
     """Calculate total achievement points for a user based on rarity (prevent duplicates)"""
-    unlocked = UserAchievement.query.filter_by(user_id=user_id).all()
-    total_points = 0
-    seen_achievements = set()  # Track seen achievement IDs to prevent duplicates
-    for ua in unlocked:
-        achievement = Achievement.query.get(ua.achievement_id)
-        if achievement and achievement.id not in seen_achievements:
-            seen_achievements.add(achievement.id)
-            total_points += get_achievement_points(achievement.rarity)
-    return total_points
+    # Distinct ids prevent duplicates; rarity points come from the cached catalog
+    unlocked = db.session.query(UserAchievement.achievement_id).filter_by(user_id=user_id).distinct()
+    return sum(achievement_catalog.points(achievement_id) for (achievement_id,) in unlocked)
+
+
+def _aggregate_board(board: str, with_details: bool = True, sort: bool = True, month: str = None) -> list:
+    """
+    Build the rows of a leaderboard for every user in a fixed number of grouped queries.
+
+    Points per user are achievement points (rarity based, each achievement counted once)
+    + participation progress + the user's manual entry on ``board`` - redeemed points.
+    The monthly board is served from the monthly rollup instead (see _aggregate_month).
+
+    Membership:
+        - team: users that belong to a team (rows also carry ``team_name``)
+        - global: manual entries (board + legacy) and users with achievements or participations
+
+    Query budget (constant, independent of the number of users):
+        1. manual entries of the board
+        2. legacy manual entries (global); team memberships come from a cached map
+        3. unlocked achievements joined with the achievement catalog
+        4. participation progress summed per user
+        5. redemptions summed per user
+
+    Args:
+        board (str): global|team|monthly
+        with_details (bool): include the per-user ``achievements`` array
+        sort (bool): sort rows by points descending (ties by user name)
+        month (str): 'YYYY-MM' bucket of the monthly board (default current month)
+
+    Returns:
+        list: one row per user on the board
+    """
+    if board == 'monthly':
+        return _aggregate_month(month or current_month(), with_details, sort)
+
+    from routes.games import Participation
+    from routes.rewards import Redemption
+
+    # Manual points - first entry per user on this board
+    manual = {}
+    manual_rows = (
+        db.session.query(ManualLeaderboardEntry.user, ManualLeaderboardEntry.points)
+        .filter(ManualLeaderboardEntry.board == board)
+        .order_by(ManualLeaderboardEntry.id.asc())
+        .all()
+    )
+    for user, points in manual_rows:
+        manual.setdefault(user, points)
+
+    teams = {}
+    if board == 'team':
+        # Only team members are ranked; restrict the point queries to them
+        teams = team_membership()
+        members = set(teams)
+        team_scope = db.session.query(UserTeam.user_id)
+    else:
+        members = set(manual)
+        team_scope = None
+        if board == 'global':
+            members.update(user for (user,) in db.session.query(ManualLeaderboard.user).all())
+
+    # Achievement details per user (outer join keeps users whose achievement was removed)
+    achievement_query = (
+        db.session.query(UserAchievement.user_id, Achievement.id, Achievement.name, Achievement.rarity)
+        .outerjoin(Achievement, Achievement.id == UserAchievement.achievement_id)
+        .order_by(UserAchievement.id.asc())
+    )
+    participation_query = (
+        db.session.query(Participation.user_id, db.func.coalesce(db.func.sum(Participation.progress), 0))
+        .group_by(Participation.user_id)
+    )
+    spent_query = (
+        db.session.query(Redemption.user_id, db.func.coalesce(db.func.sum(Redemption.points), 0))
+        .group_by(Redemption.user_id)
+    )
+    if team_scope is not None:
+        achievement_query = achievement_query.filter(UserAchievement.user_id.in_(team_scope))
+        participation_query = participation_query.filter(Participation.user_id.in_(team_scope))
+        spent_query = spent_query.filter(Redemption.user_id.in_(team_scope))
+
+    achievements = {}
+    for user_id, achievement_id, name, rarity in achievement_query.all():
+        details = achievements.setdefault(user_id, {})
+        if achievement_id is None or achievement_id in details:
+            continue
+        details[achievement_id] = {
+            "id": achievement_id,
+            "name": name,
+            "points": get_achievement_points(rarity),
+            "rarity": rarity
+        }
+    participation = {user_id: int(points) for user_id, points in participation_query.all()}
+    spent = {user_id: int(points) for user_id, points in spent_query.all()}
+
+    if board != 'team':
+        members.update(achievements)
+        members.update(participation)
+
+    leaderboard_data = []
+    for user in members:
+        details = list(achievements.get(user, {}).values())
+        achievement_points = sum(d["points"] for d in details)
+        # Total points (achievement + participation + manual - spent)
+        total_points = achievement_points + participation.get(user, 0) + manual.get(user, 0) - spent.get(user, 0)
+        row = {
+            "user": user,
+            "points": total_points,
+            "id": f"user_{user.replace(' ', '_')}"  # Always provide an ID for removal
+        }
+        if with_details:
+            row["achievements"] = details
+        if board == 'team':
+            row["team_name"] = teams.get(user, "No Team")
+        leaderboard_data.append(row)
+
+    if sort:
+        leaderboard_data.sort(key=_row_key)
+    return leaderboard_data
+
+
+def _load_team_membership() -> dict:
+    teams = {}
+    for user_id, team_name in db.session.query(UserTeam.user_id, UserTeam.team_name).order_by(UserTeam.id.asc()).all():
+        teams.setdefault(user_id, team_name)  # first membership wins
+    return teams
+
+
+def team_membership() -> dict:
+    """user -> team name, cached until the next write to user_teams"""
+    return snapshots.get('team_membership', _load_team_membership, tables=('user_teams',))
+
+
+def _aggregate_teams() -> list:
+    """
+    Rank teams by the team-board points of their members in one grouped query.
+
+    Member points are the materialized balance (achievements + progress -
+    spent) plus the member's manual 'team' entry, as on the team board. Like
+    the board, a user counts for their first team and first manual entry.
+
+    Returns:
+        list: {rank, team_name, total_points, average_points, member_count} sorted by total
+    """
+    first_membership = db.session.query(db.func.min(UserTeam.id)).group_by(UserTeam.user_id)
+    first_team_entry = (
+        db.session.query(db.func.min(ManualLeaderboardEntry.id))
+        .filter(ManualLeaderboardEntry.board == 'team')
+        .group_by(ManualLeaderboardEntry.user)
+    )
+    member_points = (
+        db.func.coalesce(UserPoints.achievement_points, 0)
+        + db.func.coalesce(UserPoints.game_points, 0)
+        - db.func.coalesce(UserPoints.spent_points, 0)
+        + db.func.coalesce(ManualLeaderboardEntry.points, 0)
+    )
+    rows = (
+        db.session.query(UserTeam.team_name, db.func.count(UserTeam.user_id), db.func.sum(member_points))
+        .outerjoin(UserPoints, UserPoints.user_id == UserTeam.user_id)
+        .outerjoin(ManualLeaderboardEntry, db.and_(
+            ManualLeaderboardEntry.user == UserTeam.user_id,
+            ManualLeaderboardEntry.id.in_(first_team_entry)
+        ))
+        .filter(UserTeam.id.in_(first_membership))
+        .group_by(UserTeam.team_name)
+        .all()
+    )
+    teams = sorted(
+        ({
+            "team_name": team_name,
+            "member_count": member_count,
+            "total_points": int(total or 0),
+            "average_points": round(int(total or 0) / member_count, 2)
+        } for team_name, member_count, total in rows),
+        key=lambda team: (-team["total_points"], team["team_name"])
+    )
+    for rank, team in enumerate(teams, 1):
+        team["rank"] = rank
+    return teams
+
+
+def _aggregate_month(month: str, with_details: bool = True, sort: bool = True) -> list:
+    """
+    Build the monthly board of ``month`` from the MonthlyPoints rollup.
+
+    Points are those earned during the month (achievements unlocked, progress
+    made and manual 'monthly' points set that month); redemptions are not
+    subtracted. The rollup is read through its month index, so the cost grows
+    with the users active that month rather than with the whole history. With
+    details, one more query lists the achievements unlocked during the month.
+    """
+    leaderboard_data = []
+    for row in MonthlyPoints.query.filter_by(month=month).all():
+        leaderboard_data.append({
+            "user": row.user_id,
+            "points": row.total_points,
+            "id": f"user_{row.user_id.replace(' ', '_')}"  # Always provide an ID for removal
+        })
+
+    if with_details and leaderboard_data:
+        start = datetime.strptime(month, '%Y-%m')
+        end = (start + timedelta(days=32)).replace(day=1)
+        unlocked = (
+            db.session.query(UserAchievement.user_id, Achievement.id, Achievement.name, Achievement.rarity)
+            .join(Achievement, Achievement.id == UserAchievement.achievement_id)
+            .filter(UserAchievement.unlocked_at >= start, UserAchievement.unlocked_at < end)
+            .order_by(UserAchievement.id.asc())
+            .all()
+        )
+        achievements = {}
+        for user_id, achievement_id, name, rarity in unlocked:
+            achievements.setdefault(user_id, {}).setdefault(achievement_id, {
+                "id": achievement_id,
+                "name": name,
+                "points": get_achievement_points(rarity),
+                "rarity": rarity
+            })
+        for row in leaderboard_data:
+            row["achievements"] = list(achievements.get(row["user"], {}).values())
+
+    if sort:
+        leaderboard_data.sort(key=_row_key)
+    return leaderboard_data
+
+
+def _row_key(row: dict) -> tuple:
+    """Board order: points descending, then user name"""
+    return (-row["points"], row["user"])
+
+
+def _encode_cursor(row: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps([row["points"], row["user"]]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """Board-order key of the last row of the previous page (raises ValueError if malformed)"""
+    try:
+        points, user = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (-int(points), str(user))
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def _board_snapshot(board: str, with_details: bool, month: str = None) -> list:
+    """Sorted rows of a board, recomputed only after a write to the tables it is built from"""
+    return snapshots.get(
+        ('board', board, month, with_details),
+        lambda: _aggregate_board(board, with_details=with_details, month=month)
+    )
+
+
+def _board_response(board: str, key: str, month: str = None):
+    """
+    Serve a board for the current request (shared by the board endpoints).
+
+    Query string:
+        limit (int): page size (1-1000)
+        cursor (str): next_cursor of the previous page
+        details (bool): include the per-user achievements array (default true)
+
+    Without limit and cursor the full sorted board is returned as before.
+    Cursors encode the (points, user) of the last row, so pages stay stable
+    while rows before the cursor change.
+
+    Boards are served from a versioned snapshot and tagged with an ETag, so
+    an unchanged poll sending If-None-Match gets 304 without any SQL.
+    """
+    return cached_response(f"{board}-{month}" if month else board, lambda: _board_page(board, key, month))
+
+
+def _board_page(board: str, key: str, month: str = None):
+    args = request.args
+    with_details = args.get("details", "true").lower() not in ("0", "false", "no")
+    extra = {"month": month} if month else {}
+    if "limit" not in args and "cursor" not in args:
+        return jsonify({key: _board_snapshot(board, with_details, month), **extra}), 200
+
+    try:
+        limit = int(args.get("limit", 50))
+    except ValueError:
+        return jsonify({"error": "limit must be integer"}), 400
+    if not 1 <= limit <= 1000:
+        return jsonify({"error": "limit must be between 1 and 1000"}), 400
+    try:
+        after = _decode_cursor(args["cursor"]) if args.get("cursor") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rows = _board_snapshot(board, with_details, month)
+    start = bisect.bisect_right(rows, after, key=_row_key) if after is not None else 0
+    # One extra row tells whether another page exists
+    page = rows[start:start + limit + 1]
+    next_cursor = _encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return jsonify({key: page[:limit], "next_cursor": next_cursor, **extra}), 200
+
+
+def archive_closed_periods() -> int:
+    """
+    Archive the top HALL_OF_FAME_SIZE players of every closed month not archived yet.
+
+    Also run lazily in the background after a hall-of-fame read, so it never
+    resolves predictions: that stays in the explicit period-close job
+    (`flask archive-hall-of-fame`, see resolve_predictions).
+
+    Rows are taken from the monthly rollup, written once and never updated,
+    so reading the hall of fame never re-aggregates history.
+
+    Returns:
+        int: number of periods archived (months where nobody earned points write no rows)
+    """
+    archived = db.session.query(HallOfFameEntry.period).distinct()
+    closed = [
+        month for (month,) in db.session.query(MonthlyPoints.month)
+        .filter(MonthlyPoints.month < current_month(), MonthlyPoints.month.notin_(archived))
+        .distinct()
+        .all()
+    ]
+    archived_periods = 0
+    for month in closed:
+        top = [row for row in _aggregate_month(month, with_details=False) if row["points"] > 0]
+        for rank, row in enumerate(top[:HALL_OF_FAME_SIZE], 1):
+            db.session.add(HallOfFameEntry(period=month, rank=rank, user=row["user"], points=row["points"]))
+        archived_periods += bool(top)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # archived meanwhile by another worker
+        return 0
+    return archived_periods
+
+
+_archive_checked = {}  # current month when the background archive was last queued
+_archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='hall-of-fame')
+
+
+def _schedule_hall_of_fame_archive():
+    """
+    Queue the archiving of newly closed periods, at most once per month per process.
+
+    Called by the hall-of-fame reads, which never write nor wait: they serve
+    what is already archived, and the background job's commit moves the
+    snapshot version on. The period-close job (`flask archive-hall-of-fame`)
+    archives eagerly.
+    """
+    month = current_month()
+    if _archive_checked.get('month') != month:
+        _archive_checked['month'] = month
+        _archive_executor.submit(_archive_in_background, current_app._get_current_object())
+
+
+def _archive_in_background(app) -> None:
+    """Worker body of _schedule_hall_of_fame_archive"""
+    with app.app_context():
+        try:
+            count = archive_closed_periods()
+            L.log(f"Archived {count} hall-of-fame periods")
+        except Exception as e:
+            db.session.rollback()
+            _archive_checked.pop('month', None)  # retried on a later read
+            L.log(f"Hall of fame archive failed: {str(e)}")
+
+
+def _hall_of_fame_rows(period: str = None) -> list:
+    query = HallOfFameEntry.query
+    if period:
+        query = query.filter_by(period=period)
+    return [entry.serialize() for entry in query.order_by(HallOfFameEntry.period.desc(), HallOfFameEntry.rank.asc()).all()]
+
+
+def _hall_of_fame_ranking(period: str = None) -> tuple:
+    """(period, rows by rank) of an archived period, the latest one by default"""
+    _schedule_hall_of_fame_archive()
+    if not period:
+        period = snapshots.get(
+            'hall_of_fame_latest',
+            lambda: db.session.query(db.func.max(HallOfFameEntry.period)).scalar(),
+            tables=('hall_of_fame_archive',)
+        )
+    if not period:
+        return None, []
+    return period, snapshots.get(
+        ('hall_of_fame', period), lambda: _hall_of_fame_rows(period), tables=('hall_of_fame_archive',)
+    )
+
+
+def _hall_of_fame_position(user: str, radius: int = 0):
+    """
+    Rank and neighbours of a user in an archived hall-of-fame period (?period=YYYY-MM, latest by default).
+
+    The hall of fame has no live index: it only changes when a period
+    closes, so rank/around read the (small) archived top list of the period.
+    """
+    period = request.args.get("period")
+    if period and not MONTH_PATTERN.fullmatch(period):
+        return None, (jsonify({"error": "period must be in YYYY-MM format"}), 400)
+    period, rows = _hall_of_fame_ranking(period)
+    position = next((index for index, row in enumerate(rows) if row["user"] == user), None)
+    if position is None:
+        return None, (jsonify({"error": "user not found on this board"}), 404)
+    return (period, rows[position], rows[max(0, position - radius):position + radius + 1], len(rows)), None
+
+
+PREDICTION_BOARDS = ("global", "team", "monthly")  # boards a structured prediction can target
+
+
+def _period_ranks(board: str, month: str) -> dict:
+    """
+    user -> rank on a board as it stood at the close of ``month``.
+
+    The monthly board is that month's rollup. The global and team boards use
+    the live formula (achievement points + participation progress + manual
+    entry - redeemed points) on the balances at the end of the month, summed
+    from the points ledger legs posted before it, so manual points and
+    redemptions count as they did on /leaderboards/global at the deadline.
+
+    Intentional differences from the live board at that moment: team
+    membership and 'team' manual entries keep no history, so the current
+    teams rank and a 'team' entry counts at its current value if it was
+    created by then; users with no ledger postings before the cutoff are
+    not on the global board.
+    """
+    if board == 'monthly':
+        rows = _aggregate_month(month, with_details=False)
+    else:
+        year, number = map(int, month.split('-'))
+        cutoff = datetime(year + number // 12, number % 12 + 1, 1)
+        balances = ledger_balance_before(cutoff)
+        if board == 'team':
+            manual = {}
+            manual_rows = (
+                db.session.query(ManualLeaderboardEntry.user, ManualLeaderboardEntry.points)
+                .filter(ManualLeaderboardEntry.board == 'team', ManualLeaderboardEntry.created_at < cutoff)
+                .order_by(ManualLeaderboardEntry.id.asc())
+                .all()
+            )
+            for user, points in manual_rows:
+                manual.setdefault(user, points)
+            empty = dict.fromkeys(LEDGER_SOURCES.values(), 0)
+            balances = {user: {**balances.get(user, empty), "manual_points": manual.get(user, 0)}
+                        for user in team_membership()}
+        rows = sorted(
+            ({"user": user, "points": balance["achievement_points"] + balance["game_points"]
+              + balance["manual_points"] - balance["spent_points"]} for user, balance in balances.items()),
+            key=_row_key
+        )
+    return {row["user"]: rank for rank, row in enumerate(rows, 1)}
+
+
+def resolve_predictions(today=None) -> int:
+    """
+    Resolve every pending structured prediction whose deadline's month has closed.
+
+    Run only by the explicit jobs (`flask archive-hall-of-fame` after
+    archiving, and `flask resolve-predictions`); the caller commits. Each prediction is
+    scored against its board at the close of the deadline's month (see
+    _period_ranks) rather than the live board, so the outcome does not
+    depend on when the job runs. Every (board, month) is ranked once, and
+    the per-predictor accuracy counters are updated in the same transaction.
+
+    Args:
+        today (date): Resolution date (default today, UTC); months before its month are closed
+
+    Returns:
+        int: number of predictions resolved
+    """
+    today = today or datetime.utcnow().date()
+    due = PredictionTarget.query.filter(
+        PredictionTarget.outcome == 'pending', PredictionTarget.deadline < today.replace(day=1)
+    ).all()
+    if not due:
+        return 0
+
+    ranks = {}  # (board, month) -> {user: rank}
+    tally = {}  # predictor -> [resolved, correct]
+    now = datetime.utcnow()
+    for target in due:
+        period = (target.board, target.deadline.strftime('%Y-%m'))
+        if period not in ranks:
+            ranks[period] = _period_ranks(*period)
+        rank = ranks[period].get(target.subject)
+        target.resolved_rank = rank
+        target.outcome = 'correct' if rank is not None and rank <= target.top_n else 'wrong'
+        target.resolved_at = now
+        counts = tally.setdefault(target.predictor, [0, 0])
+        counts[0] += 1
+        counts[1] += target.outcome == 'correct'
+
+    accuracy = {row.user_id: row for row in PredictorAccuracy.query.filter(PredictorAccuracy.user_id.in_(tally)).all()}
+    for predictor, (resolved, correct) in tally.items():
+        row = accuracy.get(predictor)
+        if row is None:
+            row = PredictorAccuracy(user_id=predictor, resolved=0, correct=0)
+            db.session.add(row)
+        row.resolved += resolved
+        row.correct += correct
+    L.log(f"Resolved {len(due)} predictions against {len(ranks)} closed periods")
+    return len(due)
+
+
+_rank_index_month = {}  # month the 'monthly' rank index was built for
+
+
+def _load_rank_index(board: str) -> dict:
+    if board == 'monthly':
+        _rank_index_month['monthly'] = current_month()
+    return {row["user"]: row["points"] for row in _aggregate_board(board, with_details=False, sort=False)}
+
+
+def _rank_board(board: str):
+    """Normalize a board for the rank index, rolling the monthly index over when the month changes"""
+    board = _board_name(board)
+    if board == 'monthly' and _rank_index_month.get('monthly') != current_month():
+        board_ranks.invalidate(['monthly'])
+    return board
+
+
+# Rank indexes are built from the same aggregation as the full boards; team
+# membership only changes when teams are created (which invalidates the index)
+board_ranks.configure(_load_rank_index, fixed_membership=('team',))
 
 
 # ---------- ROUTES ----------
@@ -57,88 +606,9 @@ def _calculate_user_achievement_points(user_id: str) -> int:
 # Example cURL:
 # curl -X GET http://127.0.0.1:5001/leaderboards/global
 def leaderboard_global():
-    # Get all users who have achievements or manual entries
-    from classes.user import User
-    from routes.games import Participation
-    
-    # Get all users from the system
-    all_users = set()
-    
-    # Add users from manual entries
-    legacy = ManualLeaderboard.query.all()
-    entries = ManualLeaderboardEntry.query.filter_by(board='global').all()
-    for m in legacy:
-        all_users.add(m.user)
-    for e in entries:
-        all_users.add(e.user)
-    
-    # Add users from achievements
-    achievement_users = db.session.query(UserAchievement.user_id).distinct().all()
-    for (user_id,) in achievement_users:
-        all_users.add(user_id)
-    
-    # Add users from games/participations
-    game_users = db.session.query(Participation.user_id).distinct().all()
-    for (user_id,) in game_users:
-        all_users.add(user_id)
-    
-    # Calculate total points for each user
-    leaderboard_data = []
-    for user in all_users:
-        # Achievement points and get achievement details (prevent duplicates)
-        unlocked_achievements = UserAchievement.query.filter_by(user_id=user).all()
-        achievement_points = 0
-        achievement_details = []
-        seen_achievements = set()  # Track seen achievement IDs to prevent duplicates
-        for ua in unlocked_achievements:
-            achievement = Achievement.query.get(ua.achievement_id)
-            if achievement and achievement.id not in seen_achievements:
-                seen_achievements.add(achievement.id)
-                points = get_achievement_points(achievement.rarity)
-                achievement_points += points
-                achievement_details.append({
-                    "id": achievement.id,
-                    "name": achievement.name,
-                    "points": points,
-                    "rarity": achievement.rarity
-                })
-        
-        # Game points (from participations)
-        participation_points = db.session.query(db.func.coalesce(db.func.sum(Participation.progress), 0)).filter_by(user_id=user).scalar() or 0
-        
-        # Manual leaderboard points
-        manual_points = 0
-        manual_entry = ManualLeaderboardEntry.query.filter_by(user=user, board='global').first()
-        if manual_entry:
-            manual_points = manual_entry.points
-        
-        # Combined game points (participation + manual)
-        combined_game_points = int(participation_points) + manual_points
-        
-        # Calculate spent points from redemptions
-        from routes.rewards import Redemption
-        spent = db.session.query(db.func.coalesce(db.func.sum(Redemption.points), 0)).filter_by(user_id=user).scalar() or 0
-        spent_points = int(spent)
-        
-        # Total points (achievement + game - spent)
-        total_points = achievement_points + combined_game_points - spent_points
-        
-        
-        # Create a unique ID for each user entry (use user name as ID for removal)
-        user_id = f"user_{user.replace(' ', '_')}"
-        
-        leaderboard_data.append({
-            "user": user,
-            "achievements": achievement_details,
-            "points": total_points,  # Just show total points
-            "id": user_id  # Always provide an ID for removal
-        })
-    
-    # Sort by total points descending
-    leaderboard_data.sort(key=lambda x: x["points"], reverse=True)
-    
+    response = _board_response('global', "leaderboard")
     L.log("Fetched global leaderboard with achievement points")
-    return jsonify({"leaderboard": leaderboard_data}), 200
+    return response
 
 
 @leaderboards_bp.get("/team")
@@ -149,235 +619,111 @@ def leaderboard_global():
 # curl -X GET http://127.0.0.1:5001/leaderboards/team -H "Authorization: Bearer <jwt_token>"
 @jwt_required(optional=True)
 def leaderboard_team():
-    from routes.games import Participation
-    
-    # Only get users who belong to teams
-    team_users = db.session.query(UserTeam.user_id).distinct().all()
-    all_users = {user_id for (user_id,) in team_users}
-    
-    # Calculate total points for each team user
-    leaderboard_data = []
-    for user in all_users:
-        # Achievement points and get achievement details (prevent duplicates)
-        unlocked_achievements = UserAchievement.query.filter_by(user_id=user).all()
-        achievement_points = 0
-        achievement_details = []
-        seen_achievements = set()  # Track seen achievement IDs to prevent duplicates
-        for ua in unlocked_achievements:
-            achievement = Achievement.query.get(ua.achievement_id)
-            if achievement and achievement.id not in seen_achievements:
-                seen_achievements.add(achievement.id)
-                points = get_achievement_points(achievement.rarity)
-                achievement_points += points
-                achievement_details.append({
-                    "id": achievement.id,
-                    "name": achievement.name,
-                    "points": points,
-                    "rarity": achievement.rarity
-                })
-        
-        # Game points (from participations)
-        participation_points = db.session.query(db.func.coalesce(db.func.sum(Participation.progress), 0)).filter_by(user_id=user).scalar() or 0
-        
-        # Manual team points
-        manual_points = 0
-        manual_entry = ManualLeaderboardEntry.query.filter_by(user=user, board='team').first()
-        if manual_entry:
-            manual_points = manual_entry.points
-        
-        # Combined game points (participation + manual)
-        combined_game_points = int(participation_points) + manual_points
-        
-        # Calculate spent points from redemptions
-        from routes.rewards import Redemption
-        spent = db.session.query(db.func.coalesce(db.func.sum(Redemption.points), 0)).filter_by(user_id=user).scalar() or 0
-        spent_points = int(spent)
-        
-        # Total points (achievement + game - spent)
-        total_points = achievement_points + combined_game_points - spent_points
-        
-        # Get team name for this user
-        user_team = UserTeam.query.filter_by(user_id=user).first()
-        team_name = user_team.team_name if user_team else "No Team"
-        
-        # Create a unique ID for each user entry (use user name as ID for removal)
-        user_id = f"user_{user.replace(' ', '_')}"
-        
-        leaderboard_data.append({
-            "user": user,
-            "team_name": team_name,
-            "achievements": achievement_details,
-            "points": total_points,  # Just show total points
-            "id": user_id  # Always provide an ID for removal
-        })
-    
-    # Sort by total points descending
-    leaderboard_data.sort(key=lambda x: x["points"], reverse=True)
-    
+    response = _board_response('team', "leaderboard")
     L.log("Fetched team leaderboard with achievement points (team members only)")
-    return jsonify({"leaderboard": leaderboard_data}), 200
+    return response
+
+
+@leaderboards_bp.get("/teams/aggregate")
+# GET http://127.0.0.1:5001/leaderboards/teams/aggregate
+# Body: None
+# Example cURL:
+# curl -X GET http://127.0.0.1:5001/leaderboards/teams/aggregate
+def leaderboard_teams_aggregate():
+    """Team ranking: total, average and member count per team"""
+    response = cached_response('teams', lambda: (jsonify({"teams": snapshots.get('teams', _aggregate_teams)}), 200))
+    L.log("Fetched team aggregate leaderboard")
+    return response
 
 
 @leaderboards_bp.get("/monthly")
-# GET http://127.0.0.1:5001/leaderboards/monthly
+# GET http://127.0.0.1:5001/leaderboards/monthly?month=2025-09
 # Body: None
 # Example cURL:
 # curl -X GET http://127.0.0.1:5001/leaderboards/monthly
 def leaderboard_monthly():
-    from routes.games import Participation
-    
-    # Get all users who have monthly entries or achievements
-    all_users = set()
-    
-    # Add users from monthly entries
-    entries = ManualLeaderboardEntry.query.filter_by(board='monthly').all()
-    for e in entries:
-        all_users.add(e.user)
-    
-    # Add users from achievements
-    achievement_users = db.session.query(UserAchievement.user_id).distinct().all()
-    for (user_id,) in achievement_users:
-        all_users.add(user_id)
-    
-    # Add users from games/participations
-    game_users = db.session.query(Participation.user_id).distinct().all()
-    for (user_id,) in game_users:
-        all_users.add(user_id)
-    
-    # Calculate total points for each user
-    leaderboard_data = []
-    for user in all_users:
-        # Achievement points and get achievement details (prevent duplicates)
-        unlocked_achievements = UserAchievement.query.filter_by(user_id=user).all()
-        achievement_points = 0
-        achievement_details = []
-        seen_achievements = set()  # Track seen achievement IDs to prevent duplicates
-        for ua in unlocked_achievements:
-            achievement = Achievement.query.get(ua.achievement_id)
-            if achievement and achievement.id not in seen_achievements:
-                seen_achievements.add(achievement.id)
-                points = get_achievement_points(achievement.rarity)
-                achievement_points += points
-                achievement_details.append({
-                    "id": achievement.id,
-                    "name": achievement.name,
-                    "points": points,
-                    "rarity": achievement.rarity
-                })
-        
-        # Game points (from participations)
-        participation_points = db.session.query(db.func.coalesce(db.func.sum(Participation.progress), 0)).filter_by(user_id=user).scalar() or 0
-        
-        # Manual monthly points
-        manual_points = 0
-        manual_entry = ManualLeaderboardEntry.query.filter_by(user=user, board='monthly').first()
-        if manual_entry:
-            manual_points = manual_entry.points
-        
-        # Combined game points (participation + manual)
-        combined_game_points = int(participation_points) + manual_points
-        
-        # Calculate spent points from redemptions
-        from routes.rewards import Redemption
-        spent = db.session.query(db.func.coalesce(db.func.sum(Redemption.points), 0)).filter_by(user_id=user).scalar() or 0
-        spent_points = int(spent)
-        
-        # Total points (achievement + game - spent)
-        total_points = achievement_points + combined_game_points - spent_points
-        
-        leaderboard_data.append({
-            "user": user,
-            "achievements": achievement_details,
-            "points": total_points,  # Just show total points
-            "id": f"user_{user.replace(' ', '_')}"  # Always provide an ID for removal
-        })
-    
-    # Sort by points descending
-    leaderboard_data.sort(key=lambda x: x["points"], reverse=True)
-    
+    month = request.args.get("month") or current_month()
+    if not MONTH_PATTERN.fullmatch(month):
+        return jsonify({"error": "month must be in YYYY-MM format"}), 400
+    response = _board_response('monthly', "leaderboard", month=month)
     L.log("Fetched monthly leaderboard with achievement points")
-    return jsonify({"leaderboard": leaderboard_data}), 200
+    return response
 
 
 @leaderboards_bp.get("/hall-of-fame")
-# GET http://127.0.0.1:5001/leaderboards/hall-of-fame
+# GET http://127.0.0.1:5001/leaderboards/hall-of-fame?period=2025-09
 # Body: None
 # Example cURL:
 # curl -X GET http://127.0.0.1:5001/leaderboards/hall-of-fame
 def leaderboard_hall_of_fame():
-    from routes.games import Participation
-    
-    # Get all users who have hall of fame entries or achievements
-    all_users = set()
-    
-    # Add users from hall of fame entries
-    entries = ManualLeaderboardEntry.query.filter_by(board='hall_of_fame').all()
-    for e in entries:
-        all_users.add(e.user)
-    
-    # Add users from achievements
-    achievement_users = db.session.query(UserAchievement.user_id).distinct().all()
-    for (user_id,) in achievement_users:
-        all_users.add(user_id)
-    
-    # Add users from games/participations
-    game_users = db.session.query(Participation.user_id).distinct().all()
-    for (user_id,) in game_users:
-        all_users.add(user_id)
-    
-    # Calculate total points for each user
-    leaderboard_data = []
-    for user in all_users:
-        # Achievement points and get achievement details (prevent duplicates)
-        unlocked_achievements = UserAchievement.query.filter_by(user_id=user).all()
-        achievement_points = 0
-        achievement_details = []
-        seen_achievements = set()  # Track seen achievement IDs to prevent duplicates
-        for ua in unlocked_achievements:
-            achievement = Achievement.query.get(ua.achievement_id)
-            if achievement and achievement.id not in seen_achievements:
-                seen_achievements.add(achievement.id)
-                points = get_achievement_points(achievement.rarity)
-                achievement_points += points
-                achievement_details.append({
-                    "id": achievement.id,
-                    "name": achievement.name,
-                    "points": points,
-                    "rarity": achievement.rarity
-                })
-        
-        # Game points (from participations)
-        participation_points = db.session.query(db.func.coalesce(db.func.sum(Participation.progress), 0)).filter_by(user_id=user).scalar() or 0
-        
-        # Manual hall of fame points
-        manual_points = 0
-        manual_entry = ManualLeaderboardEntry.query.filter_by(user=user, board='hall_of_fame').first()
-        if manual_entry:
-            manual_points = manual_entry.points
-        
-        # Combined game points (participation + manual)
-        combined_game_points = int(participation_points) + manual_points
-        
-        # Calculate spent points from redemptions
-        from routes.rewards import Redemption
-        spent = db.session.query(db.func.coalesce(db.func.sum(Redemption.points), 0)).filter_by(user_id=user).scalar() or 0
-        spent_points = int(spent)
-        
-        # Total points (achievement + game - spent)
-        total_points = achievement_points + combined_game_points - spent_points
-        
-        leaderboard_data.append({
-            "user": user,
-            "achievements": achievement_details,
-            "points": total_points,  # Just show total points
-            "id": f"user_{user.replace(' ', '_')}"  # Always provide an ID for removal
-        })
-    
-    # Sort by points descending
-    leaderboard_data.sort(key=lambda x: x["points"], reverse=True)
-    
-    L.log("Fetched hall of fame with achievement points")
-    return jsonify({"hall_of_fame": leaderboard_data}), 200
+    """Top players of each closed month, read from the hall-of-fame archive (newest period first)"""
+    period = request.args.get("period")
+    if period and not MONTH_PATTERN.fullmatch(period):
+        return jsonify({"error": "period must be in YYYY-MM format"}), 400
+    _schedule_hall_of_fame_archive()
+    response = cached_response(
+        f"hall_of_fame-{period}" if period else "hall_of_fame",
+        lambda: (jsonify({"hall_of_fame": snapshots.get(
+            ('hall_of_fame', period), lambda: _hall_of_fame_rows(period), tables=('hall_of_fame_archive',)
+        )}), 200),
+        tables=('hall_of_fame_archive',)
+    )
+    L.log("Fetched hall of fame archive")
+    return response
+
+
+@leaderboards_bp.get("/<board>/rank/<user>")
+# GET http://127.0.0.1:5001/leaderboards/global/rank/alice
+# Body: None
+# Example cURL:
+# curl -X GET http://127.0.0.1:5001/leaderboards/global/rank/alice
+def leaderboard_rank(board, user):
+    """Rank of one user on a board, answered from the in-memory rank index"""
+    board_key = _rank_board(board)
+    if not board_key:
+        return jsonify({"error": "board must be one of global|team|monthly|hall_of_fame"}), 400
+    if board_key == 'hall_of_fame':
+        found, error = _hall_of_fame_position(user)
+        if error:
+            return error
+        period, row, _, total = found
+        return jsonify({"board": board_key, "period": period, "user": user, "rank": row["rank"],
+                        "points": row["points"], "total": total}), 200
+
+    rank, points, total = board_ranks.rank(board_key, user)
+    if rank is None:
+        return jsonify({"error": "user not found on this board"}), 404
+    return jsonify({"board": board_key, "user": user, "rank": rank, "points": points, "total": total}), 200
+
+
+@leaderboards_bp.get("/<board>/around/<user>")
+# GET http://127.0.0.1:5001/leaderboards/global/around/alice?radius=3
+# Body: None
+# Example cURL:
+# curl -X GET "http://127.0.0.1:5001/leaderboards/global/around/alice?radius=3"
+def leaderboard_around(board, user):
+    """Players ranked just above and below a user, answered from the in-memory rank index"""
+    board_key = _rank_board(board)
+    if not board_key:
+        return jsonify({"error": "board must be one of global|team|monthly|hall_of_fame"}), 400
+    try:
+        radius = int(request.args.get("radius", 5))
+    except ValueError:
+        return jsonify({"error": "radius must be integer"}), 400
+    radius = max(0, min(radius, 50))
+    if board_key == 'hall_of_fame':
+        found, error = _hall_of_fame_position(user, radius)
+        if error:
+            return error
+        period, _, rows, total = found
+        around = [{"rank": row["rank"], "user": row["user"], "points": row["points"]} for row in rows]
+        return jsonify({"board": board_key, "period": period, "user": user, "radius": radius,
+                        "total": total, "around": around}), 200
+
+    around, total = board_ranks.around(board_key, user, radius)
+    if not around:
+        return jsonify({"error": "user not found on this board"}), 404
+    return jsonify({"board": board_key, "user": user, "radius": radius, "total": total, "around": around}), 200
 
 
 @leaderboards_bp.post("/predictions")
@@ -387,40 +733,93 @@ def leaderboard_hall_of_fame():
 # {
 #   "prediction": "Alice will win the Code Quality Challenge"
 # }
+# Structured (resolved when the month of the date has closed):
+# {
+#   "user": "alice",
+#   "board": "global",
+#   "top": 3,
+#   "by": "2025-10-31"
+# }
 # Example cURL:
 # curl -X POST http://127.0.0.1:5001/leaderboards/predictions \
 #   -H "Content-Type: application/json" \
 #   -d '{"prediction": "Alice will win the Code Quality Challenge"}'
 def leaderboard_predictions():
     body = request.get_json(force=True)
-    prediction = body.get("prediction", "No prediction provided")
     uid = _uid_or_anon()
-    
+
+    target = None
+    if any(body.get(field) is not None for field in ("user", "top", "by")):
+        subject = body.get("user")
+        board = _board_name(body.get("board") or 'global')
+        if not subject or body.get("top") is None or not body.get("by"):
+            return jsonify({"error": "user, top and by are required for a structured prediction"}), 400
+        if board not in PREDICTION_BOARDS:
+            return jsonify({"error": "board must be one of global|team|monthly"}), 400
+        try:
+            top_n = int(body.get("top"))
+        except (TypeError, ValueError):
+            return jsonify({"error": "top must be integer"}), 400
+        if top_n < 1:
+            return jsonify({"error": "top must be at least 1"}), 400
+        try:
+            deadline = datetime.strptime(str(body.get("by")), "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify({"error": "by must be in YYYY-MM-DD format"}), 400
+        if deadline < datetime.utcnow().date():
+            return jsonify({"error": "by must not be in the past"}), 400
+        target = PredictionTarget(predictor=uid, subject=subject, board=board, top_n=top_n, deadline=deadline)
+        default_text = f"{subject} finishes top {top_n} on the {board} leaderboard by {deadline.isoformat()}"
+        prediction = body.get("prediction") or default_text
+    else:
+        prediction = body.get("prediction", "No prediction provided")
+
     # Store prediction in database
     pred_entry = Prediction(user_id=uid, prediction=prediction)
     db.session.add(pred_entry)
+    if target is not None:
+        db.session.flush()
+        target.prediction_id = pred_entry.id
+        db.session.add(target)
     db.session.commit()
     
     L.log(f"Prediction submitted by {uid}: {prediction}")
-    return jsonify({"message": "Prediction received", "prediction": prediction}), 200
+    response = {"message": "Prediction received", "prediction": prediction}
+    if target is not None:
+        response["target"] = target.serialize()
+    return jsonify(response), 200
 
 
 @leaderboards_bp.get("/predictions")
 # GET http://127.0.0.1:5001/leaderboards/predictions
 def leaderboard_predictions_view():
     predictions = Prediction.query.order_by(Prediction.created_at.desc()).limit(20).all()
+    targets = {
+        target.prediction_id: target for target in
+        PredictionTarget.query.filter(PredictionTarget.prediction_id.in_([pred.id for pred in predictions])).all()
+    }
     data = []
     for pred in predictions:
         data.append({
             "id": pred.id,
             "user": pred.user_id,
             "prediction": pred.prediction,
+            "target": targets[pred.id].serialize() if pred.id in targets else None,
             "created_at": pred.created_at.isoformat() if pred.created_at else None
         })
     L.log("Fetched predictions")
     return jsonify({"predictions": data}), 200
 
 
+@leaderboards_bp.get("/predictions/accuracy")
+# GET http://127.0.0.1:5001/leaderboards/predictions/accuracy
+def leaderboard_predictions_accuracy():
+    """Predictors ranked by the share of their resolved predictions that came true"""
+    rows = [row.serialize() for row in PredictorAccuracy.query.filter(PredictorAccuracy.resolved > 0).all()]
+    rows.sort(key=lambda row: (-row["accuracy"], -row["resolved"], row["user"]))
+    return jsonify({"predictors": rows}), 200
+
+
 @leaderboards_bp.delete("/predictions/remove")
 # DELETE http://127.0.0.1:5001/leaderboards/predictions/remove {"id": 1}
 @jwt_required(optional=True)
@@ -435,6 +834,7 @@ def leaderboard_predictions_remove():
     if not prediction:
         return jsonify({'error': 'prediction not found'}), 404
     
+    PredictionTarget.query.filter_by(prediction_id=prediction.id).delete()
     db.session.delete(prediction)
     db.session.commit()
     
@@ -450,8 +850,10 @@ def leaderboard_add():
     user = body.get("user")
     points = body.get("points")
     board = (body.get("board") or 'global').lower().replace('-', '_')
-    if board not in {"global", "team", "monthly", "hall_of_fame"}:
+    if board not in BOARDS:
         return jsonify({"error": "board must be one of global|team|monthly|hall_of_fame"}), 400
+    if board == 'hall_of_fame':
+        return jsonify({"error": "the hall of fame is archived from closed months and takes no manual entries"}), 400
     if not user or points is None:
         return jsonify({"error": "user and points are required"}), 400
     try:
@@ -460,7 +862,15 @@ def leaderboard_add():
         return jsonify({"error": "points must be integer"}), 400
     
     # Check if user already has an entry for this board
-    existing_entry = ManualLeaderboardEntry.query.filter_by(user=user, board=board).first()
+    existing_entry = ManualLeaderboardEntry.query.filter_by(user=user, board=board).order_by(ManualLeaderboardEntry.id.asc()).first()
+    if board == 'global':
+        # Global manual points are part of the materialized balance
+        adjust_user_points(user, manual=points - (existing_entry.points if existing_entry else 0), reference="manual:global")
+    elif board == 'monthly':
+        # Monthly manual points belong to the current month's rollup
+        set_monthly_manual_points(user, points)
+    else:
+        board_ranks.record(user, points - (existing_entry.points if existing_entry else 0), boards=(board,))
     if existing_entry:
         # Update existing entry
         existing_entry.points = points
@@ -471,7 +881,12 @@ def leaderboard_add():
         # Create new entry
         row = ManualLeaderboardEntry(user=user, points=points, board=board)
         db.session.add(row)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Created concurrently since the lookup above
+            db.session.rollback()
+            return jsonify({"error": "entry was created concurrently, retry"}), 409
         L.log(f"Manual leaderboard add: [{board}] {user} -> {points}")
         return jsonify({"message": "added", "board": board, "user": user, "points": points}), 201
 
@@ -486,39 +901,54 @@ def leaderboard_remove():
         return jsonify({"error": "id is required"}), 400
     
     # Handle user removal (format: "user_username")
-    if entry_id.startswith("user_"):
-        username = entry_id.replace("user_", "").replace("_", " ")
-        
-        # Remove all manual leaderboard entries for this user
-        ManualLeaderboardEntry.query.filter_by(user=username).delete()
-        
-        # Remove all user achievements for this user
-        UserAchievement.query.filter_by(user_id=username).delete()
-        
-        # Remove all game participations for this user
-        from routes.games import Participation
-        Participation.query.filter_by(user_id=username).delete()
-        
-        # Remove user from teams
-        UserTeam.query.filter_by(user_id=username).delete()
-        
-        db.session.commit()
-        L.log(f"Removed all data for user: {username}")
-        return jsonify({"message": "user removed", "user": username}), 200
+    if isinstance(entry_id, str) and entry_id.startswith("user_"):
+        # Ids are "user_" + name with spaces turned into underscores
+        username = entry_id[len("user_"):].replace("_", " ")
+
+        # Every row of the user, across all tables, is deleted by a background job
+        job = start_user_purge(username)
+        L.log(f"Queued removal of all data for user: {username} (job {job.id})")
+        return jsonify({
+            "message": "user removal queued",
+            "user": username,
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/leaderboards/remove/status/{job.id}"
+        }), 202
     
     # Handle legacy manual entry removal (integer ID)
     try:
         entry_id = int(entry_id)
-        entry = ManualLeaderboardEntry.query.get(entry_id)
-        if not entry:
-            return jsonify({"error": "entry not found"}), 404
-        
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid id format"}), 400
+    entry = ManualLeaderboardEntry.query.get(entry_id)
+    if not entry:
+        return jsonify({"error": "entry not found"}), 404
+
+    try:
         db.session.delete(entry)
+        if entry.board == 'global':
+            db.session.flush()
+            refresh_user_points([entry.user])
+        elif entry.board == 'monthly':
+            set_monthly_manual_points(entry.user, 0)
+        board_ranks.invalidate_after_commit([entry.board])
         db.session.commit()
-        L.log(f"Manual leaderboard remove: [{entry.board}] {entry.user} -> {entry.points}")
-        return jsonify({"message": "removed", "board": entry.board, "user": entry.user, "points": entry.points}), 200
-    except Exception:
-        return jsonify({"error": "invalid id format"}), 400
+    except Exception as e:
+        L.log(f"Error removing manual leaderboard entry {entry_id}: {str(e)}")
+        db.session.rollback()
+        raise
+    L.log(f"Manual leaderboard remove: [{entry.board}] {entry.user} -> {entry.points}")
+    return jsonify({"message": "removed", "board": entry.board, "user": entry.user, "points": entry.points}), 200
+
+
+@leaderboards_bp.get("/remove/status/<job_id>")
+# GET http://127.0.0.1:5001/leaderboards/remove/status/<job_id>
+def leaderboard_remove_status(job_id):
+    job = db.session.get(UserPurgeJob, job_id)
+    if not job:
+        return jsonify({"error": "job not found"}), 404
+    return jsonify(job.serialize()), 200
 
 
 
@@ -530,3 +960,41 @@ class Prediction(db.Model):
     user_id = db.Column(db.String(120), nullable=False)
     prediction = db.Column(db.String(500), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class PredictionTarget(db.Model):
+    __tablename__ = 'leaderboard_prediction_targets'  # "subject finishes top top_n on board by deadline"
+    id = db.Column(db.Integer, primary_key=True)
+    prediction_id = db.Column(db.Integer, db.ForeignKey('leaderboard_predictions.id'), nullable=False, unique=True)
+    predictor = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(120), nullable=False)
+    board = db.Column(db.String(50), nullable=False)  # global|team|monthly
+    top_n = db.Column(db.Integer, nullable=False)
+    deadline = db.Column(db.Date, nullable=False)
+    outcome = db.Column(db.String(20), nullable=False, default='pending', index=True)  # pending|correct|wrong
+    resolved_rank = db.Column(db.Integer, nullable=True)  # subject's rank when resolved (None if not on the board)
+    resolved_at = db.Column(db.DateTime, nullable=True)
+
+    def serialize(self):
+        return {
+            "user": self.subject,
+            "board": self.board,
+            "top": self.top_n,
+            "by": self.deadline.isoformat(),
+            "outcome": self.outcome,
+            "resolved_rank": self.resolved_rank,
+            "resolved_at": self.resolved_at.isoformat() if self.resolved_at else None
+        }
+
+class PredictorAccuracy(db.Model):
+    __tablename__ = 'leaderboard_predictor_accuracy'  # resolved prediction counts per predictor
+    user_id = db.Column(db.String(120), primary_key=True)
+    resolved = db.Column(db.Integer, nullable=False, default=0)
+    correct = db.Column(db.Integer, nullable=False, default=0)
+
+    def serialize(self):
+        return {
+            "user": self.user_id,
+            "resolved": self.resolved,
+            "correct": self.correct,
+            "accuracy": round(self.correct / self.resolved, 3) if self.resolved else None
+        }
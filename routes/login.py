@@ -1,9 +1,11 @@
 from flask import Blueprint, request, jsonify
 from utils.utils import users, L
+from sqlalchemy.exc import IntegrityError
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, jwt_required, JWTManager, get_jwt_identity
 from classes.user import User
 from utils.db import db
+from utils.user_directory import user_directory
 
 login_bp = Blueprint('login_bp', __name__)
 
@@ -22,8 +24,7 @@ def register_user():
         return jsonify({"msg": "Username and password are required"}), 400
 
     # בדיקה אם המשתמש כבר קיים
-    existing_user = User.query.filter_by(username=username).first()
-    if existing_user:
+    if user_directory.is_registered(username):
         return jsonify({"msg": "Username already exists"}), 409
 
     # יצירת אובייקט משתמש חדש והוספתו ל-session של בסיס הנתונים
@@ -31,7 +32,12 @@ def register_user():
     db.session.add(new_user)
     
     # ביצוע commit כדי לשמור את השינויים באופן קבוע
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Registered concurrently (or by another process) since the directory check
+        db.session.rollback()
+        return jsonify({"msg": "Username already exists"}), 409
 
     return jsonify({"msg": "User created successfully!", "username": new_user.username}), 201
 
@@ -16,21 +16,43 @@ Key Features:
 - Points are capped at minimum 0 (no negative balances)
 
 Point Sources:
-- Achievement points (based on rarity: common=10, rare=20, epic=40, legendary=80)
+- Achievement points (based on rarity, configurable; defaults common=10, rare=20, epic=40, legendary=80)
 - Game progress points (from Participation.progress)
 - Manual points (from donations via ManualLeaderboardEntry)
 - Spent points (from redemptions via Redemption table)
+
+The reward catalog is served from a snapshot sorted by cost, rebuilt only after
+a reward is added or removed, which also lets /rewards/affordable bisect the
+cost array against the caller's balance.
+
+Rewards can optionally have limited stock (RewardInventory). Redemptions take
+stock with a conditional UPDATE that cannot oversell, and requests for a
+reward the cached catalog shows as sold out are rejected before any SQL runs.
+
+Balances are read from the materialized UserPoints table (classes/user_points.py),
+which every point-changing write path keeps up to date. Redemptions and
+donations take points with spend_user_points(), which checks and updates the
+balance in one conditional UPDATE, so parallel requests cannot overspend.
+Recipients are checked against the in-process user directory
+(utils/user_directory.py) without any SQL.
 """
 
+import bisect
+
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import case, insert
+from sqlalchemy.exc import IntegrityError
 from utils.db import db
+from utils.utils import L, chunked
+from utils.snapshot_cache import snapshots, cached_response
+from utils.user_directory import user_directory
 from datetime import datetime
 
 # Import models and utilities
-from routes.achievements import UserAchievement, Achievement
-from utils.utils import get_achievement_points
 from routes.games import Participation
+from classes.user_points import get_user_points, spend_user_points, receive_user_points, award_user_points
+from classes.achievement_rules import evaluate_rules, rewards_redeemed
 
 # Create Flask blueprint for rewards routes
 rewards_bp = Blueprint('rewards_bp', __name__)
@@ -84,34 +106,132 @@ class Redemption(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+class RewardInventory(db.Model):
+    """
+    Remaining stock of a limited reward (rewards without a row are unlimited).
+
+    Attributes:
+        reward_id (int): Primary key, foreign key to Reward
+        stock (int): Units left to redeem
+        updated_at (datetime): Last time the stock changed
+    """
+    __tablename__ = 'rewards_inventory'
+
+    reward_id = db.Column(db.Integer, db.ForeignKey('rewards_rewards.id'), primary_key=True)
+    stock = db.Column(db.Integer, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 # =============================================================================
-# UTILITY FUNCTIONS
+# HELPERS
 # =============================================================================
 
-def _calculate_user_achievement_points(user_id: str) -> int:
+MAX_BULK_AWARDS = 5000  # rows accepted by one /rewards/bulk-award call
+MAX_CART_ITEMS = 100  # items accepted by one /rewards/redeem/batch call
+MAX_QUANTITY = 100  # units of one reward per cart item
+
+
+CATALOG_TABLES = ('rewards_rewards', 'rewards_inventory')
+
+
+def _load_reward_catalog() -> dict:
+    """Rewards sorted by cost, with the parallel cost array used for bisecting and the stock of limited rewards"""
+    rows = (
+        db.session.query(Reward, RewardInventory.stock)
+        .outerjoin(RewardInventory, RewardInventory.reward_id == Reward.id)
+        .order_by(Reward.points.asc(), Reward.id.asc())
+        .all()
+    )
+    rewards = [{**reward.serialize(), "stock": stock} for reward, stock in rows]
+    return {
+        "rewards": rewards,
+        "costs": [reward["points"] for reward in rewards],
+        "stock": {reward["id"]: reward["stock"] for reward in rewards if reward["stock"] is not None},
+    }
+
+
+def _reward_catalog() -> dict:
+    """Sorted reward catalog, recomputed only after a write to the rewards or inventory tables"""
+    return snapshots.get('reward_catalog', _load_reward_catalog, tables=CATALOG_TABLES)
+
+
+def _sold_out(quantities: dict) -> list:
     """
-    Calculate total achievement points for a user based on rarity.
-    
-    This function sums up all achievement points earned by a user,
-    where points are determined by achievement rarity:
-    - Common: 10 points
-    - Rare: 20 points  
-    - Epic: 40 points
-    - Legendary: 80 points
-    
-    Args:
-        user_id (str): User identifier (username or 'anonymous')
-        
-    Returns:
-        int: Total achievement points earned by the user
+    Limited rewards whose stock cannot cover the wanted quantity, from the cached catalog (no SQL).
+
+    Only a fast reject: a stale catalog can at worst let a request through
+    to _take_stock, which decides in SQL.
+    """
+    stock = _reward_catalog()["stock"]
+    return [reward_id for reward_id, quantity in quantities.items() if reward_id in stock and stock[reward_id] < quantity]
+
+
+def _take_stock(quantities: dict) -> list:
+    """
+    Take stock of limited rewards, one conditional UPDATE per reward.
+
+    The UPDATE only matches while enough stock is left, so concurrent
+    redemptions cannot oversell. It runs for every reward: whether a reward
+    is limited is decided in SQL (a reward whose UPDATE matched nothing is
+    sold out if it has an inventory row, unlimited otherwise), never from
+    the cached catalog, which may predate a stock change made by another
+    worker. Returns the rewards that ran out; the caller must then roll back.
+    """
+    unmatched = []
+    for reward_id, quantity in quantities.items():
+        taken = (
+            RewardInventory.query
+            .filter(RewardInventory.reward_id == reward_id, RewardInventory.stock >= quantity)
+            .update({RewardInventory.stock: RewardInventory.stock - quantity}, synchronize_session=False)
+        )
+        if not taken:
+            unmatched.append(reward_id)
+    if not unmatched:
+        return []
+    return [
+        reward_id for (reward_id,) in
+        db.session.query(RewardInventory.reward_id).filter(RewardInventory.reward_id.in_(unmatched)).all()
+    ]
+
+
+def _known_users(names) -> set:
+    """Names among `names` that are registered users or already have data in the system (in-memory lookup)"""
+    return user_directory.known(set(names))
+
+
+def _credit_manual_entries(awards: dict) -> None:
     """
-    unlocked = UserAchievement.query.filter_by(user_id=user_id).all()
-    total_points = 0
-    for ua in unlocked:
-        achievement = Achievement.query.get(ua.achievement_id)
-        if achievement:
-            total_points += get_achievement_points(achievement.rarity)
-    return total_points
+    Add points to each user's first 'global' manual entry, creating missing entries (bulk upsert).
+
+    Only the lowest-id entry is credited, as it is the one the balance
+    rebuild and the ledger backfill count. A missing entry created meanwhile
+    by a parallel request (unique user/board) is credited instead.
+    """
+    from routes.leaderboards import ManualLeaderboardEntry
+
+    for chunk in chunked(awards):
+        first_entries = dict(
+            db.session.query(ManualLeaderboardEntry.user, db.func.min(ManualLeaderboardEntry.id))
+            .filter(ManualLeaderboardEntry.board == 'global', ManualLeaderboardEntry.user.in_(chunk))
+            .group_by(ManualLeaderboardEntry.user)
+            .all()
+        )
+        if first_entries:
+            ManualLeaderboardEntry.query.filter(ManualLeaderboardEntry.id.in_(first_entries.values())).update(
+                {ManualLeaderboardEntry.points: ManualLeaderboardEntry.points + case(
+                    {entry_id: awards[user] for user, entry_id in first_entries.items()},
+                    value=ManualLeaderboardEntry.id, else_=0
+                )},
+                synchronize_session=False
+            )
+        new_entries = [{"user": user, "board": 'global', "points": awards[user]} for user in chunk if user not in first_entries]
+        if new_entries:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(ManualLeaderboardEntry), new_entries)
+            except IntegrityError:
+                _credit_manual_entries({entry["user"]: entry["points"] for entry in new_entries})  # created meanwhile
+
 
 # -------------------------------
 # Rewards-related Routes
@@ -119,9 +239,28 @@ def _calculate_user_achievement_points(user_id: str) -> int:
 @rewards_bp.get("/available")
 # GET http://127.0.0.1:5001/rewards/available
 def rewards_available():
-    """List available rewards (manual only)."""
-    rewards = Reward.query.order_by(Reward.points.asc()).all()
-    return jsonify({"status": "success", "rewards": [r.serialize() for r in rewards]}), 200
+    """List available rewards (manual only), from the cached catalog with an ETag."""
+    return cached_response(
+        'rewards',
+        lambda: (jsonify({"status": "success", "rewards": _reward_catalog()["rewards"]}), 200),
+        tables=CATALOG_TABLES
+    )
+
+
+@rewards_bp.get("/affordable")
+# GET http://127.0.0.1:5001/rewards/affordable
+@jwt_required(optional=True)
+def rewards_affordable():
+    """Rewards the caller can afford now: a bisect of the cached cost array by the caller's balance."""
+    user = (get_jwt_identity() or 'anonymous')
+    available = get_user_points(user).available_points
+    db.session.commit()  # persist the balance row if it was built on first use
+    catalog = _reward_catalog()
+    affordable = [
+        reward for reward in catalog["rewards"][:bisect.bisect_right(catalog["costs"], available)]
+        if reward["stock"] != 0
+    ]
+    return jsonify({"status": "success", "available_points": available, "rewards": affordable}), 200
 
 
 @rewards_bp.route("/redeem", methods=["POST"])
@@ -139,35 +278,121 @@ def rewards_redeem():
         except Exception:
             return jsonify({"status": "error", "message": "reward_id must be integer"}), 400
 
+        # sold-out fast path: answered from the cached catalog without touching the database
+        if _sold_out({reward_id: 1}):
+            return jsonify({"status": "error", "message": "reward sold out"}), 400
+
         r = Reward.query.get(reward_id)
         if not r:
             return jsonify({"status": "error", "message": "reward not found"}), 404
 
         user = (get_jwt_identity() or 'anonymous')
+
+        # take one unit of a limited reward; the conditional update cannot oversell
+        if _take_stock({r.id: 1}):
+            db.session.rollback()
+            return jsonify({"status": "error", "message": "reward sold out"}), 400
         
-        # compute available points (same logic as homepage)
-        ach_points = _calculate_user_achievement_points(user)
-        game_points = db.session.query(db.func.coalesce(db.func.sum(Participation.progress), 0)).filter_by(user_id=user).scalar() or 0
-        spent = db.session.query(db.func.coalesce(db.func.sum(Redemption.points), 0)).filter_by(user_id=user).scalar() or 0
-        
-        # Include manual points from leaderboard donations
-        from routes.leaderboards import ManualLeaderboardEntry
-        manual_entry = ManualLeaderboardEntry.query.filter_by(user=user, board='global').first()
-        manual_points = manual_entry.points if manual_entry else 0
-        
-        available = max(0, int(ach_points) + int(game_points) + int(manual_points) - int(spent))
-        
-        if available < r.points:
+        # check and take the points in one conditional update of the materialized balance
+        balance = spend_user_points(user, spent=r.points, reference=f"reward:{r.id}")
+        if balance is None:
+            db.session.rollback()
+            available = get_user_points(user).available_points
             return jsonify({"status": "error", "message": "insufficient points", "available_points": int(available)}), 400
 
-        # record redemption
+        # record redemption in the same transaction as its spent points
         red = Redemption(user_id=user, reward_id=r.id, points=r.points)
         db.session.add(red)
+        unlocked = evaluate_rules(user, 'rewards_redeemed', lambda: rewards_redeemed(user))
         db.session.commit()
 
-        return jsonify({"status": "success", "reward": r.serialize(), "redeemed_by": user, "remaining_points": available - r.points}), 200
+        return jsonify({"status": "success", "reward": r.serialize(), "redeemed_by": user, "remaining_points": balance.available_points,
+                        "achievements_unlocked": [entry.name for entry in unlocked]}), 200
     
     except Exception as e:
+        db.session.rollback()
+        return jsonify({"status": "error", "message": f"Internal server error: {str(e)}"}), 500
+
+
+@rewards_bp.route("/redeem/batch", methods=["POST"])
+# POST http://127.0.0.1:5001/rewards/redeem/batch
+# Body: { "items": [{ "reward_id": 1, "quantity": 2 }, { "reward_id": 3 }] }
+@jwt_required(optional=True)
+def rewards_redeem_batch():
+    """Redeem a cart of rewards in one transaction: either every item is redeemed or none is."""
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get("items")
+        if not isinstance(items, list) or not items:
+            return jsonify({"status": "error", "message": "items must be a non-empty list"}), 400
+        if len(items) > MAX_CART_ITEMS:
+            return jsonify({"status": "error", "message": f"at most {MAX_CART_ITEMS} items per cart"}), 400
+
+        errors = []
+        cart = []  # (index, reward_id, quantity)
+        for index, item in enumerate(items):
+            item = item if isinstance(item, dict) else {}
+            try:
+                reward_id = int(item.get("reward_id"))
+                quantity = int(item.get("quantity", 1))
+            except (TypeError, ValueError):
+                errors.append({"index": index, "message": "reward_id and quantity must be integers"})
+                continue
+            if not 1 <= quantity <= MAX_QUANTITY:
+                errors.append({"index": index, "message": f"quantity must be between 1 and {MAX_QUANTITY}"})
+                continue
+            cart.append((index, reward_id, quantity))
+
+        # One query for every reward in the cart
+        rewards = {r.id: r for r in Reward.query.filter(Reward.id.in_({reward_id for _, reward_id, _ in cart})).all()}
+        errors += [{"index": index, "message": "reward not found"} for index, reward_id, _ in cart if reward_id not in rewards]
+        if errors:
+            errors.sort(key=lambda error: error["index"])
+            return jsonify({"status": "error", "message": "invalid cart, nothing was redeemed", "errors": errors}), 400
+
+        quantities = {}
+        for _, reward_id, quantity in cart:
+            quantities[reward_id] = quantities.get(reward_id, 0) + quantity
+        total_cost = sum(rewards[reward_id].points * quantity for reward_id, quantity in quantities.items())
+        sold_out = _sold_out(quantities)
+        if sold_out:
+            return jsonify({"status": "error", "message": "reward sold out", "sold_out": sold_out}), 400
+
+        user = (get_jwt_identity() or 'anonymous')
+
+        # take the stock of limited rewards first; any shortage cancels the whole cart
+        sold_out = _take_stock(quantities)
+        if sold_out:
+            db.session.rollback()
+            return jsonify({"status": "error", "message": "reward sold out", "sold_out": sold_out}), 400
+
+        # check and take the whole cart's cost in one conditional update of the materialized balance
+        balance = spend_user_points(user, spent=total_cost, reference="reward-cart")
+        if balance is None:
+            db.session.rollback()
+            available = get_user_points(user).available_points
+            return jsonify({"status": "error", "message": "insufficient points", "total_cost": total_cost,
+                            "available_points": int(available)}), 400
+
+        # record every redemption in the same transaction as the spent points
+        db.session.execute(insert(Redemption), [
+            {"user_id": user, "reward_id": reward_id, "points": rewards[reward_id].points}
+            for reward_id, quantity in quantities.items() for _ in range(quantity)
+        ])
+        unlocked = evaluate_rules(user, 'rewards_redeemed', lambda: rewards_redeemed(user))
+        db.session.commit()
+
+        return jsonify({
+            "status": "success",
+            "redeemed_by": user,
+            "items": [{"reward": rewards[reward_id].serialize(), "quantity": quantity} for reward_id, quantity in quantities.items()],
+            "total_cost": total_cost,
+            "remaining_points": balance.available_points,
+            "achievements_unlocked": [entry.name for entry in unlocked]
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
         return jsonify({"status": "error", "message": f"Internal server error: {str(e)}"}), 500
 
 
@@ -175,22 +400,44 @@ def rewards_redeem():
 # GET http://127.0.0.1:5001/rewards/my-points
 @jwt_required(optional=True)
 def rewards_my_points():
-    """Return computed points: achievements + game progress - redemptions."""
+    """Return points from the materialized balance: achievements + game progress + manual - redemptions."""
     user = (get_jwt_identity() or 'anonymous')
-    ach_points = _calculate_user_achievement_points(user)
-    game_points = db.session.query(db.func.coalesce(db.func.sum(Participation.progress), 0)).filter_by(user_id=user).scalar() or 0
-    spent = db.session.query(db.func.coalesce(db.func.sum(Redemption.points), 0)).filter_by(user_id=user).scalar() or 0
-    # Include manual points from leaderboard donations
-    from routes.leaderboards import ManualLeaderboardEntry
-    manual_entry = ManualLeaderboardEntry.query.filter_by(user=user, board='global').first()
-    manual_points = manual_entry.points if manual_entry else 0
-    total = int(ach_points) + int(game_points) + int(manual_points)
-    available = max(0, total - int(spent))
+    balance = get_user_points(user)
+    db.session.commit()  # persist the row if it was built on first use
     return jsonify({
-        "achievement_points": int(ach_points),
-        "game_points": int(game_points),
-        "spent_points": int(spent),
-        "available_points": int(available)
+        "achievement_points": balance.achievement_points,
+        "game_points": balance.game_points,
+        "spent_points": balance.spent_points,
+        "available_points": balance.available_points
+    }), 200
+
+
+@rewards_bp.get("/ledger")
+# GET http://127.0.0.1:5001/rewards/ledger?limit=50
+@jwt_required(optional=True)
+def rewards_ledger():
+    """Latest points ledger entries of the user and the balance from the ledger (last checkpoint + tail)."""
+    from classes.points_ledger import PointsLedgerEntry, ledger_balance
+    user = (get_jwt_identity() or 'anonymous')
+    try:
+        limit = max(1, min(int(request.args.get("limit", 50)), 500))
+    except ValueError:
+        return jsonify({"status": "error", "message": "limit must be integer"}), 400
+
+    entries = (
+        PointsLedgerEntry.query
+        .filter_by(account=user)
+        .order_by(PointsLedgerEntry.id.desc())
+        .limit(limit)
+        .all()
+    )
+    balance = ledger_balance([user])[user]
+    available = max(0, balance["achievement_points"] + balance["game_points"] + balance["manual_points"] - balance["spent_points"])
+    return jsonify({
+        "status": "success",
+        "user": user,
+        "balance": {**balance, "available_points": available},
+        "entries": [entry.serialize() for entry in entries]
     }), 200
 
 
@@ -210,53 +457,28 @@ def rewards_donate_points():
             amount = int(amount)
         except Exception:
             return jsonify({"status": "error", "message": "amount must be integer"}), 400
+        if amount < 1:
+            return jsonify({"status": "error", "message": "amount must be positive"}), 400
 
         donor = (get_jwt_identity() or 'anonymous')
         
-        # Check if recipient exists in the system
-        from classes.user import User
-        from routes.leaderboards import ManualLeaderboardEntry
-        from routes.games import Participation, UserCompetition
-        from routes.achievements import UserAchievement
-        
-        # Check if recipient is a registered user
-        recipient_user = User.query.filter_by(username=recipient).first()
+        # Check if recipient is a registered user or has any data in the system
+        if recipient not in _known_users([recipient]):
+            return jsonify({"status": "error", "message": "recipient user not found"}), 404
         
-        # If not registered, check if they have any data in the system
-        if not recipient_user:
-            has_manual_points = ManualLeaderboardEntry.query.filter_by(user=recipient).first()
-            has_participations = Participation.query.filter_by(user_id=recipient).first()
-            has_competitions = UserCompetition.query.filter_by(user_id=recipient).first()
-            has_achievements = UserAchievement.query.filter_by(user_id=recipient).first()
-            
-            if not any([has_manual_points, has_participations, has_competitions, has_achievements]):
-                return jsonify({"status": "error", "message": "recipient user not found"}), 404
-        
-        # Check available points for donor
-        ach_points = _calculate_user_achievement_points(donor)
-        game_points = db.session.query(db.func.coalesce(db.func.sum(Participation.progress), 0)).filter_by(user_id=donor).scalar() or 0
-        spent = db.session.query(db.func.coalesce(db.func.sum(Redemption.points), 0)).filter_by(user_id=donor).scalar() or 0
-        manual_entry = ManualLeaderboardEntry.query.filter_by(user=donor, board='global').first()
-        manual_points = manual_entry.points if manual_entry else 0
-        available = max(0, int(ach_points) + int(game_points) + int(manual_points) - int(spent))
-        
-        if available < amount:
+        # Check and take the donor's points in one conditional update
+        balance = spend_user_points(donor, donated=amount, reference="donation")
+        if balance is None:
+            db.session.rollback()
+            available = get_user_points(donor).available_points
             return jsonify({"status": "error", "message": "insufficient points", "available_points": int(available)}), 400
 
-        # Use manual leaderboard entries for donations
-        donor_entry = ManualLeaderboardEntry.query.filter_by(user=donor, board='global').first()
-        if donor_entry:
-            donor_entry.points -= amount
-        else:
-            donor_entry = ManualLeaderboardEntry(user=donor, board='global', points=-amount)
-            db.session.add(donor_entry)
-        
-        recipient_entry = ManualLeaderboardEntry.query.filter_by(user=recipient, board='global').first()
-        if recipient_entry:
-            recipient_entry.points += amount
-        else:
-            recipient_entry = ManualLeaderboardEntry(user=recipient, board='global', points=amount)
-            db.session.add(recipient_entry)
+        # Credit the recipient, then use manual leaderboard entries for donations
+        # (incremented in SQL so parallel donations do not overwrite each other)
+        receive_user_points(recipient, manual=amount, reference="donation")
+        deltas = {donor: -amount}
+        deltas[recipient] = deltas.get(recipient, 0) + amount
+        _credit_manual_entries(deltas)
 
         db.session.commit()
 
@@ -265,42 +487,150 @@ def rewards_donate_points():
             "donated": amount,
             "recipient": recipient,
             "donated_by": donor,
-            "remaining_points": available - amount
+            "remaining_points": balance.available_points
         }), 200
     
     except Exception as e:
+        db.session.rollback()
         return jsonify({"status": "error", "message": f"Internal server error: {str(e)}"}), 500
 
 
+@rewards_bp.route("/bulk-award", methods=["POST"])
+# POST http://127.0.0.1:5001/rewards/bulk-award
+# Headers: Authorization: Bearer <jwt_token>
+# Body: { "awards": [{ "recipient": "alice", "amount": 50 }, { "recipient": "bob", "amount": 20 }] }
+@jwt_required()
+def rewards_bulk_award():
+    """Award points to many users at once; valid rows are applied in one transaction, each row gets a result."""
+    data = request.get_json(silent=True) or {}
+    awards = data.get("awards")
+    if not isinstance(awards, list) or not awards:
+        return jsonify({"status": "error", "message": "awards must be a non-empty list"}), 400
+    if len(awards) > MAX_BULK_AWARDS:
+        return jsonify({"status": "error", "message": f"at most {MAX_BULK_AWARDS} awards per request"}), 400
+
+    results = []
+    valid = []  # (result, recipient, amount)
+    for index, award in enumerate(awards):
+        award = award if isinstance(award, dict) else {}
+        recipient = award.get("recipient")
+        result = {"index": index, "recipient": recipient, "amount": award.get("amount")}
+        results.append(result)
+        try:
+            amount = int(award.get("amount"))
+        except (TypeError, ValueError):
+            result.update(status="error", message="amount must be integer")
+            continue
+        if not recipient or not isinstance(recipient, str):
+            result.update(status="error", message="recipient is required")
+        elif amount < 1:
+            result.update(status="error", message="amount must be positive")
+        else:
+            valid.append((result, recipient, amount))
+
+    known = _known_users(recipient for _, recipient, _ in valid)
+    totals = {}
+    for result, recipient, amount in valid:
+        if recipient not in known:
+            result.update(status="error", message="recipient user not found")
+            continue
+        totals[recipient] = totals.get(recipient, 0) + amount
+        result.update(status="awarded", amount=amount)
+
+    if totals:
+        # Credit the balances, then the manual entries they are computed from
+        award_user_points(totals, reference="bulk-award")
+        _credit_manual_entries(totals)
+        db.session.commit()
+
+    awarded_by = get_jwt_identity()
+    awarded = sum(1 for result in results if result["status"] == "awarded")
+    L.log(f"Bulk award by {awarded_by}: {sum(totals.values())} points to {len(totals)} users")
+    return jsonify({
+        "status": "success",
+        "awarded_by": awarded_by,
+        "awarded": awarded,
+        "failed": len(results) - awarded,
+        "recipients": len(totals),
+        "total_points": sum(totals.values()),
+        "results": results
+    }), 200
+
+
 @rewards_bp.route("/add", methods=["POST"])
 # POST http://127.0.0.1:5001/rewards/add
 # Body: { "name": "Gym Membership", "points": 400 }
+# Limited drop: { "name": "Gift Card", "points": 100, "stock": 50 }
 @jwt_required(optional=True)
 def rewards_add():
-    """Add a new reward to the available list."""
+    """Add a new reward to the available list, optionally with limited stock."""
     data = request.get_json(silent=True) or {}
     name = data.get("name")
     points = data.get("points")
+    stock = data.get("stock")
 
     if not name or points is None:
         return jsonify({"status": "error", "message": "name and points are required"}), 400
     try:
         points = int(points)
+        stock = int(stock) if stock is not None else None
     except Exception:
-        return jsonify({"status": "error", "message": "points must be integer"}), 400
+        return jsonify({"status": "error", "message": "points and stock must be integers"}), 400
+    if stock is not None and stock < 0:
+        return jsonify({"status": "error", "message": "stock must not be negative"}), 400
 
     r = Reward(name=name, points=points)
     db.session.add(r)
+    if stock is not None:
+        db.session.flush()
+        db.session.add(RewardInventory(reward_id=r.id, stock=stock))
     db.session.commit()
 
     user = get_jwt_identity()
     return jsonify({
         "status": "success",
-        "reward": r.serialize(),
+        "reward": {**r.serialize(), "stock": stock},
         "added_by": user
     }), 201
 
 
+@rewards_bp.route("/stock", methods=["POST"])
+# POST http://127.0.0.1:5001/rewards/stock
+# Body: { "id": 1, "stock": 50 }  (stock null makes the reward unlimited again)
+@jwt_required(optional=True)
+def rewards_stock():
+    """Set the remaining stock of a reward (restock a drop or limit an existing reward)."""
+    data = request.get_json(silent=True) or {}
+    reward_id = data.get("id")
+    stock = data.get("stock")
+    if not reward_id or "stock" not in data:
+        return jsonify({"status": "error", "message": "id and stock are required"}), 400
+    try:
+        reward_id = int(reward_id)
+        stock = int(stock) if stock is not None else None
+    except Exception:
+        return jsonify({"status": "error", "message": "id and stock must be integers"}), 400
+    if stock is not None and stock < 0:
+        return jsonify({"status": "error", "message": "stock must not be negative"}), 400
+
+    reward = Reward.query.get(reward_id)
+    if not reward:
+        return jsonify({"status": "error", "message": "reward not found"}), 404
+
+    inventory = db.session.get(RewardInventory, reward_id)
+    if stock is None:
+        if inventory:
+            db.session.delete(inventory)
+    elif inventory:
+        inventory.stock = stock
+    else:
+        db.session.add(RewardInventory(reward_id=reward_id, stock=stock))
+    db.session.commit()
+
+    L.log(f"Reward stock set: {reward.name} -> {'unlimited' if stock is None else stock}")
+    return jsonify({"status": "success", "reward": {**reward.serialize(), "stock": stock}}), 200
+
+
 @rewards_bp.route("/remove", methods=["DELETE"])
 # DELETE http://127.0.0.1:5001/rewards/remove
 # Body: { "id": 1 }
@@ -322,6 +652,7 @@ def rewards_remove():
     if not reward:
         return jsonify({"status": "error", "message": "reward not found"}), 404
     
+    RewardInventory.query.filter_by(reward_id=reward_id).delete()
     db.session.delete(reward)
     db.session.commit()
     
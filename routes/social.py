@@ -2,6 +2,8 @@ from flask import Blueprint, jsonify, request
 from utils.utils import L
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from utils.db import db
+from utils.rank_index import board_ranks
+from classes.celebration_feed import celebrations
 from datetime import datetime
 
 social_bp = Blueprint('social_bp', __name__)
@@ -50,6 +52,7 @@ def social_teams_create():
             member_names=", ".join(members) if members else ""
         )
         db.session.add(activity)
+        board_ranks.invalidate_after_commit(['team'])  # team board membership changed
         db.session.commit()
 
         return jsonify({
@@ -178,18 +181,8 @@ def social_activity_feed():
 
 @social_bp.get("/celebrations")  # View celebrations
 def social_celebrations():
-    try:
-        # Fetch celebrations from achievements endpoint
-        from flask import current_app
-        with current_app.test_client() as client:
-            response = client.get('/achievements/celebrations')
-            if response.status_code == 200:
-                data = response.get_json()
-                return jsonify(data), 200
-            else:
-                return jsonify({"celebrations": []}), 200
-    except Exception as e:
-        return jsonify({"celebrations": []}), 200
+    # Same feed as /achievements/celebrations, read from the in-memory ring buffer
+    return jsonify({"celebrations": celebrations.recent(20)}), 200
 
 
 @social_bp.get("/rivalries")  # יריבויות משרדיות מהנות
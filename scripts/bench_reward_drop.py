@@ -0,0 +1,119 @@
+"""
+Benchmark of a limited reward drop under concurrent redeemers.
+
+Hundreds of users with enough points redeem one limited-stock reward at
+once, against a throwaway SQLite file. Checks that exactly the stock is
+sold (no oversell, stock ends at 0) and that the stored balances equal a
+full recompute, then times redemptions of the sold-out reward, which are
+turned away before any write. Exits non-zero on any mismatch.
+
+    python scripts/bench_reward_drop.py --users 300 --stock 50 --workers 30
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix='bench-reward-drop-'), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_DB_PATH}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from main import app  # noqa: E402
+from classes.user_points import UserPoints, _compute_user_points  # noqa: E402
+from routes.rewards import Redemption, RewardInventory  # noqa: E402
+from utils.db import db  # noqa: E402
+
+REWARD_COST = 5
+
+
+def _headers(user_id):
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+
+
+def _drop(users: list, workers: int, reward_id: int, headers: dict):
+    """Every user redeems the reward once, spread over workers threads; returns (status counts, seconds)"""
+    statuses = []
+    lock = threading.Lock()
+    start = threading.Barrier(workers + 1)
+
+    def run(chunk):
+        client = app.test_client()
+        start.wait()
+        codes = [client.post('/rewards/redeem', json={'reward_id': reward_id}, headers=headers[user]).status_code
+                 for user in chunk]
+        with lock:
+            statuses.extend(codes)
+
+    threads = [threading.Thread(target=run, args=(users[index::workers],)) for index in range(workers)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return Counter(statuses), time.perf_counter() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=300, help='concurrent redeemers')
+    parser.add_argument('--stock', type=int, default=50, help='units in the drop')
+    parser.add_argument('--workers', type=int, default=30, help='parallel clients')
+    parser.add_argument('--sold-out', type=int, default=300, help='timed redemptions after the drop sold out')
+    args = parser.parse_args()
+
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+    users = [f'drop {index}' for index in range(args.users)]
+    for user in users:
+        client.post('/leaderboards/add', json={'user': user, 'points': REWARD_COST * 2, 'board': 'global'})
+    reward = client.post('/rewards/add', json={'name': 'limited drop', 'points': REWARD_COST, 'stock': args.stock}).get_json()
+    reward_id = reward['reward']['id']
+    headers = {user: _headers(user) for user in users}
+    failures = []
+
+    statuses, seconds = _drop(users, args.workers, reward_id, headers)
+    with app.app_context():
+        sold = Redemption.query.filter_by(reward_id=reward_id).count()
+        stock = db.session.get(RewardInventory, reward_id).stock
+        fresh = _compute_user_points()
+        stored = {row.user_id: row for row in UserPoints.query.all()}
+        mismatched = [user for user, values in fresh.items()
+                      if {key: getattr(stored[user], key) for key in values} != values]
+    print(f'drop: {dict(statuses)} in {seconds:.2f}s ({seconds / args.users * 1000:.2f} ms/request), '
+          f'sold={sold} stock left={stock}')
+    if statuses[200] != args.stock or sold != args.stock or stock != 0:
+        failures.append('oversold' if sold > args.stock else 'undersold')
+    if mismatched:
+        failures.append(f'balances {mismatched[:3]}')
+
+    # Sold-out redemptions: statements per request and latency
+    statements = [0]
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *_: statements.__setitem__(0, statements[0] + 1))
+    latecomer = headers[users[-1]]
+    began = time.perf_counter()
+    for _ in range(args.sold_out):
+        if client.post('/rewards/redeem', json={'reward_id': reward_id}, headers=latecomer).status_code != 400:
+            failures.append('sold-out redemption accepted')
+            break
+    seconds = time.perf_counter() - began
+    print(f'sold out: {seconds / args.sold_out * 1000:.2f} ms/request, {statements[0] / args.sold_out:.1f} statements/request')
+
+    if failures:
+        print('FAILED:', ', '.join(failures))
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
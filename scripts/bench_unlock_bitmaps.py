@@ -0,0 +1,139 @@
+"""
+Benchmark of the achievement listings served from unlock bitmaps.
+
+Seeds a throwaway SQLite file with many achievements and users (50 unlocks
+each by default), then times /achievements/available and
+/achievements/my-progress for distinct users, cold (bitmap loaded on the
+call) and warm. For comparison the previous per-request query path (whole
+achievement table and the caller's user_achievements rows loaded on every
+call) is mounted next to them and timed the same way; both must return the
+same listings. Exits non-zero on any difference.
+
+    python scripts/bench_unlock_bitmaps.py --achievements 10000 --users 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix='bench-unlock-bitmaps-'), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_DB_PATH}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify  # noqa: E402
+from flask_jwt_extended import create_access_token, jwt_required  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from main import app  # noqa: E402
+from routes.achievements import (  # noqa: E402
+    Achievement, AchievementUnlockCount, UserAchievement, _ser, _uid_or_anon, _unlocked_percent, reconcile_unlock_counts
+)
+from utils.achievement_catalog import achievement_catalog  # noqa: E402
+from utils.db import db  # noqa: E402
+from utils.user_directory import user_directory  # noqa: E402
+
+RARITIES = ('common', 'rare', 'epic', 'legendary')
+
+
+# ---------- PREVIOUS QUERY PATH ----------
+@jwt_required(optional=True)
+def _available_by_query():
+    user_id = _uid_or_anon()
+    items = Achievement.query.order_by(Achievement.name.asc()).all()
+    unlocked_ids = {ua.achievement_id for ua in UserAchievement.query.filter_by(user_id=user_id).all()}
+    counts = dict(db.session.query(AchievementUnlockCount.achievement_id, AchievementUnlockCount.unlocks).all())
+    users = user_directory.count()
+    result = []
+    for a in items:
+        achievement_data = _ser(a)
+        achievement_data['user_unlocked'] = a.id in unlocked_ids
+        achievement_data['locked'] = 'unlocked' if a.id in unlocked_ids else 'locked'
+        achievement_data['unlocks'] = counts.get(a.id, 0)
+        achievement_data['unlocked_percent'] = _unlocked_percent(counts.get(a.id, 0), users)
+        result.append(achievement_data)
+    return jsonify(result), 200
+
+
+@jwt_required(optional=True)
+def _my_progress_by_query():
+    user_id = _uid_or_anon()
+    unlocked_ids = {u.achievement_id for u in UserAchievement.query.filter_by(user_id=user_id).all()}
+    all_ach = Achievement.query.all()
+    return jsonify({
+        'user_id': user_id,
+        'total_points': sum(achievement_catalog.points(achievement_id) for achievement_id in unlocked_ids),
+        'unlocked': [_ser(a) for a in all_ach if a.id in unlocked_ids],
+        'locked': [_ser(a) for a in all_ach if a.id not in unlocked_ids]
+    }), 200
+
+
+app.add_url_rule('/bench/query/available', view_func=_available_by_query)
+app.add_url_rule('/bench/query/my-progress', view_func=_my_progress_by_query)
+
+
+def _seed(achievements: int, users: int, per_user: int):
+    rng = random.Random(1)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(Achievement), [
+            {'name': f'achievement {index:05d}', 'rarity': rng.choice(RARITIES)} for index in range(achievements)
+        ])
+        rows = [
+            {'user_id': f'user {user}', 'achievement_id': achievement_id}
+            for user in range(users) for achievement_id in rng.sample(range(1, achievements + 1), per_user)
+        ]
+        for start in range(0, len(rows), 50000):
+            db.session.execute(insert(UserAchievement), rows[start:start + 50000])
+        reconcile_unlock_counts()
+        db.session.commit()
+
+
+def _time(client, path: str, tokens: list) -> tuple:
+    """(ms per request, bodies) for one GET of path per token"""
+    bodies = []
+    began = time.perf_counter()
+    for token in tokens:
+        response = client.get(path, headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 200, (path, response.status_code)
+        bodies.append(response.get_json())
+    return (time.perf_counter() - began) / len(tokens) * 1000, bodies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--achievements', type=int, default=10000, help='achievements in the catalog')
+    parser.add_argument('--users', type=int, default=10000, help='users with unlocks')
+    parser.add_argument('--per-user', type=int, default=50, help='unlocks per user')
+    parser.add_argument('--sample', type=int, default=100, help='distinct users timed per endpoint')
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    _seed(args.achievements, args.users, args.per_user)
+    print(f'seeded {args.achievements} achievements, {args.users} users x {args.per_user} unlocks '
+          f'in {time.perf_counter() - began:.1f}s')
+    with app.app_context():
+        tokens = [create_access_token(identity=f'user {user}')
+                  for user in random.Random(2).sample(range(args.users), args.sample)]
+
+    client = app.test_client()
+    failures = []
+    for endpoint in ('available', 'my-progress'):
+        query_ms, expected = _time(client, f'/bench/query/{endpoint}', tokens)
+        cold_ms, cold = _time(client, f'/achievements/{endpoint}', tokens)
+        warm_ms, warm = _time(client, f'/achievements/{endpoint}', tokens)
+        print(f'/achievements/{endpoint}: query path {query_ms:.1f} ms/request, '
+              f'bitmaps {cold_ms:.1f} cold, {warm_ms:.1f} warm')
+        if cold != expected or warm != expected:
+            failures.append(endpoint)
+
+    if failures:
+        print('FAILED: listings differ from the query path:', ', '.join(failures))
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
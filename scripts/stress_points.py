@@ -0,0 +1,131 @@
+"""
+Concurrent stress test of the redeem and donate paths.
+
+Fires parallel redemptions of one reward by one user, then parallel
+donations (many donors to one recipient, one donor to many recipients),
+against a throwaway SQLite file. Checks that no more redemptions succeed
+than the balance covers and that every stored balance equals a full
+recompute from the source tables. Exits non-zero on any mismatch.
+
+    python scripts/stress_points.py --workers 30 --requests 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix='stress-points-'), 'stress.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_DB_PATH}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from main import app  # noqa: E402
+from classes.user_points import UserPoints, _compute_user_points  # noqa: E402
+from routes.rewards import Redemption  # noqa: E402
+from utils.db import db  # noqa: E402
+
+REWARD_COST = 7
+
+
+def _headers(user_id):
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+
+
+def _parallel(workers: int, job):
+    """Run job(worker index) on workers threads at once; returns the concatenated status codes"""
+    statuses = []
+    lock = threading.Lock()
+    start = threading.Barrier(workers)
+
+    def run(index):
+        client = app.test_client()
+        start.wait()
+        codes = job(client, index)
+        with lock:
+            statuses.extend(codes)
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return Counter(statuses)
+
+
+def _mismatched_balances() -> list:
+    with app.app_context():
+        fresh = _compute_user_points()
+        stored = {row.user_id: row for row in UserPoints.query.all()}
+        return [
+            (user_id, values) for user_id, values in fresh.items()
+            if user_id in stored and {key: getattr(stored[user_id], key) for key in values} != values
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--workers', type=int, default=30, help='parallel clients')
+    parser.add_argument('--requests', type=int, default=10, help='requests per client and phase')
+    parser.add_argument('--points', type=int, default=200, help='starting points of the redeeming user')
+    args = parser.parse_args()
+
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+    reward_id = client.post('/rewards/add', json={'name': 'stress reward', 'points': REWARD_COST}).get_json()['reward']['id']
+    users = [f'stress {index}' for index in range(args.workers)]
+    client.post('/leaderboards/add', json={'user': 'redeemer', 'points': args.points, 'board': 'global'})
+    for user in users:
+        client.post('/leaderboards/add', json={'user': user, 'points': args.requests * 3, 'board': 'global'})
+    failures = []
+
+    # Parallel redemptions by one user: exactly points // cost may succeed
+    redeemer = _headers('redeemer')
+    statuses = _parallel(args.workers, lambda c, _: [
+        c.post('/rewards/redeem', json={'reward_id': reward_id}, headers=redeemer).status_code
+        for _ in range(args.requests)
+    ])
+    expected = args.points // REWARD_COST
+    with app.app_context():
+        redemptions = Redemption.query.filter_by(user_id='redeemer').count()
+        available = db.session.get(UserPoints, 'redeemer').available_points
+    print(f'redeem: {dict(statuses)} redemptions={redemptions} expected={expected} available={available}')
+    if statuses[200] != expected or redemptions != expected or available != args.points - expected * REWARD_COST:
+        failures.append('redeem')
+
+    # Many donors to one recipient, and one donor to many recipients
+    headers = {user: _headers(user) for user in users}
+    statuses = _parallel(args.workers, lambda c, index: [
+        c.post('/rewards/donate-points', json={'amount': 3, 'recipient': users[0]}, headers=headers[users[index]]).status_code
+        for _ in range(args.requests)
+    ])
+    statuses += _parallel(args.workers, lambda c, index: [
+        c.post('/rewards/donate-points', json={'amount': 1, 'recipient': users[index]}, headers=redeemer).status_code
+        for _ in range(args.requests)
+    ])
+    print(f'donate: {dict(statuses)}')
+    if set(statuses) - {200, 400}:
+        failures.append('donate')
+
+    mismatched = _mismatched_balances()
+    print(f'balances equal to a recompute: {not mismatched}', mismatched[:3])
+    if mismatched:
+        failures.append('balances')
+    with app.app_context():
+        negative = [row.user_id for row in UserPoints.query.all() if row.total_points < 0]
+    if negative:
+        failures.append(f'negative balances {negative[:3]}')
+
+    if failures:
+        print('FAILED:', ', '.join(failures))
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
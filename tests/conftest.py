@@ -0,0 +1,64 @@
+"""
+Shared fixtures: the app on a throwaway SQLite file, recreated per test.
+
+The database URL must be set before main is imported, so it is done at
+module level here. In-process caches (rank indexes, snapshots, catalogs,
+directories) are dropped between tests so they never outlive their rows.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+_DB_PATH = os.path.join(tempfile.mkdtemp(prefix='gamification-tests-'), 'test.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{_DB_PATH}'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from main import app as flask_app  # noqa: E402
+from utils.db import db  # noqa: E402
+
+
+def reset_caches():
+    from classes.achievement_rules import rule_index
+    from classes.celebration_feed import celebrations
+    from routes.leaderboards import _archive_checked, _archive_executor
+    from utils.achievement_catalog import achievement_catalog
+    from utils.rank_index import board_ranks
+    from utils.snapshot_cache import snapshots
+    from utils.unlock_bitmaps import unlock_bitmaps
+    from utils.user_directory import user_directory
+
+    _archive_executor.submit(int).result()  # let a queued hall-of-fame archive finish first
+    _archive_checked.clear()
+    celebrations.flush()
+    celebrations._recent = None
+    for cache in (rule_index, achievement_catalog, board_ranks, unlock_bitmaps, user_directory):
+        cache.invalidate()
+    snapshots.clear()
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        reset_caches()
+        yield flask_app
+        db.session.remove()
+        reset_caches()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth(app):
+    def headers(user_id):
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+    return headers
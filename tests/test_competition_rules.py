@@ -0,0 +1,18 @@
+"""Joining through the category endpoints counts towards competitions_joined rules"""
+
+from routes.achievements import UserAchievement
+
+
+def test_category_joins_unlock_competitions_joined_rules(client, auth):
+    achievement = client.post('/achievements/create-custom', json={'name': 'Explorer', 'rarity': 'rare'}).get_json()
+    rule = {'achievement_id': achievement['id'], 'metric': 'competitions_joined', 'threshold': 2}
+    assert client.post('/achievements/rules/create', json=rule).status_code == 201
+
+    first = client.post('/competitions/code-quality', headers=auth('alice'))
+    assert first.status_code == 200
+    assert first.get_json()['achievements_unlocked'] == []
+
+    second = client.post('/competitions/fitness', headers=auth('alice'))
+    assert second.status_code == 200
+    assert second.get_json()['achievements_unlocked'] == ['Explorer']
+    assert UserAchievement.query.filter_by(user_id='alice', achievement_id=achievement['id']).count() == 1
@@ -0,0 +1,83 @@
+"""The hall of fame is the archive of closed months, for listings and ranks alike"""
+
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+import routes.leaderboards as leaderboards
+from classes.user_points import MonthlyPoints, current_month
+from routes.leaderboards import HallOfFameEntry, archive_closed_periods
+from utils.db import db
+
+
+def _closed_months(count):
+    months, day = [], date.today().replace(day=1)
+    for _ in range(count):
+        day = day - timedelta(days=1)
+        months.append(day.strftime('%Y-%m'))
+        day = day.replace(day=1)
+    return months
+
+
+def test_archive_counts_only_periods_with_rows(app):
+    last, empty = _closed_months(2)
+    db.session.add_all([
+        MonthlyPoints(user_id='alice', month=last, game_points=30),
+        MonthlyPoints(user_id='bob', month=empty),  # nobody earned points that month
+    ])
+    db.session.commit()
+
+    assert archive_closed_periods() == 1
+    assert {entry.period for entry in HallOfFameEntry.query} == {last}
+
+
+def test_rank_and_around_read_the_archive(client):
+    older, latest = reversed(_closed_months(2))
+    db.session.add_all([
+        MonthlyPoints(user_id='alice', month=latest, achievement_points=50),
+        MonthlyPoints(user_id='bob', month=latest, game_points=70),
+        MonthlyPoints(user_id='carol', month=latest, game_points=10),
+        MonthlyPoints(user_id='alice', month=older, game_points=90),
+        # All-time and current-month points must not move the archived ranks
+        MonthlyPoints(user_id='carol', month=current_month(), game_points=1000),
+    ])
+    db.session.commit()
+    archive_closed_periods()
+
+    rank = client.get('/leaderboards/hall_of_fame/rank/alice').get_json()
+    assert rank == {'board': 'hall_of_fame', 'period': latest, 'user': 'alice', 'rank': 2, 'points': 50, 'total': 3}
+    assert client.get(f'/leaderboards/hall-of-fame/rank/alice?period={older}').get_json()['rank'] == 1
+
+    around = client.get('/leaderboards/hall_of_fame/around/carol?radius=1').get_json()
+    assert [(row['rank'], row['user']) for row in around['around']] == [(2, 'alice'), (3, 'carol')]
+    assert client.get(f'/leaderboards/hall_of_fame/rank/bob?period={older}').status_code == 404
+
+
+def test_reads_queue_the_archive_without_writing(client):
+    last = _closed_months(1)[0]
+    db.session.add(MonthlyPoints(user_id='alice', month=last, game_points=30))
+    db.session.commit()
+    writes = []
+
+    def record_writes(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
+            writes.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', record_writes)
+    try:
+        with patch.object(leaderboards._archive_executor, 'submit') as submit:
+            assert client.get('/leaderboards/hall-of-fame').get_json() == {'hall_of_fame': []}
+            assert client.get('/leaderboards/hall_of_fame/rank/alice').status_code == 404
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record_writes)
+    assert writes == []
+    assert submit.call_count == 1  # once per month and process
+
+    leaderboards._archive_in_background(client.application)  # what the queued job runs
+    assert client.get('/leaderboards/hall_of_fame/rank/alice').get_json()['rank'] == 1
+
+
+def test_manual_hall_of_fame_entries_are_rejected(client):
+    response = client.post('/leaderboards/add', json={'user': 'alice', 'points': 10, 'board': 'hall_of_fame'})
+    assert response.status_code == 400
+    assert client.get('/leaderboards/hall_of_fame/rank/alice').status_code == 404
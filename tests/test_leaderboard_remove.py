@@ -0,0 +1,39 @@
+"""Removing a manual entry by its integer id"""
+
+import routes.leaderboards as leaderboards
+from classes.user_points import UserPoints, _compute_user_points
+from routes.leaderboards import ManualLeaderboardEntry
+from utils.db import db
+
+
+def _entry_id(user):
+    return ManualLeaderboardEntry.query.filter_by(user=user).one().id
+
+
+def test_remove_entry_refreshes_the_balance(client):
+    client.post('/leaderboards/add', json={'user': 'alice', 'points': 40, 'board': 'global'})
+
+    response = client.delete('/leaderboards/remove', json={'id': _entry_id('alice')})
+
+    assert response.status_code == 200
+    assert db.session.get(UserPoints, 'alice').manual_points == 0
+    assert client.delete('/leaderboards/remove', json={'id': 'abc'}).status_code == 400
+    assert client.delete('/leaderboards/remove', json={'id': 999}).status_code == 404
+
+
+def test_failed_remove_rolls_back(client, monkeypatch):
+    client.post('/leaderboards/add', json={'user': 'bob', 'points': 25, 'board': 'global'})
+    entry_id = _entry_id('bob')
+
+    def fail(user_ids):
+        raise RuntimeError('balance refresh failed')
+    monkeypatch.setattr(leaderboards, 'refresh_user_points', fail)
+    monkeypatch.setitem(client.application.config, 'PROPAGATE_EXCEPTIONS', False)  # answer 500 instead of raising
+    response = client.delete('/leaderboards/remove', json={'id': entry_id})
+
+    assert response.status_code == 500
+    db.session.expire_all()
+    assert db.session.get(ManualLeaderboardEntry, entry_id) is not None
+    stored = db.session.get(UserPoints, 'bob')
+    assert stored.manual_points == _compute_user_points(['bob'])['bob']['manual_points'] == 25
+
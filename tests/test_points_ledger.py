@@ -0,0 +1,22 @@
+"""Postings keep every user's ledger balance a checkpoint plus a short tail"""
+
+from classes.points_ledger import CHECKPOINT_EVERY, PointsCheckpoint, _ledger_state, ledger_balance
+from classes.user_points import UserPoints, adjust_user_points, award_user_points
+from utils.db import db
+
+
+def test_postings_checkpoint_long_tails(app):
+    for index in range(CHECKPOINT_EVERY * 2 + 5):
+        adjust_user_points('alice', game=1, reference=f'competition:{index}')
+        award_user_points({'alice': 2, 'bob': 3}, reference=f'bulk:{index}')
+    db.session.commit()
+
+    state = _ledger_state(['alice', 'bob'])
+    assert all(entry['tail'] < CHECKPOINT_EVERY for entry in state.values())
+    assert PointsCheckpoint.query.filter_by(account='alice').count() == 4
+    assert PointsCheckpoint.query.filter(PointsCheckpoint.account.startswith('@')).count() == 0
+
+    balances = ledger_balance(['alice', 'bob'])
+    for user in ('alice', 'bob'):
+        stored = db.session.get(UserPoints, user)
+        assert balances[user] == {column: getattr(stored, column) for column in balances[user]}
@@ -0,0 +1,59 @@
+"""Structured predictions are resolved by the period-close job against the deadline's period"""
+
+from datetime import date, datetime, timedelta
+
+from classes.points_ledger import PointsLedgerEntry
+from classes.user_points import MonthlyPoints, adjust_user_points
+from routes.leaderboards import Prediction, PredictionTarget, PredictorAccuracy, archive_closed_periods
+from utils.db import db
+
+
+def _last_month():
+    return date.today().replace(day=1) - timedelta(days=1)
+
+
+def _predict(predictor, subject, board, top_n, deadline):
+    prediction = Prediction(user_id=predictor, prediction=f"{subject} top {top_n} on {board}")
+    db.session.add(prediction)
+    db.session.flush()
+    db.session.add(PredictionTarget(prediction_id=prediction.id, predictor=predictor, subject=subject,
+                                    board=board, top_n=top_n, deadline=deadline))
+
+
+def test_predictions_resolve_at_period_close(client, auth):
+    deadline = _last_month()
+    closed = deadline.strftime('%Y-%m')
+    # Last month: bob earned 60 game points and spent 55 of them, alice got 50 manual global points
+    adjust_user_points('bob', game=60)
+    db.session.commit()
+    client.post('/leaderboards/add', json={'user': 'alice', 'points': 50, 'board': 'global'})
+    reward = client.post('/rewards/add', json={'name': 'Mug', 'points': 55}).get_json()['reward']
+    assert client.post('/rewards/redeem', json={'reward_id': reward['id']}, headers=auth('bob')).status_code == 200
+    MonthlyPoints.query.filter_by(user_id='bob').update({'month': closed})
+    PointsLedgerEntry.query.update({'created_at': datetime.combine(deadline, datetime.min.time())})
+    # bob overtakes alice after the deadline; the live board must not decide the outcome
+    adjust_user_points('bob', game=500)
+
+    _predict('carol', 'bob', 'monthly', 1, deadline)
+    _predict('carol', 'alice', 'global', 1, deadline)  # manual points and the redemption decide it
+    _predict('dave', 'bob', 'global', 1, deadline)
+    _predict('dave', 'alice', 'monthly', 1, date.today())  # month still open
+    db.session.commit()
+
+    client.get('/leaderboards/predictions')
+    client.get('/leaderboards/predictions/accuracy')
+    assert archive_closed_periods() == 1
+    assert PredictionTarget.query.filter_by(outcome='pending').count() == 4  # reads and the archive never resolve
+
+    result = client.application.test_cli_runner().invoke(args=['archive-hall-of-fame'])
+    assert result.output.strip() == 'Archived 0 periods, resolved 3 predictions'
+    db.session.expire_all()
+    outcomes = {(t.subject, t.board, t.outcome, t.resolved_rank) for t in PredictionTarget.query}
+    assert outcomes == {
+        ('bob', 'monthly', 'correct', 1),
+        ('alice', 'global', 'correct', 1),
+        ('bob', 'global', 'wrong', 2),
+        ('alice', 'monthly', 'pending', None),
+    }
+    accuracy = {row.user_id: (row.resolved, row.correct) for row in PredictorAccuracy.query}
+    assert accuracy == {'carol': (2, 2), 'dave': (1, 0)}
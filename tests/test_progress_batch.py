@@ -0,0 +1,25 @@
+"""Batch progress updates report bad records per record instead of failing the batch"""
+
+from routes.games import Competition
+
+
+def test_malformed_competition_ids_fail_per_record(client, auth):
+    client.post('/games/create', json={'title': 'Math Quiz'})
+    comp_id = Competition.query.filter_by(title='Math Quiz').one().id
+    assert client.post('/games/join', json={'competition_id': comp_id}, headers=auth('alice')).status_code == 201
+
+    updates = [
+        {'competition_id': [comp_id], 'delta': 1},
+        {'competition_id': {'id': comp_id}, 'delta': 1},
+        {'competition_id': True, 'delta': 1},
+        {'competition_id': comp_id, 'delta': 4},
+        {'competition_id': 'Math Quiz', 'delta': 2},
+    ]
+    response = client.post('/games/progress/batch', json={'updates': updates}, headers=auth('alice'))
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [row['status'] for row in body['results']] == ['error', 'error', 'error', 'applied', 'applied']
+    assert body['results'][2]['message'] == 'competition_id must be an ID or a competition name'
+    assert body['results'][-1]['progress'] == 6
+    assert (body['applied'], body['failed']) == (2, 3)
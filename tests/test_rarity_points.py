@@ -0,0 +1,66 @@
+"""A rarity change made through the API is served at once and only moves achievement points"""
+
+from datetime import datetime
+
+from classes.points_ledger import ledger_balance
+from classes.user_points import MonthlyPoints, UserPoints, current_month
+from routes.achievements import UserAchievement
+from utils.db import db
+
+
+def _global_points(client):
+    return {row['user']: row['points'] for row in client.get('/leaderboards/global').get_json()['leaderboard']}
+
+
+def _bucket(user_id, month):
+    row = db.session.get(MonthlyPoints, (user_id, month), populate_existing=True)
+    return row.achievement_points, row.game_points, row.manual_points
+
+
+def test_rarity_change_reaches_cached_views(client, auth):
+    achievement = client.post('/achievements/create-custom', json={'name': 'Marathon', 'rarity': 'epic'}).get_json()
+    assert client.post('/achievements/unlock', json={'achievement_id': achievement['id']}, headers=auth('alice')).status_code == 200
+
+    # Warm the catalog, the rank index and the cached leaderboard
+    assert _global_points(client) == {'alice': 40}
+    assert client.get('/leaderboards/global/rank/alice').get_json()['points'] == 40
+
+    response = client.put('/achievements/rarity-points', json={'rarity': 'epic', 'points': 55}, headers=auth('admin'))
+    assert response.status_code == 200
+    assert response.get_json() == {'rarity': 'epic', 'points': 55, 'balances_changed': 1}
+
+    assert _global_points(client) == {'alice': 55}
+    assert client.get('/leaderboards/global/rank/alice').get_json()['points'] == 55
+    assert client.get('/achievements/my-progress', headers=auth('alice')).get_json()['total_points'] == 55
+
+
+def test_rarity_change_keeps_older_months(client, auth):
+    achievement = client.post('/achievements/create-custom', json={'name': 'Veteran', 'rarity': 'rare'}).get_json()
+    client.post('/achievements/create-custom', json={'name': 'Newcomer', 'rarity': 'common'})
+    client.post('/achievements/unlock', json={'achievement_id': achievement['id']}, headers=auth('bob'))
+
+    # History: bob unlocked it in 2025-01 and earned 30 game points then, 5 this month
+    UserAchievement.query.filter_by(user_id='bob').update({'unlocked_at': datetime(2025, 1, 15)})
+    db.session.get(MonthlyPoints, ('bob', current_month())).achievement_points = 0
+    db.session.get(MonthlyPoints, ('bob', current_month())).game_points = 5
+    db.session.add(MonthlyPoints(user_id='bob', month='2025-01', achievement_points=20, game_points=30, manual_points=0))
+    db.session.commit()
+
+    response = client.put('/achievements/rarity-points', json={'rarity': 'rare', 'points': 25}, headers=auth('admin'))
+    assert response.status_code == 200
+
+    assert _bucket('bob', '2025-01') == (25, 30, 0)
+    assert _bucket('bob', current_month()) == (0, 5, 0)
+    assert db.session.get(UserPoints, 'bob', populate_existing=True).achievement_points == 25
+    assert ledger_balance(['bob'])['bob']['achievement_points'] == 25
+    board = client.get('/leaderboards/monthly?month=2025-01').get_json()['leaderboard']
+    assert [(row['user'], row['points']) for row in board] == [('bob', 55)]
+
+
+def test_rarity_points_validation(client, auth):
+    headers = auth('admin')
+    assert client.put('/achievements/rarity-points', json={'rarity': 'epic', 'points': 50}).status_code == 401
+    assert client.put('/achievements/rarity-points', json={'rarity': 'mythic', 'points': 50}, headers=headers).status_code == 400
+    assert client.put('/achievements/rarity-points', json={'rarity': 'epic'}, headers=headers).status_code == 400
+    assert client.put('/achievements/rarity-points', json={'rarity': 'epic', 'points': 'many'}, headers=headers).status_code == 400
+    assert client.put('/achievements/rarity-points', json={'rarity': 'epic', 'points': -1}, headers=headers).status_code == 400
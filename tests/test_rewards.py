@@ -0,0 +1,76 @@
+"""Redeem and donate keep the stored balances equal to a recompute"""
+
+from classes.user_points import UserPoints, _compute_user_points
+from routes.leaderboards import ManualLeaderboardEntry
+from routes.rewards import Redemption, RewardInventory
+from utils.db import db
+
+
+def _stored(user_id):
+    row = db.session.get(UserPoints, user_id)
+    db.session.refresh(row)
+    return {key: getattr(row, key) for key in ('achievement_points', 'game_points', 'manual_points', 'spent_points')}
+
+
+def _assert_consistent(*user_ids):
+    fresh = _compute_user_points(user_ids)
+    for user_id in user_ids:
+        assert _stored(user_id) == fresh[user_id], user_id
+
+
+def test_donations_credit_one_global_entry(client, auth):
+    for user, points in (('alice', 100), ('bob', 5)):
+        assert client.post('/leaderboards/add', json={'user': user, 'points': points, 'board': 'global'}).status_code == 201
+
+    for recipient in ('bob', 'bob', 'carol'):
+        if recipient == 'carol':
+            client.post('/leaderboards/add', json={'user': 'carol', 'points': 0, 'board': 'team'})
+        response = client.post('/rewards/donate-points', json={'amount': 10, 'recipient': recipient}, headers=auth('alice'))
+        assert response.status_code == 200, response.get_json()
+
+    entries = ManualLeaderboardEntry.query.filter_by(board='global').order_by(ManualLeaderboardEntry.user).all()
+    assert [(entry.user, entry.points) for entry in entries] == [('alice', 70), ('bob', 25), ('carol', 10)]
+    _assert_consistent('alice', 'bob', 'carol')
+
+
+def test_insufficient_points_leave_balances_unchanged(client, auth):
+    client.post('/leaderboards/add', json={'user': 'dave', 'points': 5, 'board': 'global'})
+    client.post('/leaderboards/add', json={'user': 'erin', 'points': 1, 'board': 'global'})
+
+    response = client.post('/rewards/donate-points', json={'amount': 6, 'recipient': 'erin'}, headers=auth('dave'))
+
+    assert response.status_code == 400
+    assert [(entry.user, entry.points) for entry in ManualLeaderboardEntry.query.order_by(ManualLeaderboardEntry.user)] == [('dave', 5), ('erin', 1)]
+    _assert_consistent('dave', 'erin')
+
+
+def test_stock_added_by_another_worker_is_not_oversold(client, auth):
+    client.post('/leaderboards/add', json={'user': 'frank', 'points': 100, 'board': 'global'})
+    reward_id = client.post('/rewards/add', json={'name': 'mug', 'points': 10}).get_json()['reward']['id']
+    assert client.get('/rewards/available').status_code == 200  # cached catalog: the reward is unlimited
+
+    # Another worker limits the reward; this process's catalog does not see the write
+    with db.engine.begin() as connection:
+        connection.execute(RewardInventory.__table__.insert().values(reward_id=reward_id, stock=1))
+
+    statuses = [client.post('/rewards/redeem', json={'reward_id': reward_id}, headers=auth('frank')).status_code
+                for _ in range(2)]
+
+    assert statuses == [200, 400]
+    assert db.session.get(RewardInventory, reward_id, populate_existing=True).stock == 0
+    assert Redemption.query.filter_by(reward_id=reward_id).count() == 1
+    _assert_consistent('frank')
+
+
+def test_bulk_award_requires_a_jwt(client, auth):
+    client.post('/leaderboards/add', json={'user': 'bob', 'points': 5, 'board': 'global'})
+    awards = {'awards': [{'recipient': 'bob', 'amount': 1000}]}
+
+    assert client.post('/rewards/bulk-award', json=awards).status_code == 401
+    assert _stored('bob')['manual_points'] == 5
+
+    response = client.post('/rewards/bulk-award', json=awards, headers=auth('admin'))
+    assert response.status_code == 200
+    assert response.get_json()['awarded_by'] == 'admin'
+    _assert_consistent('bob')
+    assert _stored('bob')['manual_points'] == 1005
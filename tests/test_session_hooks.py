@@ -0,0 +1,40 @@
+"""After-commit callbacks and tracked writes survive a rolled-back savepoint"""
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from classes.user_points import UserPoints
+from utils.db import db, run_after_commit
+from utils.snapshot_cache import data_version
+
+
+def test_callbacks_run_after_rolled_back_savepoint(app):
+    db.session.add(UserPoints(user_id='alice'))
+    db.session.commit()
+
+    ran = []
+    version = data_version.of(('user_points',))
+    run_after_commit(lambda: ran.append('before savepoint'))
+    db.session.add(UserPoints(user_id='bob'))
+    try:
+        with db.session.begin_nested():
+            # Duplicate key, as a balance row created meanwhile by a parallel request would be
+            db.session.execute(insert(UserPoints).values(user_id='alice'))
+    except IntegrityError:
+        pass
+    run_after_commit(lambda: ran.append('after savepoint'))
+    db.session.commit()
+
+    assert ran == ['before savepoint', 'after savepoint']
+    assert data_version.of(('user_points',)) > version
+    assert db.session.get(UserPoints, 'bob') is not None
+
+
+def test_callbacks_dropped_on_rollback(app):
+    ran = []
+    run_after_commit(lambda: ran.append('rolled back'))
+    db.session.add(UserPoints(user_id='carol'))
+    db.session.rollback()
+    db.session.commit()
+
+    assert ran == []
@@ -0,0 +1,42 @@
+"""Balance writes add deltas in SQL and create missing rows race-safely"""
+
+from sqlalchemy import insert, update
+
+import classes.user_points as user_points
+from classes.user_points import UserPoints, adjust_user_points
+from utils.db import db
+
+
+def test_adjust_keeps_a_concurrent_write(app):
+    db.session.add(UserPoints(user_id='alice', achievement_points=10, game_points=0, manual_points=0, spent_points=0))
+    db.session.commit()
+    loaded = db.session.get(UserPoints, 'alice')  # held in this session's identity map
+    assert loaded.game_points == 0
+
+    # Another worker adds game points after this session read the row
+    with db.engine.begin() as connection:
+        connection.execute(update(UserPoints).where(UserPoints.user_id == 'alice').values(game_points=7))
+
+    row = adjust_user_points('alice', game=5, reference='competition:1')
+    db.session.commit()
+
+    assert row is loaded
+    assert (row.achievement_points, row.game_points) == (10, 12)
+
+
+def test_first_use_tolerates_a_row_created_meanwhile(app, monkeypatch):
+    compute = user_points._compute_user_points
+
+    def compute_while_another_worker_inserts(user_ids):
+        # The other worker creates the row between this session's lookup and its insert
+        with db.engine.begin() as connection:
+            connection.execute(insert(UserPoints).values(user_id='bob', achievement_points=0, game_points=3,
+                                                         manual_points=0, spent_points=0))
+        monkeypatch.setattr(user_points, '_compute_user_points', compute)
+        return compute(user_ids)
+    monkeypatch.setattr(user_points, '_compute_user_points', compute_while_another_worker_inserts)
+
+    adjust_user_points('bob', manual=4, reference='manual:global')
+    db.session.commit()
+
+    assert db.session.get(UserPoints, 'bob').total_points == 7
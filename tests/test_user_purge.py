@@ -0,0 +1,30 @@
+"""A purge closes the user's ledger account without rewriting its legs"""
+
+from classes.points_ledger import REMOVED_ACCOUNT, PointsLedgerEntry, checkpoint_points_ledger, ledger_balance
+from classes.user_purge import _executor, start_user_purge
+from utils.db import db
+
+
+def _legs(account):
+    return [(leg.id, leg.txn, leg.source, leg.reference, leg.amount)
+            for leg in PointsLedgerEntry.query.filter_by(account=account).order_by(PointsLedgerEntry.id)]
+
+
+def test_purge_posts_closing_transaction(client, auth):
+    client.post('/leaderboards/add', json={'user': 'alice', 'points': 50, 'board': 'global'})
+    client.post('/leaderboards/add', json={'user': 'bob', 'points': 1, 'board': 'global'})
+    client.post('/rewards/donate-points', json={'amount': 20, 'recipient': 'bob'}, headers=auth('alice'))
+    checkpoint_points_ledger(min_tail=1)
+    before = _legs('alice')
+
+    start_user_purge('alice')
+    _executor.submit(int).result()  # wait for the purge worker
+    db.session.expire_all()
+
+    after = _legs('alice')
+    assert after[:len(before)] == before  # existing legs untouched
+    closing = after[len(before):]
+    assert {reference for _, _, _, reference, _ in closing} == {'user-removed'}
+    assert ledger_balance(['alice'])['alice'] == {'achievement_points': 0, 'game_points': 0, 'manual_points': 0, 'spent_points': 0}
+    assert ledger_balance([REMOVED_ACCOUNT])[REMOVED_ACCOUNT]['manual_points'] == 30
+    assert db.session.query(db.func.sum(PointsLedgerEntry.amount)).scalar() == 0
@@ -0,0 +1,107 @@
+"""
+In-process catalog of achievements and rarity point values.
+
+Every points calculation needs the rarity (and so the points) of the
+achievements a user unlocked. The catalog holds id -> (name, rarity, points,
+description, locked) for all achievements, in id and in name order, and the
+rarity -> points table, loaded lazily with two queries, so those lookups and
+the achievement listings never hit the database.
+
+Rarity points default to DEFAULT_RARITY_POINTS; rows of the
+achievement_rarity_points table override them (set with
+`PUT /achievements/rarity-points`). Unknown rarities are worth as much as common.
+The catalog is dropped after commits that create or remove an achievement
+or change a rarity value, and reloaded on next use.
+"""
+
+import threading
+from collections import namedtuple
+
+from utils.db import db, run_after_commit
+
+DEFAULT_RARITY_POINTS = {
+    'common': 10,
+    'rare': 20,
+    'epic': 40,
+    'legendary': 80,
+}
+FALLBACK_RARITY = 'common'
+
+CatalogEntry = namedtuple('CatalogEntry', ['id', 'name', 'rarity', 'points', 'description', 'locked'])
+
+
+def load_rarity_points() -> dict:
+    """rarity -> points as configured in the database (defaults overridden by achievement_rarity_points rows)"""
+    rarity_points = dict(DEFAULT_RARITY_POINTS)
+    rarities = db.metadata.tables['achievement_rarity_points']
+    rarity_points.update(db.session.execute(db.select(rarities.c.rarity, rarities.c.points)).all())
+    return rarity_points
+
+
+def points_for(rarity_points: dict, rarity) -> int:
+    """Points of a rarity in a rarity -> points table (unknown rarities count as FALLBACK_RARITY)"""
+    return rarity_points.get(rarity, rarity_points.get(FALLBACK_RARITY, 0))
+
+
+class AchievementCatalog:
+    """Achievement and rarity lookups, safe to share between request threads"""
+
+    def __init__(self):
+        self._state = None  # (rarity -> points, id -> CatalogEntry, entries by name), None until loaded
+        self._lock = threading.Lock()
+
+    def _load(self):
+        state = self._state
+        if state is None:
+            with self._lock:
+                if self._state is None:
+                    rarity_points = load_rarity_points()
+                    achievements = db.metadata.tables['achievements']
+                    rows = db.session.execute(
+                        db.select(achievements.c.id, achievements.c.name, achievements.c.rarity,
+                                  achievements.c.description, achievements.c.locked)
+                        .order_by(achievements.c.id.asc())
+                    ).all()
+                    entries = {
+                        achievement_id: CatalogEntry(achievement_id, name, rarity, points_for(rarity_points, rarity),
+                                                     description, locked)
+                        for achievement_id, name, rarity, description, locked in rows
+                    }
+                    by_name = sorted(entries.values(), key=lambda entry: entry.name)
+                    self._state = (rarity_points, entries, by_name)
+                state = self._state
+        return state
+
+    def rarity_points(self, rarity) -> int:
+        """Points of an achievement of the given rarity"""
+        return points_for(self._load()[0], rarity)
+
+    def get(self, achievement_id):
+        """CatalogEntry of an achievement, or None if it does not exist"""
+        try:
+            achievement_id = int(achievement_id)
+        except (TypeError, ValueError):
+            return None
+        return self._load()[1].get(achievement_id)
+
+    def entries(self, order: str = 'id') -> list:
+        """Every CatalogEntry, by id or by name"""
+        state = self._load()
+        return state[2] if order == 'name' else list(state[1].values())
+
+    def points(self, achievement_id) -> int:
+        """Points of an achievement (0 if it no longer exists)"""
+        entry = self.get(achievement_id)
+        return entry.points if entry else 0
+
+    def invalidate(self):
+        """Drop the catalog so it is reloaded on next use"""
+        with self._lock:
+            self._state = None
+
+    def invalidate_after_commit(self):
+        run_after_commit(self.invalidate)
+
+
+# Shared catalog used by every points path
+achievement_catalog = AchievementCatalog()
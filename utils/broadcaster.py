@@ -0,0 +1,58 @@
+"""
+In-process fan-out of live updates to Server-Sent Events clients.
+
+Write paths publish compact deltas ("user X total now N", "user Y joined
+competition Z") once their transaction commits; every open /api/stream
+connection gets its own bounded queue fed by the single broadcaster, so
+clients apply changes in place instead of refetching whole listings.
+"""
+
+import queue
+import threading
+
+from utils.db import run_after_commit
+
+
+class Subscriber:
+    """Queue of pending events of one stream connection"""
+
+    MAX_PENDING = 500
+
+    def __init__(self):
+        self.events = queue.Queue(maxsize=self.MAX_PENDING)
+        self.overflowed = False  # fell behind; the client must resync from the full listing
+
+
+class Broadcaster:
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber()
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event: dict):
+        """Queue event for every subscriber; subscribers that fell behind are dropped"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.events.put_nowait(event)
+            except queue.Full:
+                subscriber.overflowed = True
+                self.unsubscribe(subscriber)
+
+    def publish_after_commit(self, event: dict):
+        """Publish event once the current transaction commits (dropped on rollback)"""
+        run_after_commit(lambda: self.publish(event))
+
+
+# Shared broadcaster behind /api/stream
+broadcaster = Broadcaster()
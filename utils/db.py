@@ -1,3 +1,31 @@
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+db = SQLAlchemy()
+
+
+def run_after_commit(callback):
+    """
+    Run callback once the current transaction commits.
+
+    Used to keep in-process state (rank indexes, caches) in step with the
+    database: callbacks are dropped if the transaction rolls back (a
+    rolled-back savepoint keeps them, as the transaction may still commit).
+    They run after the commit and must not use the session.
+    """
+    db.session.info.setdefault('after_commit', []).append(callback)
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_after_commit_callbacks(session):
+    for callback in session.info.pop('after_commit', []):
+        callback()
+
 
-db = SQLAlchemy()
\ No newline at end of file
+@event.listens_for(Session, 'after_soft_rollback')
+def _drop_after_commit_callbacks(session, previous_transaction):
+    if previous_transaction.nested:
+        return  # a savepoint rolled back; the enclosing transaction may still commit
+    session.info.pop('after_commit', None)
@@ -0,0 +1,319 @@
+"""
+In-process leaderboard rank indexes.
+
+Each board keeps its users ordered by (points descending, user ascending)
+in an indexable skiplist, so a user's rank, a page of the board and the
+players around a user are O(log n) lookups instead of a full rebuild.
+
+Indexes are built lazily from the database by a loader registered by the
+leaderboards blueprint, and kept current by point deltas that write paths
+record with board_ranks.record(). Deltas are applied only after the
+transaction commits.
+"""
+
+import random
+import threading
+
+from utils.db import run_after_commit
+
+
+class _End:
+    """Sentinel key that compares greater than every other key"""
+
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+    def __ge__(self, other):
+        return True
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+_NIL = _Node(_End(), 0)
+
+
+class IndexableSkiplist:
+    """
+    Sorted container with O(log n) insert, remove, position lookup and access by position.
+
+    Every link stores its width (how many bottom-level steps it skips), which
+    is what makes positional lookups logarithmic.
+    """
+
+    MAX_LEVELS = 24  # comfortably above log2 of any realistic number of users
+
+    def __init__(self):
+        self.size = 0
+        self.head = _Node(None, self.MAX_LEVELS)
+        self.head.next = [_NIL] * self.MAX_LEVELS
+
+    @classmethod
+    def from_sorted(cls, keys):
+        """Build a skiplist from already sorted keys in O(n)"""
+        skiplist = cls()
+        last = [skiplist.head] * cls.MAX_LEVELS
+        last_position = [0] * cls.MAX_LEVELS
+        position = 0
+        for position, key in enumerate(keys, 1):
+            node = _Node(key, cls._random_levels())
+            for level in range(len(node.next)):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level], last_position[level] = node, position
+        for level in range(cls.MAX_LEVELS):
+            last[level].next[level] = _NIL
+            last[level].width[level] = position + 1 - last_position[level]
+        skiplist.size = position
+        return skiplist
+
+    @classmethod
+    def _random_levels(cls) -> int:
+        levels = 1
+        while levels < cls.MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        return levels
+
+    def __len__(self):
+        return self.size
+
+    def _node_at(self, position: int) -> _Node:
+        """Node at 0-based position"""
+        if not 0 <= position < self.size:
+            raise IndexError(position)
+        node = self.head
+        steps = position + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.width[level] <= steps:
+                steps -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def __getitem__(self, position: int):
+        return self._node_at(position).key
+
+    def slice(self, start: int, stop: int) -> list:
+        """Keys at positions [start, stop)"""
+        start, stop = max(0, start), min(self.size, stop)
+        if start >= stop:
+            return []
+        node = self._node_at(start)
+        keys = []
+        for _ in range(stop - start):
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+    def index(self, key) -> int:
+        """0-based position of key (raises KeyError if missing)"""
+        node = self.head
+        position = 0
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        if node.next[0] is _NIL or node.next[0].key != key:
+            raise KeyError(key)
+        return position
+
+    def insert(self, key):
+        chain = [None] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self.head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = self._random_levels()
+        new_node = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain = [None] * self.MAX_LEVELS
+        node = self.head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+        target = chain[0].next[0]
+        if target is _NIL or target.key != key:
+            raise KeyError(key)
+
+        levels = len(target.next)
+        for level in range(levels):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+class RankIndex:
+    """
+    Ranking of one board: users ordered by points descending, then user name.
+
+    Ranks are 1-based positions in that order, matching the order of the
+    full leaderboard response.
+    """
+
+    def __init__(self, points=None):
+        self._points = dict(points or {})
+        self._order = IndexableSkiplist.from_sorted(sorted((-p, user) for user, p in self._points.items()))
+
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, user):
+        return user in self._points
+
+    def get(self, user):
+        """Points of user or None"""
+        return self._points.get(user)
+
+    def set(self, user, points: int):
+        if user in self._points:
+            self._order.remove((-self._points[user], user))
+        self._points[user] = points
+        self._order.insert((-points, user))
+
+    def add(self, user, delta: int):
+        if delta or user not in self._points:
+            self.set(user, self._points.get(user, 0) + delta)
+
+    def remove(self, user):
+        if user in self._points:
+            self._order.remove((-self._points.pop(user), user))
+
+    def rank(self, user):
+        """1-based rank of user or None if the user is not on the board"""
+        if user not in self._points:
+            return None
+        return self._order.index((-self._points[user], user)) + 1
+
+    def entries(self, start: int, stop: int) -> list:
+        """Entries at 0-based positions [start, stop) as {rank, user, points}"""
+        start = max(0, start)
+        return [
+            {"rank": start + offset + 1, "user": user, "points": -neg_points}
+            for offset, (neg_points, user) in enumerate(self._order.slice(start, stop))
+        ]
+
+    def around(self, user, radius: int) -> list:
+        """Entries within radius positions of user (empty if the user is not on the board)"""
+        rank = self.rank(user)
+        if rank is None:
+            return []
+        return self.entries(rank - 1 - radius, rank + radius)
+
+
+class BoardRanks:
+    """
+    Registry of RankIndex objects, one per board, safe to share between request threads.
+
+    A loader(board) -> {user: points} builds missing indexes. Boards listed in
+    fixed_membership (e.g. 'team') only gain users through invalidate(); for
+    other boards a delta for an unknown user means a new member, so the board
+    is rebuilt on next use.
+    """
+
+    def __init__(self):
+        self.loader = None
+        self.fixed_membership = set()
+        self._indexes = {}
+        self._generations = {}
+        self._next_generation = 0
+        self._lock = threading.RLock()
+
+    def configure(self, loader, fixed_membership=()):
+        self.loader = loader
+        self.fixed_membership = set(fixed_membership)
+
+    def _index(self, board: str) -> RankIndex:
+        index = self._indexes.get(board)
+        if index is None:
+            index = RankIndex(self.loader(board))
+            self._next_generation += 1
+            self._indexes[board] = index
+            self._generations[board] = self._next_generation
+        return index
+
+    def rank(self, board: str, user):
+        """(rank, points, board size) of user; rank is None when the user is not on the board"""
+        with self._lock:
+            index = self._index(board)
+            return index.rank(user), index.get(user), len(index)
+
+    def around(self, board: str, user, radius: int):
+        """(entries around user, board size)"""
+        with self._lock:
+            index = self._index(board)
+            return index.around(user, radius), len(index)
+
+    def entries(self, board: str, start: int, stop: int):
+        """(entries at positions [start, stop), board size)"""
+        with self._lock:
+            index = self._index(board)
+            return index.entries(start, stop), len(index)
+
+    def invalidate(self, boards=None):
+        """Drop indexes so they are rebuilt on next use (all boards when boards is None)"""
+        with self._lock:
+            for board in list(self._indexes):
+                if boards is None or board in boards:
+                    del self._indexes[board]
+                    del self._generations[board]
+
+    def invalidate_after_commit(self, boards=None):
+        run_after_commit(lambda: self.invalidate(boards))
+
+    def record(self, user, delta: int, boards=None):
+        """
+        Schedule a points delta for user on boards (all boards when None) for after commit.
+
+        An index (re)built between this call and the commit may already
+        contain the change, so such boards are invalidated instead.
+        """
+        with self._lock:
+            seen = dict(self._generations)
+        run_after_commit(lambda: self._apply(user, delta, boards, seen))
+
+    def _apply(self, user, delta, boards, seen):
+        with self._lock:
+            for board, index in list(self._indexes.items()):
+                if boards is not None and board not in boards:
+                    continue
+                if seen.get(board) != self._generations[board]:
+                    self.invalidate([board])
+                elif user in index:
+                    index.add(user, delta)
+                elif board not in self.fixed_membership:
+                    self.invalidate([board])
+
+
+# Shared registry used by the leaderboards blueprint and every write path that changes points
+board_ranks = BoardRanks()
@@ -0,0 +1,155 @@
+"""
+Versioned snapshots of read-heavy views (leaderboards, players listing,
+reward catalog, achievement unlock counters).
+
+A process-wide data version is bumped after every commit that wrote one of
+the tables the views are built from. Snapshots are stored with the version
+they were computed at and recomputed on first use after it moves on, and
+responses carry an ETag derived from it, so a client polling an unchanged
+view gets 304 Not Modified without any SQL being run.
+"""
+
+import threading
+import uuid
+
+from flask import Response, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Tables whose writes change a leaderboard, the players listing, the reward catalog or the unlock counters
+TRACKED_TABLES = frozenset({
+    'user_achievements',
+    'achievements',
+    'achievement_unlock_counts',
+    'participations',
+    'user_competitions',
+    'rewards_redemptions',
+    'manual_leaderboard_entries',
+    'manual_leaderboard',
+    'user_teams',
+    'user_points',
+    'monthly_points',
+    'hall_of_fame_archive',
+    'rewards_rewards',
+    'rewards_inventory',
+})
+
+# Distinguishes ETags of this process from those issued before a restart,
+# when the version counter started over
+_EPOCH = uuid.uuid4().hex[:8]
+
+
+class DataVersion:
+    """Monotonic counter of committed writes to TRACKED_TABLES, also kept per table"""
+
+    def __init__(self):
+        self.value = 0
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    def bump(self, tables=()):
+        with self._lock:
+            self.value += 1
+            for table in tables:
+                self._tables[table] = self.value
+
+    def of(self, tables=None) -> int:
+        """Current version, or the version of the last write to any of tables"""
+        if tables is None:
+            return self.value
+        return max((self._tables.get(table, 0) for table in tables), default=0)
+
+
+data_version = DataVersion()
+
+
+class SnapshotCache:
+    """
+    Values computed at the current data version, keyed by view.
+
+    A snapshot that depends on a few tables only (e.g. team membership on
+    user_teams) can pass them, so writes to other tables keep it valid.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, compute, tables=None):
+        """Cached value of key, computed with compute() if missing or stale"""
+        # Read the version first: a write committing meanwhile moves it on,
+        # so a snapshot that may miss that write is never served as current
+        version = data_version.of(tables)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[2]
+        value = compute()
+        with self._lock:
+            # Snapshots of older versions are never served again
+            self._entries = {k: e for k, e in self._entries.items() if e[0] == data_version.of(e[1])}
+            self._entries[key] = (version, tables, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+
+snapshots = SnapshotCache()
+
+
+def cached_response(tag: str, build, tables=None):
+    """
+    Serve build() with an ETag for the current data version.
+
+    Returns 304 Not Modified without calling build() when the client sent
+    If-None-Match with that ETag. Only successful responses are tagged.
+
+    Args:
+        tag (str): Identifies the view (e.g. board and month)
+        build: Callable returning a Flask response or (body, status) tuple
+        tables: Tables the view depends on (default all TRACKED_TABLES)
+    """
+    etag = f"{tag}-{_EPOCH}-v{data_version.of(tables)}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag)
+    return response
+
+
+# ---------- VERSION TRACKING ----------
+@event.listens_for(Session, 'before_flush')
+def _mark_tracked_writes(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table in TRACKED_TABLES:
+            session.info.setdefault('tracked_writes', set()).add(table)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_tracked_bulk_writes(orm_execute_state):
+    # Query.delete() / update() and bulk insert() bypass the flush
+    mapper = orm_execute_state.bind_mapper
+    is_write = orm_execute_state.is_delete or orm_execute_state.is_update or orm_execute_state.is_insert
+    if is_write and mapper is not None:
+        table = mapper.persist_selectable.name
+        if table in TRACKED_TABLES:
+            orm_execute_state.session.info.setdefault('tracked_writes', set()).add(table)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_data_version(session):
+    tables = session.info.pop('tracked_writes', None)
+    if tables:
+        data_version.bump(tables)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _drop_tracked_writes(session, previous_transaction):
+    if previous_transaction.nested:
+        return  # a savepoint rolled back; the enclosing transaction may still commit
+    session.info.pop('tracked_writes', None)
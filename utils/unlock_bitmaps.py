@@ -0,0 +1,146 @@
+"""
+In-process bitmaps of the achievements each user unlocked.
+
+A user's bitmap is an int with bit n set when they unlocked achievement n,
+read with one query the first time the user is looked at. The achievement
+listings then test bits against the cached achievement catalog instead of
+loading the user's user_achievements rows (and the catalog) every call.
+
+Bitmaps are kept current by session hooks: unlocks of committed
+transactions set their bits, locks drop the user's bitmap, and bulk deletes of user_achievements
+(achievement removal, user purge) drop every bitmap so they are reloaded on
+next use. At most MAX_CACHED_USERS bitmaps are kept, least recently used
+first out.
+"""
+
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from utils.db import db
+
+MAX_CACHED_USERS = 20000
+TABLE = 'user_achievements'
+
+
+class UnlockBitmaps:
+    """User -> bitmap of unlocked achievement ids, safe to share between request threads"""
+
+    def __init__(self, size: int = MAX_CACHED_USERS):
+        self._bitmaps = OrderedDict()
+        self._size = size
+        self._generation = 0  # moves on with every change, so a load that overlapped one is not kept
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> int:
+        """Bitmap of the achievements user_id unlocked"""
+        with self._lock:
+            bitmap = self._bitmaps.get(user_id)
+            if bitmap is not None:
+                self._bitmaps.move_to_end(user_id)
+                return bitmap
+            generation = self._generation
+        user_achievements = db.metadata.tables[TABLE]
+        bitmap = 0
+        for achievement_id in db.session.execute(
+            db.select(user_achievements.c.achievement_id).where(user_achievements.c.user_id == user_id)
+        ).scalars():
+            bitmap |= 1 << achievement_id
+        with self._lock:
+            if generation == self._generation:
+                self._bitmaps[user_id] = bitmap
+                if len(self._bitmaps) > self._size:
+                    self._bitmaps.popitem(last=False)
+        return bitmap
+
+    def apply(self, changes):
+        """
+        Apply committed (user, achievement id, unlocked) changes in order.
+
+        An unlock sets its bit; a lock drops the user's bitmap instead of
+        clearing the bit, as another row may still hold the same unlock.
+        """
+        with self._lock:
+            self._generation += 1
+            for user_id, achievement_id, unlocked in changes:
+                if user_id not in self._bitmaps:
+                    continue
+                if unlocked:
+                    self._bitmaps[user_id] |= 1 << achievement_id
+                else:
+                    del self._bitmaps[user_id]
+
+    def forget(self, user_ids):
+        """Drop the bitmaps of user_ids so they are reloaded on next use"""
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._bitmaps.pop(user_id, None)
+
+    def invalidate(self):
+        """Drop every bitmap"""
+        with self._lock:
+            self._generation += 1
+            self._bitmaps.clear()
+
+
+def is_unlocked(bitmap: int, achievement_id: int) -> bool:
+    return bool(bitmap >> achievement_id & 1)
+
+
+# Shared bitmaps behind /achievements/available and /achievements/my-progress
+unlock_bitmaps = UnlockBitmaps()
+
+
+# ---------- MAINTENANCE ----------
+def _pending(session) -> dict:
+    return session.info.setdefault('unlock_bitmaps', {'changes': [], 'invalidate': False})
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_unlocks(session, flush_context, instances):
+    for obj in session.new:
+        if getattr(obj, '__tablename__', None) == TABLE:
+            _pending(session)['changes'].append((obj.user_id, obj.achievement_id, True))
+    for obj in session.deleted:
+        if getattr(obj, '__tablename__', None) == TABLE:
+            _pending(session)['changes'].append((obj.user_id, obj.achievement_id, False))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_unlocks(orm_execute_state):
+    # Bulk insert() executemany and Query.delete() bypass the flush
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.persist_selectable.name != TABLE:
+        return
+    if orm_execute_state.is_insert:
+        rows = orm_execute_state.parameters or []
+        rows = [rows] if isinstance(rows, dict) else rows
+        _pending(orm_execute_state.session)['changes'].extend(
+            (row['user_id'], row['achievement_id'], True) for row in rows
+        )
+    elif orm_execute_state.is_delete or orm_execute_state.is_update:
+        _pending(orm_execute_state.session)['invalidate'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_unlocks(session):
+    pending = session.info.pop('unlock_bitmaps', None)
+    if pending is None:
+        return
+    if pending['invalidate']:
+        unlock_bitmaps.invalidate()
+    else:
+        unlock_bitmaps.apply(pending['changes'])
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _drop_unlocks(session, previous_transaction):
+    if previous_transaction.nested:
+        return  # a savepoint rolled back; the enclosing transaction may still commit
+    pending = session.info.pop('unlock_bitmaps', None)
+    if pending:
+        # A load inside the transaction may have read its uncommitted rows
+        unlock_bitmaps.forget(user_id for user_id, _, _ in pending['changes'])
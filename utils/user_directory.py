@@ -0,0 +1,143 @@
+"""
+In-process directory of every known user identity.
+
+A user is known once they registered (user table) or took part in any
+activity (games, competitions, achievements, manual leaderboard entries);
+the latter are the "active" users listed on the homepage. The directory is
+loaded lazily from the database once, then kept current by session hooks:
+identities of newly inserted rows are added after their transaction
+commits, so existence checks and the all-users listing are in-memory set
+operations instead of DISTINCT / UNION scans.
+
+Deleting activity rows can make a user inactive, so deletes from the
+source tables drop the directory and it is reloaded on next use.
+"""
+
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from utils.db import db
+
+# Table -> (identity column, kind): rows of these tables make their user known
+SOURCES = {
+    'user': ('username', 'registered'),
+    'participations': ('user_id', 'active'),
+    'user_competitions': ('user_id', 'active'),
+    'user_achievements': ('user_id', 'active'),
+    'manual_leaderboard_entries': ('user', 'active'),
+}
+
+
+class UserDirectory:
+    """Registered and active user identities, safe to share between request threads"""
+
+    def __init__(self):
+        self._users = None  # kind -> set of identities, None until loaded
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        users = self._users
+        if users is None:
+            with self._lock:
+                if self._users is None:
+                    loaded = {'registered': set(), 'active': set()}
+                    for table, (column, kind) in SOURCES.items():
+                        identity = db.metadata.tables[table].c[column]
+                        loaded[kind].update(db.session.execute(db.select(identity).distinct()).scalars())
+                    self._users = loaded
+                users = self._users
+        return users
+
+    def exists(self, user) -> bool:
+        """Whether user is registered or has data in the system"""
+        users = self._load()
+        return user in users['registered'] or user in users['active']
+
+    def known(self, names) -> set:
+        """Names among names that are registered or have data in the system"""
+        users = self._load()
+        return {name for name in names if name in users['registered'] or name in users['active']}
+
+    def count(self) -> int:
+        """Number of known users (registered or active)"""
+        users = self._load()
+        return len(users['registered'] | users['active'])
+
+    def is_registered(self, user) -> bool:
+        return user in self._load()['registered']
+
+    def active_users(self) -> set:
+        """Every user that took part in any activity (copy)"""
+        return set(self._load()['active'])
+
+    def add(self, kind: str, users):
+        with self._lock:
+            # Not loaded yet: the load will read the committed rows anyway
+            if self._users is not None:
+                self._users[kind].update(users)
+
+    def invalidate(self):
+        """Drop the directory so it is reloaded on next use"""
+        with self._lock:
+            self._users = None
+
+
+# Shared directory used by existence checks and the players listing
+user_directory = UserDirectory()
+
+
+# ---------- MAINTENANCE ----------
+def _pending(session) -> dict:
+    return session.info.setdefault('user_directory', {'registered': set(), 'active': set(), 'invalidate': False})
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_new_identities(session, flush_context, instances):
+    for obj in session.new:
+        source = SOURCES.get(getattr(obj, '__tablename__', None))
+        if source and getattr(obj, source[0], None) is not None:
+            _pending(session)[source[1]].add(getattr(obj, source[0]))
+    if any(getattr(obj, '__tablename__', None) in SOURCES for obj in session.deleted):
+        _pending(session)['invalidate'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_identities(orm_execute_state):
+    # Bulk insert() executemany and Query.delete() bypass the flush
+    mapper = orm_execute_state.bind_mapper
+    source = SOURCES.get(mapper.persist_selectable.name) if mapper is not None else None
+    if source is None:
+        return
+    if orm_execute_state.is_insert:
+        rows = orm_execute_state.parameters or []
+        rows = [rows] if isinstance(rows, dict) else rows
+        _pending(orm_execute_state.session)[source[1]].update(
+            row[source[0]] for row in rows if row.get(source[0]) is not None
+        )
+    elif orm_execute_state.is_delete:
+        _pending(orm_execute_state.session)['invalidate'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_identities(session):
+    pending = session.info.pop('user_directory', None)
+    if pending is None:
+        return
+    if pending['invalidate']:
+        user_directory.invalidate()
+        return
+    for kind in ('registered', 'active'):
+        if pending[kind]:
+            user_directory.add(kind, pending[kind])
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _drop_identities(session, previous_transaction):
+    if previous_transaction.nested:
+        return  # a savepoint rolled back; the enclosing transaction may still commit
+    pending = session.info.pop('user_directory', None)
+    if pending and (pending['registered'] or pending['active']):
+        # A load inside the transaction may have read its uncommitted rows
+        user_directory.invalidate()
@@ -1,4 +1,5 @@
 from .logger import Logger
+from .achievement_catalog import achievement_catalog
 movies = [{'id': 1, 'name': 'spiderman3', 'rate': 3.9},
           {'id': 2, 'name': 'taken 3', 'rate': 2.4}]
 
@@ -8,11 +9,11 @@ users = []
 L = Logger('../logs.txt')
 
 def get_achievement_points(rarity: str) -> int:
-    """Get points for achievement based on rarity - shared utility function"""
-    rarity_points = {
-        'common': 10,
-        'rare': 20,
-        'epic': 40,
-        'legendary': 80
-    }
-    return rarity_points.get(rarity, 10)  # default to common if rarity not found
\ No newline at end of file
+    """Get points for achievement based on rarity - shared utility function (configured values, cached)"""
+    return achievement_catalog.rarity_points(rarity)  # unknown rarities count as common
+
+
+def chunked(items, size: int = 500):
+    """Split items into lists of at most size elements - keeps IN (...) lists within database parameter limits"""
+    items = list(items)
+    return [items[start:start + size] for start in range(0, len(items), size)]